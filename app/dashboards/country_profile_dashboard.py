@@ -3,16 +3,18 @@ Country Profile Dashboard
 Detailed view for individual country analysis
 """
 import dash
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, callback, ctx
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from flask import current_app
 from app import create_dash_app
-from app.models import Country, Production, Exports, Reserves, Imports
+from app.models import Production, Exports, Reserves, Imports
+from app.services.downsampling import downsample_figure
+from app.services.reference import get_reference_data
+from app.services.timeseries import country_series, resolve_window
 from app import db
-from sqlalchemy import func, extract
-from datetime import datetime, timedelta
+from sqlalchemy import func
 
 
 def create_country_profile_dashboard(server, url_base_pathname):
@@ -22,7 +24,7 @@ def create_country_profile_dashboard(server, url_base_pathname):
     # Get list of countries for dropdown (within app context)
     try:
         with server.app_context():
-            countries = Country.query.order_by(Country.name).all()
+            countries = get_reference_data().countries.values()
             country_options = [{'label': c.name, 'value': c.id} for c in countries]
             default_country = country_options[0]['value'] if country_options else None
     except Exception:
@@ -30,6 +32,9 @@ def create_country_profile_dashboard(server, url_base_pathname):
         default_country = None
     
     dash_app.layout = html.Div([
+        # Viewport width reported by the browser, used to size line-chart point budgets
+        dcc.Store(id='country-viewport-width'),
+        
         html.Div([
             html.H1(
                 "Country Profile Dashboard",
@@ -53,6 +58,19 @@ def create_country_profile_dashboard(server, url_base_pathname):
                     style={'marginBottom': '30px'}
                 )
             ], className='col-md-6'),
+            html.Div([
+                html.Label("Date Range:", style={'fontWeight': '500', 'marginBottom': '8px', 'display': 'block'}),
+                dcc.DatePickerRange(
+                    id='country-date-range',
+                    # Left empty so resolve_window() supplies the last five years at request time
+                    start_date=None,
+                    end_date=None,
+                    start_date_placeholder_text='Last 5 years',
+                    end_date_placeholder_text='Today',
+                    display_format='YYYY-MM-DD',
+                    style={'marginBottom': '30px'}
+                )
+            ], className='col-md-6'),
         ], className='row', style={'marginBottom': '30px'}),
         
         html.Div([
@@ -95,7 +113,7 @@ def create_country_profile_dashboard(server, url_base_pathname):
         if not country_id:
             return [html.Div()] * 4
         
-        country = Country.query.get(country_id)
+        country = get_reference_data().country(country_id)
         if not country:
             return [html.Div()] * 4
         
@@ -155,34 +173,36 @@ def create_country_profile_dashboard(server, url_base_pathname):
         
         return kpi_prod, kpi_exports, kpi_imports, kpi_reserves
     
+    dash_app.clientside_callback(
+        "function(_) { return window.innerWidth; }",
+        Output('country-viewport-width', 'data'),
+        Input('country-viewport-width', 'id')
+    )
+    
     @callback(
         Output('country-production-trend', 'figure'),
-        [Input('country-select', 'value')]
+        [Input('country-select', 'value'),
+         Input('country-date-range', 'start_date'),
+         Input('country-date-range', 'end_date'),
+         Input('country-production-trend', 'relayoutData')],
+        State('country-viewport-width', 'data')
     )
-    def update_country_production_trend(country_id):
+    def update_country_production_trend(country_id, start_date, end_date, relayout_data, viewport_width):
         """Update country production trend"""
         if not country_id:
             return go.Figure()
         
-        start_date = datetime.now().date() - timedelta(days=365*5)
-        
-        results = db.session.query(
-            Production.date,
-            func.sum(Production.production_bbl).label('production')
-        ).filter(
-            Production.country_id == country_id,
-            Production.date >= start_date
-        ).group_by(Production.date).order_by(Production.date).all()
+        # Zooming reloads the visible window at full resolution
+        relayout_data = relayout_data if ctx.triggered_id == 'country-production-trend' else None
+        start, end, zoomed = resolve_window(start_date, end_date, relayout_data)
+        series = country_series('production', country_id, start, end)
         
-        df = pd.DataFrame([
-            {'Date': r.date, 'Production (bbl)': r.production}
-            for r in results
-        ])
+        df = pd.DataFrame({'Date': series.index, 'Production (bbl)': series.values})
         
         if df.empty:
             return go.Figure()
         
-        country = Country.query.get(country_id)
+        country = get_reference_data().country(country_id)
         fig = px.line(
             df,
             x='Date',
@@ -195,39 +215,39 @@ def create_country_profile_dashboard(server, url_base_pathname):
         fig.update_layout(
             plot_bgcolor='white',
             paper_bgcolor='white',
-            height=400
+            height=400,
+            # A new country or date range resets zoom; zoom reloads keep it
+            uirevision=f'{country_id}|{start_date}|{end_date}'
         )
+        if zoomed:
+            fig.update_xaxes(range=[start, end])
         
-        return fig
+        # Half-width column
+        return downsample_figure(fig, viewport_width, fraction=0.5)
     
     @callback(
         Output('country-exports-trend', 'figure'),
-        [Input('country-select', 'value')]
+        [Input('country-select', 'value'),
+         Input('country-date-range', 'start_date'),
+         Input('country-date-range', 'end_date'),
+         Input('country-exports-trend', 'relayoutData')],
+        State('country-viewport-width', 'data')
     )
-    def update_country_exports_trend(country_id):
+    def update_country_exports_trend(country_id, start_date, end_date, relayout_data, viewport_width):
         """Update country exports trend"""
         if not country_id:
             return go.Figure()
         
-        start_date = datetime.now().date() - timedelta(days=365*5)
-        
-        results = db.session.query(
-            Exports.date,
-            func.sum(Exports.exports_bbl).label('exports')
-        ).filter(
-            Exports.country_id == country_id,
-            Exports.date >= start_date
-        ).group_by(Exports.date).order_by(Exports.date).all()
+        relayout_data = relayout_data if ctx.triggered_id == 'country-exports-trend' else None
+        start, end, zoomed = resolve_window(start_date, end_date, relayout_data)
+        series = country_series('exports', country_id, start, end)
         
-        df = pd.DataFrame([
-            {'Date': r.date, 'Exports (bbl)': r.exports}
-            for r in results
-        ])
+        df = pd.DataFrame({'Date': series.index, 'Exports (bbl)': series.values})
         
         if df.empty:
             return go.Figure()
         
-        country = Country.query.get(country_id)
+        country = get_reference_data().country(country_id)
         fig = px.line(
             df,
             x='Date',
@@ -240,54 +260,50 @@ def create_country_profile_dashboard(server, url_base_pathname):
         fig.update_layout(
             plot_bgcolor='white',
             paper_bgcolor='white',
-            height=400
+            height=400,
+            # A new country or date range resets zoom; zoom reloads keep it
+            uirevision=f'{country_id}|{start_date}|{end_date}'
         )
+        if zoomed:
+            fig.update_xaxes(range=[start, end])
         
-        return fig
+        # Half-width column
+        return downsample_figure(fig, viewport_width, fraction=0.5)
     
     @callback(
         Output('country-trade-balance', 'figure'),
-        [Input('country-select', 'value')]
+        [Input('country-select', 'value'),
+         Input('country-date-range', 'start_date'),
+         Input('country-date-range', 'end_date'),
+         Input('country-trade-balance', 'relayoutData')],
+        State('country-viewport-width', 'data')
     )
-    def update_trade_balance(country_id):
+    def update_trade_balance(country_id, start_date, end_date, relayout_data, viewport_width):
         """Update trade balance chart"""
         if not country_id:
             return go.Figure()
         
-        start_date = datetime.now().date() - timedelta(days=365*2)
-        
-        exports_data = db.session.query(
-            Exports.date,
-            func.sum(Exports.exports_bbl).label('exports')
-        ).filter(
-            Exports.country_id == country_id,
-            Exports.date >= start_date
-        ).group_by(Exports.date).order_by(Exports.date).all()
-        
-        imports_data = db.session.query(
-            Imports.date,
-            func.sum(Imports.imports_bbl).label('imports')
-        ).filter(
-            Imports.country_id == country_id,
-            Imports.date >= start_date
-        ).group_by(Imports.date).order_by(Imports.date).all()
+        relayout_data = relayout_data if ctx.triggered_id == 'country-trade-balance' else None
+        start, end, zoomed = resolve_window(start_date, end_date, relayout_data)
+        exports_data = country_series('exports', country_id, start, end)
+        imports_data = country_series('imports', country_id, start, end)
         
-        country = Country.query.get(country_id)
+        country = get_reference_data().country(country_id)
         
         fig = go.Figure()
         
-        if exports_data:
+        if not exports_data.empty:
             fig.add_trace(go.Scatter(
-                x=[r.date for r in exports_data],
-                y=[r.exports for r in exports_data],
+                x=exports_data.index,
+                y=exports_data.values,
                 name='Exports',
                 line=dict(color='#27ae60', width=2)
             ))
         
-        if imports_data:
+        if not imports_data.empty:
             fig.add_trace(go.Scatter(
-                x=[r.date for r in imports_data],
-                y=[r.imports for r in imports_data],
+                x=imports_data.index,
+                y=imports_data.values,
                 name='Imports',
                 line=dict(color='#e74c3c', width=2)
             ))
@@ -298,10 +314,14 @@ def create_country_profile_dashboard(server, url_base_pathname):
             yaxis_title='Volume (bbl)',
             plot_bgcolor='white',
             paper_bgcolor='white',
-            height=400
+            height=400,
+            # A new country or date range resets zoom; zoom reloads keep it
+            uirevision=f'{country_id}|{start_date}|{end_date}'
         )
+        if zoomed:
+            fig.update_xaxes(range=[start, end])
         
-        return fig
+        return downsample_figure(fig, viewport_width)
     
     return dash_app
 
@@ -3,15 +3,14 @@ Exports Dashboard
 Focused view on export metrics
 """
 import dash
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, callback
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 from flask import current_app
 from app import create_dash_app
-from app.models import Country, Exports
-from app import db
-from sqlalchemy import func
+from app.services.datastore import get_store
+from app.services.downsampling import downsample_figure
 from datetime import datetime, timedelta
 
 
@@ -20,6 +19,9 @@ def create_exports_dashboard(server, url_base_pathname):
     dash_app = create_dash_app(server, url_base_pathname)
     
     dash_app.layout = html.Div([
+        # Viewport width reported by the browser, used to size line-chart point budgets
+        dcc.Store(id='exports-viewport-width'),
+        
         html.Div([
             html.H1("Exports Dashboard", className="mb-4"),
         ], className="container-fluid", style={'padding': '30px', 'background': 'white', 'marginBottom': '20px'}),
@@ -38,24 +40,18 @@ def create_exports_dashboard(server, url_base_pathname):
     )
     def update_exports_by_country(_):
         """Update exports by country chart"""
-        latest_date = db.session.query(func.max(Exports.date)).scalar()
+        store = get_store()
+        latest_date = store.latest_date('exports')
         if not latest_date:
             return go.Figure()
         
-        results = db.session.query(
-            Country.name,
-            Country.region,
-            func.sum(Exports.exports_bbl).label('exports')
-        ).join(Exports).filter(
-            Exports.date == latest_date
-        ).group_by(Country.id, Country.name, Country.region).order_by(
-            func.sum(Exports.exports_bbl).desc()
-        ).limit(20).all()
-        
-        df = pd.DataFrame([
-            {'Country': r.name, 'Region': r.region or 'Unknown', 'Exports': r.exports}
-            for r in results
-        ])
+        totals = store.with_countries(store.totals_by_country('exports', latest_date), 'Exports')
+        totals = totals.sort_values('Exports', ascending=False).head(20)
+        df = pd.DataFrame({
+            'Country': totals['name'],
+            'Region': totals['region'].fillna('Unknown'),
+            'Exports': totals['Exports']
+        })
         
         if df.empty:
             return go.Figure()
@@ -72,25 +68,23 @@ def create_exports_dashboard(server, url_base_pathname):
         fig.update_layout(height=500, xaxis_tickangle=-45)
         return fig
     
+    dash_app.clientside_callback(
+        "function(_) { return window.innerWidth; }",
+        Output('exports-viewport-width', 'data'),
+        Input('exports-viewport-width', 'id')
+    )
+    
     @callback(
         Output('exports-trend-global', 'figure'),
-        Input('exports-trend-global', 'id')
+        Input('exports-trend-global', 'id'),
+        State('exports-viewport-width', 'data')
     )
-    def update_exports_trend(_):
+    def update_exports_trend(_, viewport_width):
         """Update global exports trend"""
         start_date = datetime.now().date() - timedelta(days=365*5)
         
-        results = db.session.query(
-            Exports.date,
-            func.sum(Exports.exports_bbl).label('total_exports')
-        ).filter(
-            Exports.date >= start_date
-        ).group_by(Exports.date).order_by(Exports.date).all()
-        
-        df = pd.DataFrame([
-            {'Date': r.date, 'Exports': r.total_exports}
-            for r in results
-        ])
+        trend = get_store().trend('exports', start=start_date)
+        df = pd.DataFrame({'Date': trend.index, 'Exports': trend.values})
         
         if df.empty:
             return go.Figure()
@@ -105,7 +99,7 @@ def create_exports_dashboard(server, url_base_pathname):
         
         fig.update_traces(line_color='#27ae60', line_width=2)
         fig.update_layout(height=500)
-        return fig
+        return downsample_figure(fig, viewport_width)
     
     return dash_app
 
@@ -9,10 +9,7 @@ import plotly.graph_objects as go
 import pandas as pd
 from flask import current_app
 from app import create_dash_app
-from app.models import Country, Production
-from app import db
-from sqlalchemy import func, extract
-from datetime import datetime, timedelta
+from app.services.datastore import get_store
 
 
 def create_production_dashboard(server, url_base_pathname):
@@ -38,22 +35,17 @@ def create_production_dashboard(server, url_base_pathname):
     )
     def update_heatmap(_):
         """Update production heatmap"""
-        latest_date = db.session.query(func.max(Production.date)).scalar()
+        store = get_store()
+        latest_date = store.latest_date('production')
         if not latest_date:
             return go.Figure()
         
-        results = db.session.query(
-            Country.name,
-            Country.region,
-            func.sum(Production.production_bbl).label('production')
-        ).join(Production).filter(
-            Production.date == latest_date
-        ).group_by(Country.id, Country.name, Country.region).all()
-        
-        df = pd.DataFrame([
-            {'Country': r.name, 'Region': r.region or 'Unknown', 'Production': r.production}
-            for r in results
-        ])
+        totals = store.with_countries(store.totals_by_country('production', latest_date), 'Production')
+        df = pd.DataFrame({
+            'Country': totals['name'],
+            'Region': totals['region'].fillna('Unknown'),
+            'Production': totals['Production']
+        })
         
         if df.empty:
             return go.Figure()
@@ -76,23 +68,15 @@ def create_production_dashboard(server, url_base_pathname):
     )
     def update_regional_breakdown(_):
         """Update regional breakdown"""
-        latest_date = db.session.query(func.max(Production.date)).scalar()
+        store = get_store()
+        latest_date = store.latest_date('production')
         if not latest_date:
             return go.Figure()
         
-        results = db.session.query(
-            Country.region,
-            func.sum(Production.production_bbl).label('production')
-        ).join(Production).filter(
-            Production.date == latest_date
-        ).group_by(Country.region).order_by(
-            func.sum(Production.production_bbl).desc()
-        ).all()
-        
-        df = pd.DataFrame([
-            {'Region': r.region or 'Unknown', 'Production': r.production}
-            for r in results
-        ])
+        totals = store.with_countries(store.totals_by_country('production', latest_date), 'Production')
+        df = totals.assign(Region=totals['region'].fillna('Unknown')).groupby(
+            'Region', as_index=False
+        )['Production'].sum().sort_values('Production', ascending=False)
         
         if df.empty:
             return go.Figure()
@@ -2,13 +2,19 @@
 Country Overview View
 Replicates Energy Intelligence WCoD Country Overview functionality
 """
-from dash import dcc, html, Input, Output, State, callback, dash_table, dash
+from dash import dcc, html, Input, Output, State, callback, ctx, dash_table, dash
 import plotly.graph_objects as go
 import pandas as pd
 from datetime import timedelta
-from app import db
+from app import cache
 from app.models import Country, Production, Exports, Reserves
-from sqlalchemy import func
+from app.services.datastore import get_store
+from app.services.paging import page_frame
+from app.services.reference import get_reference_data
+from app.services.versioning import throttled_version
+
+
+TABLE_PAGE_SIZE = 25
 
 
 def create_layout():
@@ -117,9 +123,14 @@ def create_layout():
                     }
                 ],
                 merge_duplicate_headers=True,
-                page_size=25,
-                sort_action='native',
-                filter_action='native',
+                # Sorting, filtering and paging run server-side against the cached statistics
+                page_current=0,
+                page_size=TABLE_PAGE_SIZE,
+                page_action='custom',
+                sort_action='custom',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
                 style_table={
                     'overflowX': 'auto',
                     'border': '1px solid #dee2e6'
@@ -142,51 +153,78 @@ def create_layout():
     ], className='tab-content')
 
 
+@cache.memoize(timeout=3600)
+def country_statistics(version):
+    """Per-country exports, production, reserves and R/P ratios for the overview table
+
+    Built once per data version from the columnar store; ``version`` only keys the cache.
+    Rows are sorted by latest exports, the table's default order.
+    """
+    store = get_store()
+    latest_date = store.latest_date('exports')
+    if not latest_date:
+        return pd.DataFrame(columns=['Country', 'Profile_URL'])
+    
+    date_2024 = latest_date
+    date_2023 = date_2024 - timedelta(days=365) if date_2024 else None
+    
+    # One vectorized group-by per table and year instead of a query per country
+    stats = store.countries[['name']].join(pd.DataFrame({
+        'exports_2024': store.totals_by_country('exports', date_2024),
+        'exports_2023': store.totals_by_country('exports', date_2023),
+        'production_2024': store.totals_by_country('production', date_2024),
+        'production_2023': store.totals_by_country('production', date_2023),
+        'reserves_2024': store.totals_by_country('reserves', date_2024),
+        'reserves_2023': store.totals_by_country('reserves', date_2023),
+    }), how='left').fillna(0)
+    
+    # Only include countries with data
+    stats = stats[(stats['exports_2024'] > 0) | (stats['production_2024'] > 0)]
+    
+    # Calculate R/P Ratio (Reserves to Production ratio in years)
+    production_2024 = stats['production_2024'].where(stats['production_2024'] > 0)
+    production_2023 = stats['production_2023'].where(stats['production_2023'] > 0)
+    rp_ratio_2024 = (stats['reserves_2024'] / production_2024 / 365).fillna(0)
+    rp_ratio_2023 = (stats['reserves_2023'] / production_2023 / 365).fillna(0)
+    
+    table_df = pd.DataFrame({
+        'Country': stats['name'],
+        'Profile_URL': "/wcod-country-overview?country=" + stats.index.astype(str),
+        'Exports_2024': stats['exports_2024'] / 1000,  # Convert to '000 b/d
+        'Exports_2023': stats['exports_2023'] / 1000,
+        'Production_2024': stats['production_2024'] / 1000,
+        'Production_2023': stats['production_2023'] / 1000,
+        'R_P_Ratio_2024': rp_ratio_2024,
+        'R_P_Ratio_2023': rp_ratio_2023,
+        'Reserves_2024': stats['reserves_2024'] / 1e9,  # Convert to billion bbl
+        'Reserves_2023': stats['reserves_2023'] / 1e9
+    })
+    
+    # Sort by 2024 exports descending
+    return table_df.sort_values('Exports_2024', ascending=False).reset_index(drop=True)
+
+
 def create_ranking_chart(selected_country=None, server=None):
     """Create horizontal bar chart ranking crude oil exporters"""
     if not server:
         return go.Figure()
     
     with server.app_context():
+        store = get_store()
         # Get latest date (assume 2024, fallback to max date)
-        latest_date = db.session.query(func.max(Exports.date)).scalar()
+        latest_date = store.latest_date('exports')
         if not latest_date:
             return go.Figure()
         
-        # Get 2024 and 2023 data
+        # Get 2024 data
         date_2024 = latest_date
-        date_2023 = date_2024 - timedelta(days=365) if date_2024 else None
         
-        # Get exports and production data
-        exports_2024 = db.session.query(
-            Country.name,
-            func.sum(Exports.exports_bbl).label('exports')
-        ).join(Exports).filter(
-            Exports.date == date_2024
-        ).group_by(Country.id, Country.name).all()
+        # Exports and production per country, converted to '000 b/d
+        df = store.countries[['name']].join(pd.DataFrame({
+            'Exports_2024': store.totals_by_country('exports', date_2024) / 1000,
+            'Production_2024': store.totals_by_country('production', date_2024) / 1000
+        }), how='inner').fillna(0).rename(columns={'name': 'Country'})
         
-        production_2024 = db.session.query(
-            Country.name,
-            func.sum(Production.production_bbl).label('production')
-        ).join(Production).filter(
-            Production.date == date_2024
-        ).group_by(Country.id, Country.name).all()
-        
-        # Create DataFrame
-        exports_dict = {r.name: r.exports / 1000 for r in exports_2024}  # Convert to '000 b/d
-        production_dict = {r.name: r.production / 1000 for r in production_2024}
-        
-        # Combine and get top 9 by exports
-        all_countries = set(exports_dict.keys()) | set(production_dict.keys())
-        chart_data = []
-        for country in all_countries:
-            chart_data.append({
-                'Country': country,
-                'Exports_2024': exports_dict.get(country, 0),
-                'Production_2024': production_dict.get(country, 0)
-            })
-        
-        df = pd.DataFrame(chart_data)
         # Get top 9 by exports (descending), then sort ascending for chart display
         df = df.sort_values('Exports_2024', ascending=False).head(9).sort_values('Exports_2024', ascending=True)
         
@@ -313,100 +351,40 @@ def register_callbacks(dash_app, server):
         """Update ranking chart with highlighting"""
         if submenu != 'country-overview':
             return go.Figure()
-        return create_ranking_chart(selected_country=selected_country)
+        return create_ranking_chart(selected_country=selected_country, server=server)
     
     @callback(
         [Output('oil-data-table', 'data'),
-         Output('oil-data-table', 'columns')],
-        Input('current-submenu', 'data'),
+         Output('oil-data-table', 'page_count'),
+         Output('oil-data-table', 'page_current')],
+        [Input('current-submenu', 'data'),
+         Input('oil-data-table', 'page_current'),
+         Input('oil-data-table', 'page_size'),
+         Input('oil-data-table', 'sort_by'),
+         Input('oil-data-table', 'filter_query')],
         prevent_initial_call=False
     )
-    def update_oil_data_table(submenu):
-        """Update oil data table with country statistics"""
+    def update_oil_data_table(submenu, page_current, page_size, sort_by, filter_query):
+        """Return the visible page of the country statistics table"""
         if submenu != 'country-overview':
-            return [], []
+            return [], 1, 0
+        # A new filter or sort starts again from the first page
+        if 'oil-data-table.page_current' not in ctx.triggered_prop_ids:
+            page_current = 0
         
         with server.app_context():
-            latest_date = db.session.query(func.max(Exports.date)).scalar()
-            if not latest_date:
-                return [], []
-            
-            date_2024 = latest_date
-            date_2023 = date_2024 - timedelta(days=365) if date_2024 else None
-            
-            # Get all countries with data
-            countries = Country.query.all()
-            table_data = []
-            
-            for country in countries:
-                # Get 2024 data
-                exports_2024 = db.session.query(func.sum(Exports.exports_bbl)).filter(
-                    Exports.country_id == country.id,
-                    Exports.date == date_2024
-                ).scalar() or 0
-                
-                exports_2023 = db.session.query(func.sum(Exports.exports_bbl)).filter(
-                    Exports.country_id == country.id,
-                    Exports.date == date_2023
-                ).scalar() or 0 if date_2023 else 0
-                
-                production_2024 = db.session.query(func.sum(Production.production_bbl)).filter(
-                    Production.country_id == country.id,
-                    Production.date == date_2024
-                ).scalar() or 0
-                
-                production_2023 = db.session.query(func.sum(Production.production_bbl)).filter(
-                    Production.country_id == country.id,
-                    Production.date == date_2023
-                ).scalar() or 0 if date_2023 else 0
-                
-                reserves_2024 = db.session.query(func.sum(Reserves.reserves_bbl)).filter(
-                    Reserves.country_id == country.id,
-                    Reserves.date == date_2024
-                ).scalar() or 0
-                
-                reserves_2023 = db.session.query(func.sum(Reserves.reserves_bbl)).filter(
-                    Reserves.country_id == country.id,
-                    Reserves.date == date_2023
-                ).scalar() or 0 if date_2023 else 0
-                
-                # Calculate R/P Ratio (Reserves to Production ratio in years)
-                rp_ratio_2024 = (reserves_2024 / production_2024 / 365) if production_2024 > 0 else 0
-                rp_ratio_2023 = (reserves_2023 / production_2023 / 365) if production_2023 > 0 else 0
-                
-                # Only include countries with data
-                if exports_2024 > 0 or production_2024 > 0:
-                    profile_url = f"/wcod-country-overview?country={country.id}"
-                    table_data.append({
-                        'Country': f"[{country.name}]({profile_url})",
-                        'Country_Original': country.name,
-                        'Profile_URL': profile_url,
-                        'Exports_2024': exports_2024 / 1000,  # Convert to '000 b/d
-                        'Exports_2023': exports_2023 / 1000,
-                        'Production_2024': production_2024 / 1000,
-                        'Production_2023': production_2023 / 1000,
-                        'R_P_Ratio_2024': rp_ratio_2024,
-                        'R_P_Ratio_2023': rp_ratio_2023,
-                        'Reserves_2024': reserves_2024 / 1e9,  # Convert to billion bbl
-                        'Reserves_2023': reserves_2023 / 1e9
-                    })
-            
-            # Sort by 2024 exports descending
-            table_data.sort(key=lambda x: x['Exports_2024'], reverse=True)
+            stats = country_statistics(throttled_version(Country, Production, Exports, Reserves))
         
-        columns = [
-            {"name": ["", "Country"], "id": "Country", "type": "text", "presentation": "markdown"},
-            {"name": ["Exports", "2024"], "id": "Exports_2024", "type": "numeric", "format": {"specifier": ",.0f"}},
-            {"name": ["Exports", "2023"], "id": "Exports_2023", "type": "numeric", "format": {"specifier": ",.0f"}},
-            {"name": ["Production", "2024"], "id": "Production_2024", "type": "numeric", "format": {"specifier": ",.0f"}},
-            {"name": ["Production", "2023"], "id": "Production_2023", "type": "numeric", "format": {"specifier": ",.0f"}},
-            {"name": ["R/P Ratio", "2024"], "id": "R_P_Ratio_2024", "type": "numeric", "format": {"specifier": ",.1f"}},
-            {"name": ["R/P Ratio", "2023"], "id": "R_P_Ratio_2023", "type": "numeric", "format": {"specifier": ",.1f"}},
-            {"name": ["Reserves", "2024"], "id": "Reserves_2024", "type": "numeric", "format": {"specifier": ",.1f"}},
-            {"name": ["Reserves", "2023"], "id": "Reserves_2023", "type": "numeric", "format": {"specifier": ",.1f"}}
-        ]
-        
-        return table_data, columns
+        # Filters and sorts on the Country column apply to the plain name
+        page, page_count = page_frame(
+            stats, sort_by=sort_by, filter_query=filter_query,
+            page_current=page_current, page_size=page_size or TABLE_PAGE_SIZE
+        )
+        page = page.assign(
+            Country_Original=page['Country'],
+            Country="[" + page['Country'] + "](" + page['Profile_URL'] + ")"
+        )
+        return page.to_dict('records'), page_count, page_current
     
     @callback(
         [Output('selected-country-store', 'data', allow_duplicate=True),
@@ -420,12 +398,11 @@ def register_callbacks(dash_app, server):
         """Update selected country and profile URL from chart click"""
         if clickData and 'points' in clickData and len(clickData['points']) > 0:
             country_name = clickData['points'][0]['y']
-            # Get profile URL from database
             profile_url = None
             with server.app_context():
-                country = Country.query.filter_by(name=country_name).first()
-                if country:
-                    profile_url = f"/wcod-country-overview?country={country.id}"
+                country = get_reference_data().country_by_name(country_name)
+            if country:
+                profile_url = f"/wcod-country-overview?country={country.id}"
             new_counter = (click_counter or 0) + 1
             return country_name, profile_url, new_counter
         return dash.no_update, dash.no_update, click_counter
@@ -469,10 +446,9 @@ def register_callbacks(dash_app, server):
     @callback(
         Output('oil-data-table', 'style_data_conditional', allow_duplicate=True),
         Input('selected-country-store', 'data'),
-        State('oil-data-table', 'data'),
         prevent_initial_call=True
     )
-    def update_table_highlight(selected_country, table_data):
+    def update_table_highlight(selected_country):
         """Update table row highlighting based on selected country"""
         style_conditions = [
             {
@@ -481,16 +457,14 @@ def register_callbacks(dash_app, server):
             }
         ]
         
-        if selected_country and table_data:
-            for idx, row in enumerate(table_data):
-                country_original = row.get('Country_Original', '')
-                if country_original == selected_country:
-                    style_conditions.append({
-                        'if': {'row_index': idx},
-                        'backgroundColor': '#FFF8DC',  # Light yellow highlight
-                        'fontWeight': 'bold'
-                    })
-                    break
+        # Match on the row's data so the highlight follows it across pages and sorts
+        if selected_country:
+            quote = next((q for q in '"\'`' if q not in selected_country), '"')
+            style_conditions.append({
+                'if': {'filter_query': f'{{Country_Original}} = {quote}{selected_country}{quote}'},
+                'backgroundColor': '#FFF8DC',  # Light yellow highlight
+                'fontWeight': 'bold'
+            })
         
         return style_conditions
     
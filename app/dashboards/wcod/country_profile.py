@@ -2,17 +2,19 @@
 Country Profile View
 Individual country profile with detailed statistics
 """
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, callback, no_update
 from app import db
-from app.models import Country, Production, Exports, Imports, Reserves
+from app.models import Production, Exports, Imports, Reserves
+from app.services.reference import get_reference_data
+from app.services.search import linked_entity, search_options
 from sqlalchemy import func
 
 
 def create_layout(server):
     """Create the Country Profile layout"""
+    # Only the first matches are rendered; the rest load as the user types
     with server.app_context():
-        countries = Country.query.order_by(Country.name).all()
-        country_options = [{'label': c.name, 'value': c.id} for c in countries]
+        country_options = search_options('country')
     
     return html.Div([
         html.H3("Country Profile", style={'marginBottom': '20px'}),
@@ -33,6 +35,32 @@ def create_layout(server):
 def register_callbacks(dash_app, server):
     """Register all callbacks for Country Profile"""
     
+    @callback(
+        Output('country-select-profile', 'options'),
+        Input('country-select-profile', 'search_value'),
+        State('country-select-profile', 'value')
+    )
+    def search_country_profile_options(search_value, value):
+        """Load the top matching countries as the user types"""
+        if not search_value:
+            return no_update
+        with server.app_context():
+            return search_options('country', search_value, value)
+    
+    @callback(
+        [Output('country-select-profile', 'value'),
+         Output('country-select-profile', 'options', allow_duplicate=True)],
+        Input('url', 'search'),
+        prevent_initial_call='initial_duplicate'
+    )
+    def select_linked_country(search):
+        """Open the country named in a search result link"""
+        country_id = linked_entity(search, 'country')
+        if country_id is None:
+            return no_update, no_update
+        with server.app_context():
+            return country_id, search_options('country', selected=country_id)
+    
     @callback(
         Output('country-profile-content', 'children'),
         Input('country-select-profile', 'value')
@@ -43,7 +71,7 @@ def register_callbacks(dash_app, server):
             return html.Div("Please select a country")
         
         with server.app_context():
-            country = Country.query.get(country_id)
+            country = get_reference_data().country(country_id)
             if not country:
                 return html.Div("Country not found")
             
@@ -8,13 +8,15 @@ import plotly.express as px
 import pandas as pd
 from app import db
 from app.models import Crude, Country
+from app.services.carbon import WORLD, get_carbon_rollups
 
 
 def create_layout():
     """Create the Crude Carbon Intensity layout"""
     return html.Div([
         html.H3("Crude Carbon Intensity", style={'marginBottom': '20px'}),
-        dcc.Graph(id='crude-carbon-chart')
+        dcc.Graph(id='crude-carbon-chart'),
+        dcc.Graph(id='crude-carbon-weighted-chart')
     ], className='tab-content')
 
 
@@ -22,13 +24,14 @@ def register_callbacks(dash_app, server):
     """Register all callbacks for Crude Carbon Intensity"""
     
     @callback(
-        Output('crude-carbon-chart', 'figure'),
+        [Output('crude-carbon-chart', 'figure'),
+         Output('crude-carbon-weighted-chart', 'figure')],
         Input('current-submenu', 'data')
     )
     def update_crude_carbon(submenu):
         """Update crude carbon intensity chart"""
         if submenu != 'crude-carbon':
-            return go.Figure()
+            return go.Figure(), go.Figure()
         
         with server.app_context():
             results = db.session.query(
@@ -45,6 +48,35 @@ def register_callbacks(dash_app, server):
                 }
                 for r in results
             ])
+            exports = get_carbon_rollups().exports
+        
+        if exports.empty:
+            weighted_fig = go.Figure()
+            weighted_fig.add_annotation(
+                text="No export data available to weight carbon intensity.",
+                xref="paper", yref="paper",
+                x=0.5, y=0.5, showarrow=False
+            )
+            weighted_fig.update_layout(height=450, plot_bgcolor='white', paper_bgcolor='white')
+        else:
+            weighted_fig = go.Figure()
+            for region, series in exports.groupby('region', sort=True):
+                weighted_fig.add_trace(go.Scatter(
+                    x=series['label'],
+                    y=series['carbon_intensity'],
+                    mode='lines',
+                    name=region,
+                    line=dict(width=3 if region == WORLD else 1.5, color='#212529' if region == WORLD else None),
+                    hovertemplate=f'{region}<br>%{{x}}: %{{y:.1f}}<extra></extra>'
+                ))
+            weighted_fig.update_layout(
+                title='Export-Weighted Crude Carbon Intensity by Region',
+                xaxis_title='Month',
+                yaxis_title='Carbon Intensity',
+                height=450,
+                plot_bgcolor='white',
+                paper_bgcolor='white'
+            )
         
         if df.empty:
             fig = go.Figure()
@@ -54,10 +86,10 @@ def register_callbacks(dash_app, server):
                 x=0.5, y=0.5, showarrow=False
             )
             fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
-            return fig
+            return fig, weighted_fig
         
         fig = px.bar(df, x='Crude', y='Carbon Intensity', color='Country', 
                     title='Crude Carbon Intensity by Type')
         fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white', xaxis_tickangle=-45)
-        return fig
+        return fig, weighted_fig
 
@@ -1,82 +1,189 @@
 """
 Crude Comparison View
-Compare two crude types side by side
+Compare a basket of crude types side by side
 """
-from dash import dcc, html, Input, Output, callback, dash_table
+from dash import dcc, html, Input, Output, State, callback, dash_table, no_update
+import plotly.graph_objects as go
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
 from app import db
-from app.models import Crude
+from app.models import Crude, CrudePrice, Country
+from app.services.search import search_options
+
+
+MAX_COMPARED_CRUDES = 20
+
+# Property column -> (row label, number format) in the comparison matrix
+COMPARED_PROPERTIES = {
+    'api_gravity': ('API Gravity', '{:.1f}'),
+    'sulfur_content': ('Sulfur Content (%)', '{:.2f}'),
+    'carbon_intensity': ('Carbon Intensity', '{:.1f}'),
+    'price': ('Latest Price (USD/bbl)', '{:.2f}'),
+}
 
 
 def create_layout(server):
     """Create the Crude Comparison layout"""
+    # Only the first matches are rendered; the rest load as the user types
     with server.app_context():
-        crudes = Crude.query.order_by(Crude.name).all()
-        crude_options = [{'label': f"{c.name} ({c.country.name if c.country else 'Unknown'})", 'value': c.id} for c in crudes]
-    
+        crude_options = search_options('crude')
+
     return html.Div([
         html.H3("Crude Comparison", style={'marginBottom': '20px'}),
         html.Div([
             html.Div([
-                html.Label("Select Crude 1:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                html.Label(f"Select Crudes (up to {MAX_COMPARED_CRUDES}):",
+                           style={'fontWeight': '500', 'marginBottom': '8px'}),
                 dcc.Dropdown(
-                    id='crude-compare-1',
-                    options=crude_options if crude_options else [],
-                    clearable=False,
+                    id='crude-compare-select',
+                    options=crude_options,
+                    value=[option['value'] for option in crude_options[:2]],
+                    multi=True,
                     style={'marginBottom': '20px'}
                 )
-            ], className='col-md-6'),
+            ], className='col-md-8'),
             html.Div([
-                html.Label("Select Crude 2:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                html.Label("Differential:", style={'fontWeight': '500', 'marginBottom': '8px'}),
                 dcc.Dropdown(
-                    id='crude-compare-2',
-                    options=crude_options if crude_options else [],
+                    id='crude-compare-differential',
+                    options=[{'label': label, 'value': column} for column, (label, _) in COMPARED_PROPERTIES.items()],
+                    value='price',
                     clearable=False,
                     style={'marginBottom': '20px'}
                 )
-            ], className='col-md-6'),
+            ], className='col-md-4'),
         ], className='row'),
-        html.Div(id='crude-comparison-content')
+        html.Div(id='crude-comparison-content'),
+        dcc.Graph(id='crude-comparison-differentials')
     ], className='tab-content')
 
 
+def fetch_crude_comparison(crude_ids):
+    """Quality, country and latest price for several crudes in one query
+
+    Returns a frame indexed by crude id in the order requested.
+    """
+    latest_dates = db.session.query(
+        CrudePrice.crude_id,
+        func.max(CrudePrice.date).label('date')
+    ).filter(CrudePrice.crude_id.in_(crude_ids)).group_by(CrudePrice.crude_id).subquery()
+
+    latest_prices = db.session.query(
+        CrudePrice.crude_id,
+        CrudePrice.date,
+        func.avg(CrudePrice.price_usd_bbl).label('price')
+    ).join(
+        latest_dates,
+        (CrudePrice.crude_id == latest_dates.c.crude_id) & (CrudePrice.date == latest_dates.c.date)
+    ).group_by(CrudePrice.crude_id, CrudePrice.date).subquery()
+
+    results = db.session.query(
+        Crude.id,
+        Crude.name,
+        Country.name.label('country'),
+        Crude.grade,
+        Crude.api_gravity,
+        Crude.sulfur_content,
+        Crude.carbon_intensity,
+        latest_prices.c.price,
+        latest_prices.c.date.label('price_date')
+    ).outerjoin(
+        Country, Crude.country_id == Country.id
+    ).outerjoin(
+        latest_prices, latest_prices.c.crude_id == Crude.id
+    ).filter(Crude.id.in_(crude_ids)).all()
+
+    df = pd.DataFrame([r._asdict() for r in results], columns=[
+        'id', 'name', 'country', 'grade', 'api_gravity', 'sulfur_content', 'carbon_intensity', 'price', 'price_date'
+    ]).set_index('id')
+    return df.reindex([crude_id for crude_id in crude_ids if crude_id in df.index])
+
+
 def register_callbacks(dash_app, server):
     """Register all callbacks for Crude Comparison"""
-    
+
     @callback(
-        Output('crude-comparison-content', 'children'),
-        [Input('crude-compare-1', 'value'),
-         Input('crude-compare-2', 'value')]
+        Output('crude-compare-select', 'options'),
+        Input('crude-compare-select', 'search_value'),
+        State('crude-compare-select', 'value')
     )
-    def update_crude_comparison(crude1_id, crude2_id):
-        """Update crude comparison content"""
-        if not crude1_id or not crude2_id:
-            return html.Div("Please select both crudes to compare")
-        
+    def search_crude_compare_options(search_value, value):
+        """Load the top matching crudes as the user types"""
+        if not search_value:
+            return no_update
         with server.app_context():
-            crude1 = Crude.query.get(crude1_id)
-            crude2 = Crude.query.get(crude2_id)
-            
-            if not crude1 or not crude2:
-                return html.Div("One or both crudes not found")
-        
+            return search_options('crude', search_value, value)
+
+    @callback(
+        [Output('crude-comparison-content', 'children'),
+         Output('crude-comparison-differentials', 'figure')],
+        [Input('crude-compare-select', 'value'),
+         Input('crude-compare-differential', 'value')]
+    )
+    def update_crude_comparison(crude_ids, differential):
+        """Update crude comparison matrix and differentials heatmap"""
+        if not crude_ids or len(crude_ids) < 2:
+            return html.Div("Please select at least two crudes to compare"), go.Figure()
+        if len(crude_ids) > MAX_COMPARED_CRUDES:
+            return html.Div(f"Please select at most {MAX_COMPARED_CRUDES} crudes"), go.Figure()
+
+        with server.app_context():
+            crudes = fetch_crude_comparison(crude_ids)
+
+        if len(crudes) < 2:
+            return html.Div("One or more crudes not found"), go.Figure()
+
+        # Disambiguate duplicate names so every crude gets its own column
+        labels = crudes['name'].where(~crudes['name'].duplicated(keep=False),
+                                      crudes['name'] + ' (' + crudes['country'].fillna('N/A') + ')')
+        column_ids = [f'crude_{crude_id}' for crude_id in crudes.index]
+
+        rows = [
+            ('Country', crudes['country'].fillna('N/A')),
+            ('Grade', crudes['grade'].fillna('N/A')),
+        ] + [
+            (label, crudes[column].map(lambda v, fmt=fmt: fmt.format(v) if pd.notna(v) else 'N/A'))
+            for column, (label, fmt) in COMPARED_PROPERTIES.items()
+        ] + [
+            ('Price Date', crudes['price_date'].map(lambda d: d.isoformat() if pd.notna(d) else 'N/A')),
+        ]
         comparison_data = [
-            {'Property': 'Name', f'{crude1.name}': crude1.name, f'{crude2.name}': crude2.name},
-            {'Property': 'Country', f'{crude1.name}': crude1.country.name if crude1.country else 'N/A', f'{crude2.name}': crude2.country.name if crude2.country else 'N/A'},
-            {'Property': 'Grade', f'{crude1.name}': crude1.grade or 'N/A', f'{crude2.name}': crude2.grade or 'N/A'},
-            {'Property': 'API Gravity', f'{crude1.name}': crude1.api_gravity or 'N/A', f'{crude2.name}': crude2.api_gravity or 'N/A'},
-            {'Property': 'Sulfur Content (%)', f'{crude1.name}': crude1.sulfur_content or 'N/A', f'{crude2.name}': crude2.sulfur_content or 'N/A'},
-            {'Property': 'Carbon Intensity', f'{crude1.name}': crude1.carbon_intensity or 'N/A', f'{crude2.name}': crude2.carbon_intensity or 'N/A'},
+            {'Property': label, **dict(zip(column_ids, values))}
+            for label, values in rows
         ]
-        
-        return html.Div([
-            dash_table.DataTable(
-                data=comparison_data,
-                columns=[{'name': 'Property', 'id': 'Property'}, 
-                        {'name': crude1.name, 'id': f'{crude1.name}'},
-                        {'name': crude2.name, 'id': f'{crude2.name}'}],
-                style_table={'overflowX': 'auto'},
-                style_cell={'textAlign': 'left', 'padding': '10px'},
-                style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}
-            )
-        ])
 
+        table = dash_table.DataTable(
+            data=comparison_data,
+            columns=[{'name': 'Property', 'id': 'Property'}] + [
+                {'name': label, 'id': column_id} for label, column_id in zip(labels, column_ids)
+            ],
+            style_table={'overflowX': 'auto'},
+            style_cell={'textAlign': 'left', 'padding': '10px'},
+            style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}
+        )
+
+        # Pairwise differentials, row minus column, in one broadcast
+        values = crudes[differential].to_numpy(dtype=np.float64)
+        matrix = values[:, None] - values[None, :]
+        label, fmt = COMPARED_PROPERTIES[differential]
+        text = [[fmt.format(v) if np.isfinite(v) else '' for v in row] for row in matrix]
+
+        fig = go.Figure(go.Heatmap(
+            z=matrix,
+            x=list(labels),
+            y=list(labels),
+            text=text,
+            texttemplate='%{text}',
+            colorscale='RdBu',
+            zmid=0,
+            hovertemplate='%{y} vs %{x}: %{z:.2f}<extra></extra>'
+        ))
+        fig.update_layout(
+            title=f'{label} Differentials (row minus column)',
+            height=max(400, 40 * len(labels) + 150),
+            yaxis=dict(autorange='reversed'),
+            plot_bgcolor='white',
+            paper_bgcolor='white'
+        )
+        return html.Div([table], style={'marginBottom': '20px'}), fig
@@ -6,8 +6,7 @@ from dash import dcc, html, Input, Output, callback, dash_table
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from app import db
-from app.models import Crude, Country
+from app.services.reference import get_reference_data
 
 
 def create_layout():
@@ -45,24 +44,18 @@ def register_callbacks(dash_app, server):
             return go.Figure(), [], []
         
         with server.app_context():
-            results = db.session.query(
-                Crude.name,
-                Country.name.label('country_name'),
-                Crude.grade,
-                Crude.api_gravity,
-                Crude.sulfur_content
-            ).join(Country).all()
-            
-            df = pd.DataFrame([
-                {
-                    'Crude': r.name,
-                    'Country': r.country_name,
-                    'Grade': r.grade or 'N/A',
-                    'API Gravity': r.api_gravity or 0,
-                    'Sulfur Content (%)': r.sulfur_content or 0
-                }
-                for r in results
-            ])
+            reference = get_reference_data()
+        
+        df = pd.DataFrame([
+            {
+                'Crude': r.name,
+                'Country': reference.country_name(r.country_id),
+                'Grade': r.grade or 'N/A',
+                'API Gravity': r.api_gravity or 0,
+                'Sulfur Content (%)': r.sulfur_content or 0
+            }
+            for r in reference.crudes.values()
+        ])
         
         if df.empty:
             fig = go.Figure()
@@ -2,16 +2,17 @@
 Crude Profile View
 Individual crude type profile with detailed specifications
 """
-from dash import dcc, html, Input, Output, callback
-from app import db
-from app.models import Crude, Country
+from dash import dcc, html, Input, Output, State, callback, no_update
+from app.services.reference import get_reference_data
+from app.services.search import linked_entity, search_options
+from app.services.similarity import similar_crudes
 
 
 def create_layout(server):
     """Create the Crude Profile layout"""
+    # Only the first matches are rendered; the rest load as the user types
     with server.app_context():
-        crudes = Crude.query.order_by(Crude.name).all()
-        crude_options = [{'label': f"{c.name} ({c.country.name if c.country else 'Unknown'})", 'value': c.id} for c in crudes]
+        crude_options = search_options('crude')
     
     return html.Div([
         html.H3("Crude Profile", style={'marginBottom': '20px'}),
@@ -32,6 +33,32 @@ def create_layout(server):
 def register_callbacks(dash_app, server):
     """Register all callbacks for Crude Profile"""
     
+    @callback(
+        Output('crude-select-profile', 'options'),
+        Input('crude-select-profile', 'search_value'),
+        State('crude-select-profile', 'value')
+    )
+    def search_crude_profile_options(search_value, value):
+        """Load the top matching crudes as the user types"""
+        if not search_value:
+            return no_update
+        with server.app_context():
+            return search_options('crude', search_value, value)
+    
+    @callback(
+        [Output('crude-select-profile', 'value'),
+         Output('crude-select-profile', 'options', allow_duplicate=True)],
+        Input('url', 'search'),
+        prevent_initial_call='initial_duplicate'
+    )
+    def select_linked_crude(search):
+        """Open the crude named in a search result link"""
+        crude_id = linked_entity(search, 'crude')
+        if crude_id is None:
+            return no_update, no_update
+        with server.app_context():
+            return crude_id, search_options('crude', selected=crude_id)
+    
     @callback(
         Output('crude-profile-content', 'children'),
         Input('crude-select-profile', 'value')
@@ -42,20 +69,45 @@ def register_callbacks(dash_app, server):
             return html.Div("Please select a crude type")
         
         with server.app_context():
-            crude = Crude.query.get(crude_id)
-            if not crude:
-                return html.Div("Crude not found")
+            reference = get_reference_data()
+            similar = similar_crudes(crude_id)
+        crude = reference.crude(crude_id)
+        if not crude:
+            return html.Div("Crude not found")
+        
+        if similar:
+            similar_section = html.Table([
+                html.Thead(html.Tr([html.Th(h, style={'padding': '8px'}) for h in (
+                    'Crude', 'Country', 'API Gravity', 'Sulfur (%)', 'Carbon Intensity', 'Distance'
+                )])),
+                html.Tbody([
+                    html.Tr([
+                        html.Td(c.name, style={'padding': '8px'}),
+                        html.Td(reference.country_name(c.country_id), style={'padding': '8px'}),
+                        html.Td(f"{c.api_gravity:.1f}", style={'padding': '8px'}),
+                        html.Td(f"{c.sulfur_content:.2f}", style={'padding': '8px'}),
+                        html.Td(f"{c.carbon_intensity:.1f}", style={'padding': '8px'}),
+                        html.Td(f"{distance:.2f}", style={'padding': '8px'}),
+                    ])
+                    for c, distance in similar
+                ])
+            ], style={'width': '100%'})
+        else:
+            similar_section = html.P("Similar crudes need API gravity, sulfur content and carbon intensity.",
+                                     style={'color': '#6c757d'})
         
         return html.Div([
             html.H4(f"{crude.name} Profile", style={'marginBottom': '20px'}),
             html.Div([
                 html.Div([
-                    html.P(f"Country: {crude.country.name if crude.country else 'N/A'}", style={'fontSize': '16px'}),
+                    html.P(f"Country: {reference.country_name(crude.country_id)}", style={'fontSize': '16px'}),
                     html.P(f"Grade: {crude.grade or 'N/A'}", style={'fontSize': '16px'}),
                     html.P(f"API Gravity: {crude.api_gravity or 'N/A'}", style={'fontSize': '16px'}),
                     html.P(f"Sulfur Content: {crude.sulfur_content or 'N/A'}%", style={'fontSize': '16px'}),
                     html.P(f"Carbon Intensity: {crude.carbon_intensity or 'N/A'}", style={'fontSize': '16px'}),
                 ], style={'padding': '20px', 'background': '#f8f9fa', 'borderRadius': '8px'})
-            ])
+            ]),
+            html.H5("Similar Crudes", style={'marginTop': '30px', 'marginBottom': '10px'}),
+            similar_section
         ])
 
@@ -4,12 +4,63 @@ Compare crude quality metrics across different types
 """
 from dash import dcc, html, Input, Output, callback
 import plotly.graph_objects as go
-import plotly.express as px
+import numpy as np
 import pandas as pd
 from app import db
 from app.models import Crude
 
 
+# Above this many crudes the scatter is replaced by a density grid
+DENSITY_THRESHOLD = 2000
+
+# Grid cells per axis in density mode
+DENSITY_BINS = 60
+
+# Crude names listed in a density cell's hover text
+DENSITY_HOVER_NAMES = 3
+
+CHART_TITLE = 'Crude Quality Comparison (API Gravity vs Sulfur Content)'
+
+
+def density_figure(df):
+    """Heatmap of crude counts on an API gravity x sulfur grid, with sample names on hover"""
+    counts, x_edges, y_edges = np.histogram2d(df['api_gravity'], df['sulfur_content'], bins=DENSITY_BINS)
+    x_bins = np.clip(np.searchsorted(x_edges, df['api_gravity'], side='right') - 1, 0, DENSITY_BINS - 1)
+    y_bins = np.clip(np.searchsorted(y_edges, df['sulfur_content'], side='right') - 1, 0, DENSITY_BINS - 1)
+    samples = df.groupby([y_bins, x_bins])['name'].agg(lambda names: ', '.join(names.iloc[:DENSITY_HOVER_NAMES]))
+
+    # Heatmap rows are y; empty cells stay transparent
+    z = counts.T
+    hover = np.full(z.shape, '', dtype=object)
+    hover[samples.index.get_level_values(0), samples.index.get_level_values(1)] = samples.to_numpy()
+
+    fig = go.Figure(go.Heatmap(
+        z=np.where(z > 0, z, np.nan),
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        customdata=hover,
+        colorscale='Viridis',
+        colorbar=dict(title='Crudes'),
+        hovertemplate='API %{x:.1f}, Sulfur %{y:.2f}%<br>%{z:.0f} crudes<br>%{customdata}<extra></extra>'
+    ))
+    fig.update_layout(title=f'{CHART_TITLE} - {len(df):,} crudes')
+    return fig
+
+
+def scatter_figure(df):
+    """WebGL scatter with crude names shown on hover only"""
+    fig = go.Figure(go.Scattergl(
+        x=df['api_gravity'],
+        y=df['sulfur_content'],
+        mode='markers',
+        hovertext=df['name'],
+        marker=dict(size=8, opacity=0.7),
+        hovertemplate='%{hovertext}<br>API %{x:.1f}, Sulfur %{y:.2f}%<extra></extra>'
+    ))
+    fig.update_layout(title=CHART_TITLE)
+    return fig
+
+
 def create_layout():
     """Create the Crude Quality Comparison layout"""
     return html.Div([
@@ -31,20 +82,17 @@ def register_callbacks(dash_app, server):
             return go.Figure()
         
         with server.app_context():
+            # Crudes without both assay values cannot be placed on the chart
             results = db.session.query(
                 Crude.name,
                 Crude.api_gravity,
                 Crude.sulfur_content
+            ).filter(
+                Crude.api_gravity.isnot(None),
+                Crude.sulfur_content.isnot(None)
             ).all()
             
-            df = pd.DataFrame([
-                {
-                    'Crude': r.name,
-                    'API Gravity': r.api_gravity or 0,
-                    'Sulfur Content (%)': r.sulfur_content or 0
-                }
-                for r in results
-            ])
+            df = pd.DataFrame(results, columns=['name', 'api_gravity', 'sulfur_content'])
         
         if df.empty:
             fig = go.Figure()
@@ -56,9 +104,12 @@ def register_callbacks(dash_app, server):
             fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
             return fig
         
-        fig = px.scatter(df, x='API Gravity', y='Sulfur Content (%)', text='Crude', 
-                        title='Crude Quality Comparison (API Gravity vs Sulfur Content)')
-        fig.update_traces(textposition="top center")
-        fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
+        fig = density_figure(df) if len(df) > DENSITY_THRESHOLD else scatter_figure(df)
+        fig.update_layout(
+            height=500,
+            xaxis_title='API Gravity',
+            yaxis_title='Sulfur Content (%)',
+            plot_bgcolor='white',
+            paper_bgcolor='white'
+        )
         return fig
-
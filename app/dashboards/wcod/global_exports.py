@@ -6,9 +6,7 @@ from dash import dcc, html, Input, Output, callback
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from app import db
-from app.models import Country, Exports
-from sqlalchemy import func
+from app.services.datastore import get_store
 
 
 def create_layout():
@@ -32,24 +30,18 @@ def register_callbacks(dash_app, server):
             return go.Figure()
         
         with server.app_context():
-            latest_date = db.session.query(func.max(Exports.date)).scalar()
+            store = get_store()
+            latest_date = store.latest_date('exports')
             if not latest_date:
                 return go.Figure()
             
-            results = db.session.query(
-                Country.name,
-                Country.region,
-                func.sum(Exports.exports_bbl).label('exports')
-            ).join(Exports).filter(
-                Exports.date == latest_date
-            ).group_by(Country.id, Country.name, Country.region).order_by(
-                func.sum(Exports.exports_bbl).desc()
-            ).limit(20).all()
-            
-            df = pd.DataFrame([
-                {'Country': r.name, 'Region': r.region or 'Unknown', 'Exports (bbl)': r.exports}
-                for r in results
-            ])
+            totals = store.with_countries(store.totals_by_country('exports', latest_date), 'value')
+            totals = totals.sort_values('value', ascending=False).head(20)
+            df = pd.DataFrame({
+                'Country': totals['name'],
+                'Region': totals['region'].fillna('Unknown'),
+                'Exports (bbl)': totals['value']
+            })
         
         if df.empty:
             return go.Figure()
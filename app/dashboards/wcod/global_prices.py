@@ -2,39 +2,145 @@
 Global Crude Prices View
 Global crude oil pricing data
 """
-from dash import dcc, html, Input, Output, callback
+from datetime import date, timedelta
+from dash import dcc, html, Input, Output, State, callback, ctx
 import plotly.graph_objects as go
-from app import db
-from app.models import CrudePrice
+from app.services.downsampling import downsample_figure
+from app.services.prices import price_matrix, priced_crudes
+from app.services.timeseries import resolve_window
+
+
+# Grades shown before the user picks any
+DEFAULT_GRADE_COUNT = 5
 
 
 def create_layout():
     """Create the Global Crude Prices layout"""
     return html.Div([
         html.H3("Global Crude Prices", style={'marginBottom': '20px'}),
+        dcc.Store(id='global-prices-viewport-width'),
+        html.Div([
+            html.Div([
+                html.Label("Crude Grades:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(id='global-prices-crudes', multi=True, placeholder="Select crude grades...")
+            ], className='col-md-6'),
+            html.Div([
+                html.Label("Frequency:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(
+                    id='global-prices-frequency',
+                    options=[
+                        {'label': 'Daily', 'value': 'daily'},
+                        {'label': 'Weekly', 'value': 'weekly'},
+                        {'label': 'Monthly', 'value': 'monthly'},
+                    ],
+                    value='weekly',
+                    clearable=False
+                )
+            ], className='col-md-2'),
+            html.Div([
+                html.Label("Date Range:", style={'fontWeight': '500', 'marginBottom': '8px', 'display': 'block'}),
+                dcc.DatePickerRange(
+                    id='global-prices-date-range',
+                    start_date=date.today() - timedelta(days=365*5),
+                    end_date=date.today(),
+                    display_format='YYYY-MM-DD'
+                )
+            ], className='col-md-4'),
+        ], className='row', style={'marginBottom': '20px'}),
         dcc.Graph(id='global-prices-chart')
     ], className='tab-content')
 
 
+def _empty_figure(message):
+    fig = go.Figure()
+    fig.add_annotation(
+        text=message,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False
+    )
+    fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
+    return fig
+
+
 def register_callbacks(dash_app, server):
     """Register all callbacks for Global Crude Prices"""
-    
+
+    dash_app.clientside_callback(
+        "function(_) { return window.innerWidth; }",
+        Output('global-prices-viewport-width', 'data'),
+        Input('global-prices-viewport-width', 'id')
+    )
+
     @callback(
-        Output('global-prices-chart', 'figure'),
+        [Output('global-prices-crudes', 'options'),
+         Output('global-prices-crudes', 'value')],
         Input('current-submenu', 'data')
     )
-    def update_global_prices(submenu):
+    def load_price_grades(submenu):
+        """Populate the grade selector, defaulting to the most-quoted grades"""
+        if submenu != 'global-prices':
+            return [], []
+
+        with server.app_context():
+            crudes = priced_crudes()
+
+        options = [{'label': name, 'value': crude_id} for crude_id, name, _, _ in crudes]
+        most_quoted = sorted(crudes, key=lambda c: c[2], reverse=True)[:DEFAULT_GRADE_COUNT]
+        return options, [crude_id for crude_id, _, _, _ in most_quoted]
+
+    @callback(
+        Output('global-prices-chart', 'figure'),
+        [Input('global-prices-crudes', 'value'),
+         Input('global-prices-frequency', 'value'),
+         Input('global-prices-date-range', 'start_date'),
+         Input('global-prices-date-range', 'end_date'),
+         Input('global-prices-chart', 'relayoutData')],
+        [State('current-submenu', 'data'),
+         State('global-prices-viewport-width', 'data')]
+    )
+    def update_global_prices(crude_ids, frequency, start_date, end_date, relayout_data, submenu, viewport_width):
         """Update global prices chart"""
         if submenu != 'global-prices':
             return go.Figure()
-        
-        # Placeholder - will need CrudePrice data
+        if not crude_ids:
+            return _empty_figure("Select one or more crude grades to compare prices")
+
+        # Zooming reloads the visible window from the daily matrix
+        relayout_data = relayout_data if ctx.triggered_id == 'global-prices-chart' else None
+        start, end, zoomed = resolve_window(start_date, end_date, relayout_data)
+
+        with server.app_context():
+            names = {crude_id: name for crude_id, name, _, _ in priced_crudes()}
+            prices = price_matrix(crude_ids, start, end, frequency)
+
+        if prices.dropna(how='all').empty:
+            return _empty_figure("No price data available for the selected grades and dates")
+
         fig = go.Figure()
-        fig.add_annotation(
-            text="Price data will be displayed here once CrudePrice data is available",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False
+        for crude_id in prices.columns:
+            series = prices[crude_id].dropna()
+            if series.empty:
+                continue
+            fig.add_trace(go.Scatter(
+                x=series.index,
+                y=series.values,
+                name=names.get(crude_id, str(crude_id)),
+                mode='lines',
+                hovertemplate='%{x|%Y-%m-%d}: $%{y:.2f}/bbl<extra>%{fullData.name}</extra>'
+            ))
+
+        fig.update_layout(
+            title=f'Crude Prices ({frequency.title()})',
+            xaxis_title='Date',
+            yaxis_title='Price (USD/bbl)',
+            hovermode='x unified',
+            height=500,
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            # A new frequency or date range resets zoom; zoom reloads keep it
+            uirevision=f'{frequency}|{start_date}|{end_date}'
         )
-        fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
-        return fig
+        if zoomed:
+            fig.update_xaxes(range=[start, end])
 
+        return downsample_figure(fig, viewport_width)
@@ -2,91 +2,172 @@
 Gross Product Worth and Margins View
 GPW and margins analysis for crude types
 """
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, callback, dash_table
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
-from app import db
-from app.models import Crude, CrudePrice
-from sqlalchemy import func
+from app.services.downsampling import downsample_figure
+from app.services.prices import ROLLING_WINDOWS, priced_crudes, rolling_analytics
+
+
+METRIC_LABELS = {
+    'gpw': 'Gross Product Worth',
+    'margin': 'Margin',
+}
 
 
 def create_layout():
     """Create the GPW Margins layout"""
     return html.Div([
         html.H3("Gross Product Worth and Margins", style={'marginBottom': '20px'}),
-        dcc.Graph(id='gpw-margins-chart')
+        dcc.Store(id='gpw-margins-viewport-width'),
+        html.Div([
+            html.Div([
+                html.Label("Crude:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(id='gpw-margins-crude', clearable=False, placeholder="Select a crude...")
+            ], className='col-md-4'),
+            html.Div([
+                html.Label("Metric:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(
+                    id='gpw-margins-metric',
+                    options=[{'label': label, 'value': value} for value, label in METRIC_LABELS.items()],
+                    value='margin',
+                    clearable=False
+                )
+            ], className='col-md-4'),
+            html.Div([
+                html.Label("Rolling Window:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(
+                    id='gpw-margins-window',
+                    options=[{'label': f'{window} days', 'value': window} for window in ROLLING_WINDOWS],
+                    value=ROLLING_WINDOWS[1],
+                    clearable=False
+                )
+            ], className='col-md-4'),
+        ], className='row', style={'marginBottom': '20px'}),
+        dcc.Graph(id='gpw-margins-chart'),
+        html.H5("All Grades - Latest", style={'marginTop': '20px', 'marginBottom': '10px'}),
+        dash_table.DataTable(
+            id='gpw-margins-table',
+            columns=[
+                {'name': 'Crude', 'id': 'Crude'},
+                {'name': 'Latest', 'id': 'Latest', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'Rolling Mean', 'id': 'Mean', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'Volatility', 'id': 'Volatility', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'P10', 'id': 'P10', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'P90', 'id': 'P90', 'type': 'numeric', 'format': {'specifier': '.2f'}},
+                {'name': 'Percentile', 'id': 'Percentile', 'type': 'numeric', 'format': {'specifier': '.0f'}},
+            ],
+            page_size=15,
+            sort_action='native',
+            style_table={'overflowX': 'auto'},
+            style_cell={'textAlign': 'left', 'padding': '8px'},
+            style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}
+        )
     ], className='tab-content')
 
 
+def _empty_figure(message):
+    fig = go.Figure()
+    fig.add_annotation(
+        text=message,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False
+    )
+    fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
+    return fig
+
+
 def register_callbacks(dash_app, server):
     """Register all callbacks for GPW Margins"""
-    
+
+    dash_app.clientside_callback(
+        "function(_) { return window.innerWidth; }",
+        Output('gpw-margins-viewport-width', 'data'),
+        Input('gpw-margins-viewport-width', 'id')
+    )
+
     @callback(
-        Output('gpw-margins-chart', 'figure'),
+        [Output('gpw-margins-crude', 'options'),
+         Output('gpw-margins-crude', 'value')],
         Input('current-submenu', 'data')
     )
-    def update_gpw_margins(submenu):
+    def load_margin_crudes(submenu):
+        """Populate the crude selector, defaulting to the most-quoted grade"""
+        if submenu != 'gpw-margins':
+            return [], None
+
+        with server.app_context():
+            crudes = priced_crudes()
+
+        if not crudes:
+            return [], None
+        options = [{'label': name, 'value': crude_id} for crude_id, name, _, _ in crudes]
+        return options, max(crudes, key=lambda c: c[2])[0]
+
+    @callback(
+        [Output('gpw-margins-chart', 'figure'),
+         Output('gpw-margins-table', 'data')],
+        [Input('gpw-margins-crude', 'value'),
+         Input('gpw-margins-metric', 'value'),
+         Input('gpw-margins-window', 'value')],
+        [State('current-submenu', 'data'),
+         State('gpw-margins-viewport-width', 'data')]
+    )
+    def update_gpw_margins(crude_id, metric, window, submenu, viewport_width):
         """Update GPW and margins chart"""
         if submenu != 'gpw-margins':
-            return go.Figure()
-        
+            return go.Figure(), []
+
         with server.app_context():
-            latest_date = db.session.query(func.max(CrudePrice.date)).scalar()
-            if not latest_date:
-                fig = go.Figure()
-                fig.add_annotation(
-                    text="No price data available. Please seed CrudePrice data.",
-                    xref="paper", yref="paper",
-                    x=0.5, y=0.5, showarrow=False
-                )
-                fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
-                return fig
-            
-            results = db.session.query(
-                Crude.name,
-                CrudePrice.gross_product_worth,
-                CrudePrice.margin
-            ).join(CrudePrice).filter(
-                CrudePrice.date == latest_date
-            ).limit(15).all()
-            
-            df = pd.DataFrame([
-                {
-                    'Crude': r.name,
-                    'GPW': r.gross_product_worth or 0,
-                    'Margin': r.margin or 0
-                }
-                for r in results
-            ])
-        
-        if df.empty:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No GPW/margin data available.",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
-            return fig
-        
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
-        fig.add_trace(
-            go.Bar(x=df['Crude'], y=df['GPW'], name='Gross Product Worth'),
-            secondary_y=False,
-        )
-        fig.add_trace(
-            go.Scatter(x=df['Crude'], y=df['Margin'], name='Margin', mode='lines+markers'),
-            secondary_y=True,
-        )
-        fig.update_xaxes(title_text="Crude Type", tickangle=-45)
-        fig.update_yaxes(title_text="GPW", secondary_y=False)
-        fig.update_yaxes(title_text="Margin", secondary_y=True)
+            names = {c_id: name for c_id, name, _, _ in priced_crudes()}
+            statistics = rolling_analytics(metric, window)
+
+        if not statistics or statistics['value'].dropna(how='all').empty:
+            return _empty_figure("No GPW/margin data available."), []
+
+        # Latest row per grade, across all grades at once
+        latest = pd.DataFrame({
+            'Latest': statistics['value'].ffill().iloc[-1],
+            'Mean': statistics['mean'].ffill().iloc[-1],
+            'Volatility': statistics['volatility'].ffill().iloc[-1],
+            'P10': statistics['p10'].ffill().iloc[-1],
+            'P90': statistics['p90'].ffill().iloc[-1],
+            'Percentile': statistics['percentile'].ffill().iloc[-1],
+        }).dropna(subset=['Latest'])
+        latest.insert(0, 'Crude', latest.index.map(names))
+        table = latest.sort_values('Percentile', ascending=False).to_dict('records')
+
+        if crude_id not in statistics['value'].columns:
+            return _empty_figure("Select a crude to see its history."), table
+
+        label = METRIC_LABELS[metric]
+        value = statistics['value'][crude_id].dropna()
+        mean = statistics['mean'][crude_id].dropna()
+        p10 = statistics['p10'][crude_id].dropna()
+        p90 = statistics['p90'][crude_id].dropna()
+        volatility = statistics['volatility'][crude_id].dropna()
+
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.06)
+        fig.add_trace(go.Scatter(x=p90.index, y=p90.values, name='90th percentile', mode='lines',
+                                 line=dict(width=0), showlegend=False), row=1, col=1)
+        fig.add_trace(go.Scatter(x=p10.index, y=p10.values, name='10th-90th percentile', mode='lines',
+                                 line=dict(width=0), fill='tonexty', fillcolor='rgba(52, 152, 219, 0.15)'),
+                      row=1, col=1)
+        fig.add_trace(go.Scatter(x=value.index, y=value.values, name=label, mode='lines',
+                                 line=dict(color='#7f8c8d', width=1)), row=1, col=1)
+        fig.add_trace(go.Scatter(x=mean.index, y=mean.values, name=f'{window}-day mean', mode='lines',
+                                 line=dict(color='#3498db', width=2)), row=1, col=1)
+        fig.add_trace(go.Scatter(x=volatility.index, y=volatility.values, name=f'{window}-day volatility',
+                                 mode='lines', line=dict(color='#e67e22', width=1.5)), row=2, col=1)
+
+        fig.update_yaxes(title_text="USD/bbl", row=1, col=1)
+        fig.update_yaxes(title_text="Volatility", row=2, col=1)
         fig.update_layout(
-            title='Gross Product Worth and Margins',
-            height=500,
+            title=f'{names.get(crude_id, crude_id)} - {label} ({window}-day rolling)',
+            height=600,
+            hovermode='x unified',
             plot_bgcolor='white',
             paper_bgcolor='white'
         )
-        return fig
-
+        return downsample_figure(fig, viewport_width), table
@@ -6,9 +6,7 @@ from dash import dcc, html, Input, Output, callback
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from app import db
-from app.models import Country, Imports
-from sqlalchemy import func
+from app.services.datastore import get_store
 
 
 def create_layout():
@@ -32,24 +30,18 @@ def register_callbacks(dash_app, server):
             return go.Figure()
         
         with server.app_context():
-            latest_date = db.session.query(func.max(Imports.date)).scalar()
+            store = get_store()
+            latest_date = store.latest_date('imports')
             if not latest_date:
                 return go.Figure()
             
-            results = db.session.query(
-                Country.name,
-                Country.region,
-                func.sum(Imports.imports_bbl).label('imports')
-            ).join(Imports).filter(
-                Imports.date == latest_date
-            ).group_by(Country.id, Country.name, Country.region).order_by(
-                func.sum(Imports.imports_bbl).desc()
-            ).limit(15).all()
-            
-            df = pd.DataFrame([
-                {'Country': r.name, 'Region': r.region or 'Unknown', 'Imports (bbl)': r.imports}
-                for r in results
-            ])
+            totals = store.with_countries(store.totals_by_country('imports', latest_date), 'value')
+            totals = totals.sort_values('value', ascending=False).head(15)
+            df = pd.DataFrame({
+                'Country': totals['name'],
+                'Region': totals['region'].fillna('Unknown'),
+                'Imports (bbl)': totals['value']
+            })
         
         if df.empty:
             return go.Figure()
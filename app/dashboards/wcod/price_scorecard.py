@@ -3,66 +3,55 @@ Price Scorecard for Key World Oil Grades View
 Price scorecard table for key crude grades
 """
 from dash import dcc, html, Input, Output, callback, dash_table
-import pandas as pd
-from app import db
-from app.models import Crude, CrudePrice, Country
-from sqlalchemy import func
+from dash.dash_table.Format import Format, Scheme, Sign
+from app.services.prices import SCORECARD_HORIZONS, price_scorecard
 
 
 def create_layout():
     """Create the Price Scorecard layout"""
+    change_format = Format(precision=2, scheme=Scheme.fixed, sign=Sign.positive)
     return html.Div([
         html.H3("Price Scorecard for Key World Oil Grades", style={'marginBottom': '20px'}),
         dash_table.DataTable(
             id='price-scorecard-table',
+            columns=[
+                {'name': ['', 'Crude'], 'id': 'name'},
+                {'name': ['', 'Country'], 'id': 'country'},
+                {'name': ['', 'Benchmark'], 'id': 'benchmark'},
+                {'name': ['', 'Price (USD/bbl)'], 'id': 'Price', 'type': 'numeric',
+                 'format': Format(precision=2, scheme=Scheme.fixed)},
+            ] + [
+                {'name': ['Change (%)', horizon], 'id': horizon, 'type': 'numeric', 'format': change_format}
+                for horizon in SCORECARD_HORIZONS
+            ],
+            merge_duplicate_headers=True,
+            sort_action='native',
             style_table={'overflowX': 'auto'},
             style_cell={'textAlign': 'left', 'padding': '10px'},
-            style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}
+            style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'},
+            style_data_conditional=[
+                style
+                for horizon in SCORECARD_HORIZONS
+                for style in (
+                    {'if': {'filter_query': f'{{{horizon}}} > 0', 'column_id': horizon}, 'color': '#27ae60'},
+                    {'if': {'filter_query': f'{{{horizon}}} < 0', 'column_id': horizon}, 'color': '#e74c3c'},
+                )
+            ]
         )
     ], className='tab-content')
 
 
 def register_callbacks(dash_app, server):
     """Register all callbacks for Price Scorecard"""
-    
+
     @callback(
-        [Output('price-scorecard-table', 'data'),
-         Output('price-scorecard-table', 'columns')],
+        Output('price-scorecard-table', 'data'),
         Input('current-submenu', 'data')
     )
     def update_price_scorecard(submenu):
         """Update price scorecard table"""
         if submenu != 'price-scorecard':
-            return [], []
-        
-        with server.app_context():
-            latest_date = db.session.query(func.max(CrudePrice.date)).scalar()
-            if not latest_date:
-                return [], []
-            
-            results = db.session.query(
-                Crude.name,
-                Country.name.label('country_name'),
-                CrudePrice.price_usd_bbl,
-                CrudePrice.benchmark
-            ).join(Crude).join(Country).filter(
-                CrudePrice.date == latest_date
-            ).limit(20).all()
-            
-            df = pd.DataFrame([
-                {
-                    'Crude': r.name,
-                    'Country': r.country_name,
-                    'Price (USD/bbl)': r.price_usd_bbl or 0,
-                    'Benchmark': r.benchmark or 'N/A'
-                }
-                for r in results
-            ])
-        
-        if df.empty:
-            return [], []
-        
-        columns = [{'name': col, 'id': col} for col in df.columns]
-        data = df.to_dict('records')
-        return data, columns
+            return []
 
+        with server.app_context():
+            return price_scorecard()
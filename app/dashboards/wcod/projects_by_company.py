@@ -2,60 +2,110 @@
 Projects by Company View
 Upstream projects grouped by company
 """
-from dash import dcc, html, Input, Output, callback, dash_table
+from dash import dcc, html, Input, Output, State, callback, dash_table, no_update
 import plotly.graph_objects as go
-import plotly.express as px
 import pandas as pd
-from app import db
-from app.models import Company, UpstreamProject
-from sqlalchemy import func
+from app.models.upstream_project import ProjectStatus
+from app.services.crossfilter import get_project_crossfilter, selection_colors, toggle_filter
+from app.services.portfolios import PORTFOLIO_METRICS, PORTFOLIO_TOTAL, company_portfolio, company_rankings
+from app.services.search import linked_entity, search_options
 
 
-def create_layout():
+PORTFOLIO_COLUMNS = [
+    {'name': 'Company', 'id': 'company'},
+    {'name': 'Projects', 'id': 'project_count', 'type': 'numeric'},
+    {'name': 'Capacity (bbl/d)', 'id': 'capacity_bbl', 'type': 'numeric', 'format': {'specifier': ',.0f'}},
+    {'name': 'Investment (USD m)', 'id': 'investment_musd', 'type': 'numeric', 'format': {'specifier': ',.0f'}},
+    {'name': 'Weighted Carbon Intensity', 'id': 'carbon_intensity', 'type': 'numeric', 'format': {'specifier': '.1f'}},
+    {'name': 'Countries', 'id': 'country_count', 'type': 'numeric'},
+]
+
+
+def _stat(label, value):
+    return html.Div([
+        html.Div(label, style={'fontSize': '13px', 'color': '#6c757d'}),
+        html.Div(value, style={'fontSize': '20px', 'fontWeight': '600'})
+    ], className='col-md-2', style={'padding': '10px'})
+
+
+def create_layout(server):
     """Create the Projects by Company layout"""
+    # Only the first matches are rendered; the rest load as the user types
+    with server.app_context():
+        company_options = search_options('company')
+
     return html.Div([
         html.H3("Projects by Company", style={'marginBottom': '20px'}),
         html.Div([
             dcc.Graph(id='projects-company-chart')
         ]),
+        html.H4("Company Portfolios", style={'marginTop': '30px', 'marginBottom': '15px'}),
+        html.Div([
+            html.Div([
+                html.Label("Status:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(
+                    id='projects-company-status',
+                    options=[{'label': 'All Statuses', 'value': PORTFOLIO_TOTAL}] + [
+                        {'label': s.value, 'value': s.value} for s in ProjectStatus
+                    ],
+                    value=PORTFOLIO_TOTAL,
+                    clearable=False
+                )
+            ], className='col-md-3'),
+            html.Div([
+                html.Label("Rank by:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(
+                    id='projects-company-metric',
+                    options=[{'label': label, 'value': metric} for metric, (_, label) in PORTFOLIO_METRICS.items()],
+                    value='capacity',
+                    clearable=False
+                )
+            ], className='col-md-3'),
+        ], className='row', style={'marginBottom': '15px'}),
         html.Div([
             dash_table.DataTable(
                 id='projects-company-table',
+                columns=PORTFOLIO_COLUMNS,
+                data=[],
+                page_size=20,
+                sort_action='native',
+                filter_action='native',
                 style_table={'overflowX': 'auto'},
                 style_cell={'textAlign': 'left', 'padding': '10px'},
                 style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}
             )
-        ], style={'marginTop': '20px'})
+        ], style={'marginTop': '20px'}),
+        html.H4("Company Drill-Down", style={'marginTop': '30px', 'marginBottom': '15px'}),
+        html.Div([
+            html.Label("Select Company (or click a table row):", style={'fontWeight': '500', 'marginBottom': '8px'}),
+            dcc.Dropdown(
+                id='projects-company-select',
+                options=company_options,
+                value=None,
+                placeholder='Search companies...',
+                style={'marginBottom': '20px'}
+            )
+        ]),
+        html.Div(id='projects-company-detail')
     ], className='tab-content')
 
 
 def register_callbacks(dash_app, server):
     """Register all callbacks for Projects by Company"""
-    
+
     @callback(
-        [Output('projects-company-chart', 'figure'),
-         Output('projects-company-table', 'data'),
-         Output('projects-company-table', 'columns')],
-        Input('current-submenu', 'data')
+        Output('projects-company-chart', 'figure'),
+        [Input('current-submenu', 'data'),
+         Input('projects-crossfilter', 'data')]
     )
-    def update_projects_by_company(submenu):
-        """Update projects by company chart and table"""
+    def update_projects_by_company(submenu, filters):
+        """Update projects by company chart"""
         if submenu != 'projects-company':
-            return go.Figure(), [], []
-        
+            return go.Figure()
+
         with server.app_context():
-            results = db.session.query(
-                Company.name,
-                func.count(UpstreamProject.id).label('project_count')
-            ).join(UpstreamProject).group_by(
-                Company.id, Company.name
-            ).order_by(func.count(UpstreamProject.id).desc()).limit(20).all()
-            
-            df = pd.DataFrame([
-                {'Company': r.name, 'Projects': r.project_count}
-                for r in results
-            ])
-        
+            df = get_project_crossfilter().counts('company', filters, limit=20)
+
         if df.empty:
             fig = go.Figure()
             fig.add_annotation(
@@ -64,13 +114,153 @@ def register_callbacks(dash_app, server):
                 x=0.5, y=0.5, showarrow=False
             )
             fig.update_layout(height=400, plot_bgcolor='white', paper_bgcolor='white')
-            return fig, [], []
-        
-        fig = px.bar(df, x='Company', y='Projects', title='Projects by Company')
-        fig.update_layout(height=400, plot_bgcolor='white', paper_bgcolor='white', xaxis_tickangle=-45)
-        
-        columns = [{'name': col, 'id': col} for col in df.columns]
-        data = df.to_dict('records')
-        
-        return fig, data, columns
+            return fig
+
+        fig = go.Figure(go.Bar(
+            x=df['label'],
+            y=df['projects'],
+            marker_color=selection_colors(df['selected']),
+            hovertemplate='%{x}: %{y} projects<extra></extra>'
+        ))
+        fig.update_layout(
+            title='Projects by Company (click a bar to filter)',
+            xaxis_title='Company',
+            yaxis_title='Projects',
+            height=400,
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            xaxis_tickangle=-45
+        )
+        return fig
+
+    @callback(
+        Output('projects-crossfilter', 'data', allow_duplicate=True),
+        Input('projects-company-chart', 'clickData'),
+        State('projects-crossfilter', 'data'),
+        prevent_initial_call=True
+    )
+    def filter_by_company(click_data, filters):
+        """Toggle the clicked company in the shared project filters"""
+        if not click_data:
+            return no_update
+        return toggle_filter(filters, 'company', click_data['points'][0]['x'])
+
+    @callback(
+        Output('projects-company-table', 'data'),
+        [Input('current-submenu', 'data'),
+         Input('projects-company-status', 'value'),
+         Input('projects-company-metric', 'value')]
+    )
+    def update_company_portfolios(submenu, status, metric):
+        """Rank every company from the precomputed portfolio table"""
+        if submenu != 'projects-company':
+            return []
+
+        with server.app_context():
+            df = company_rankings(status or PORTFOLIO_TOTAL, metric or 'capacity')
+
+        df['investment_musd'] = df['investment_usd'] / 1e6
+        # 'id' lets a clicked row report its company
+        df['id'] = df['company_id']
+        return df.drop(columns=['company_id', 'investment_usd']).to_dict('records')
+
+    @callback(
+        [Output('projects-company-select', 'value'),
+         Output('projects-company-select', 'options', allow_duplicate=True)],
+        Input('projects-company-table', 'active_cell'),
+        prevent_initial_call=True
+    )
+    def select_company_from_table(active_cell):
+        """Drill into the company whose row was clicked"""
+        if not active_cell or active_cell.get('row_id') is None:
+            return no_update, no_update
+        # The clicked company may not be among the options loaded so far
+        with server.app_context():
+            return active_cell['row_id'], search_options('company', selected=active_cell['row_id'])
+
+    @callback(
+        [Output('projects-company-select', 'value', allow_duplicate=True),
+         Output('projects-company-select', 'options', allow_duplicate=True)],
+        Input('url', 'search'),
+        prevent_initial_call='initial_duplicate'
+    )
+    def select_linked_company(search):
+        """Open the company named in a search result link"""
+        company_id = linked_entity(search, 'company')
+        if company_id is None:
+            return no_update, no_update
+        with server.app_context():
+            return company_id, search_options('company', selected=company_id)
+
+    @callback(
+        Output('projects-company-select', 'options'),
+        Input('projects-company-select', 'search_value'),
+        State('projects-company-select', 'value')
+    )
+    def search_company_options(search_value, value):
+        """Load the top matching companies as the user types"""
+        if not search_value:
+            return no_update
+        with server.app_context():
+            return search_options('company', search_value, value)
+
+    @callback(
+        Output('projects-company-detail', 'children'),
+        Input('projects-company-select', 'value')
+    )
+    def update_company_detail(company_id):
+        """Portfolio breakdown by status and country for one company"""
+        if not company_id:
+            return html.Div("Select a company to see its portfolio", style={'color': '#6c757d'})
+
+        with server.app_context():
+            statuses, countries = company_portfolio(company_id)
+
+        if statuses.empty:
+            return html.Div("This company has no upstream projects")
+
+        total = statuses[statuses['status'] == PORTFOLIO_TOTAL].iloc[0]
+        by_status = statuses[statuses['status'] != PORTFOLIO_TOTAL].sort_values('capacity_bbl', ascending=False)
+
+        status_fig = go.Figure(go.Bar(
+            x=by_status['status'],
+            y=by_status['capacity_bbl'],
+            customdata=by_status[['project_count', 'investment_usd']].to_numpy(),
+            hovertemplate='%{x}<br>Capacity: %{y:,.0f} bbl/d<br>Projects: %{customdata[0]}'
+                          '<br>Investment: $%{customdata[1]:,.0f}<extra></extra>'
+        ))
+        status_fig.update_layout(title='Capacity by Status', yaxis_title='Capacity (bbl/d)',
+                                 height=350, plot_bgcolor='white', paper_bgcolor='white')
 
+        carbon = f"{total['carbon_intensity']:.1f}" if pd.notna(total['carbon_intensity']) else 'N/A'
+        countries['investment_musd'] = countries['investment_usd'] / 1e6
+        return html.Div([
+            html.Div([
+                _stat('Projects', f"{int(total['project_count']):,}"),
+                _stat('Capacity (bbl/d)', f"{total['capacity_bbl']:,.0f}"),
+                _stat('Investment (USD m)', f"{total['investment_usd'] / 1e6:,.0f}"),
+                _stat('Weighted Carbon Intensity', carbon),
+                _stat('Countries', f"{int(total['country_count'])}"),
+            ], className='row', style={'background': '#f8f9fa', 'borderRadius': '8px', 'marginBottom': '15px'}),
+            html.Div([
+                html.Div([dcc.Graph(figure=status_fig)], className='col-md-6'),
+                html.Div([
+                    html.H5("Country Footprint", style={'marginBottom': '10px'}),
+                    dash_table.DataTable(
+                        data=countries.drop(columns='investment_usd').to_dict('records'),
+                        columns=[
+                            {'name': 'Country', 'id': 'country'},
+                            {'name': 'Projects', 'id': 'project_count', 'type': 'numeric'},
+                            {'name': 'Capacity (bbl/d)', 'id': 'capacity_bbl', 'type': 'numeric',
+                             'format': {'specifier': ',.0f'}},
+                            {'name': 'Investment (USD m)', 'id': 'investment_musd', 'type': 'numeric',
+                             'format': {'specifier': ',.0f'}},
+                        ],
+                        page_size=10,
+                        style_table={'overflowX': 'auto'},
+                        style_cell={'textAlign': 'left', 'padding': '8px'},
+                        style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}
+                    )
+                ], className='col-md-6'),
+            ], className='row')
+        ])
@@ -2,13 +2,9 @@
 Projects by Country View
 Upstream projects grouped by country
 """
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, callback, no_update
 import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-from app import db
-from app.models import Country, UpstreamProject
-from sqlalchemy import func
+from app.services.crossfilter import get_project_crossfilter, selection_colors, toggle_filter
 
 
 def create_layout():
@@ -24,25 +20,16 @@ def register_callbacks(dash_app, server):
     
     @callback(
         Output('projects-country-chart', 'figure'),
-        Input('current-submenu', 'data')
+        [Input('current-submenu', 'data'),
+         Input('projects-crossfilter', 'data')]
     )
-    def update_projects_by_country(submenu):
+    def update_projects_by_country(submenu, filters):
         """Update projects by country chart"""
         if submenu != 'projects-country':
             return go.Figure()
         
         with server.app_context():
-            results = db.session.query(
-                Country.name,
-                func.count(UpstreamProject.id).label('project_count')
-            ).join(UpstreamProject).group_by(
-                Country.id, Country.name
-            ).order_by(func.count(UpstreamProject.id).desc()).limit(20).all()
-            
-            df = pd.DataFrame([
-                {'Country': r.name, 'Projects': r.project_count}
-                for r in results
-            ])
+            df = get_project_crossfilter().counts('country', filters, limit=20)
         
         if df.empty:
             fig = go.Figure()
@@ -54,7 +41,31 @@ def register_callbacks(dash_app, server):
             fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
             return fig
         
-        fig = px.bar(df, x='Country', y='Projects', title='Projects by Country')
-        fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white', xaxis_tickangle=-45)
+        fig = go.Figure(go.Bar(
+            x=df['label'],
+            y=df['projects'],
+            marker_color=selection_colors(df['selected']),
+            hovertemplate='%{x}: %{y} projects<extra></extra>'
+        ))
+        fig.update_layout(
+            title='Projects by Country (click a bar to filter)',
+            xaxis_title='Country',
+            yaxis_title='Projects',
+            height=500,
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            xaxis_tickangle=-45
+        )
         return fig
-
+    
+    @callback(
+        Output('projects-crossfilter', 'data', allow_duplicate=True),
+        Input('projects-country-chart', 'clickData'),
+        State('projects-crossfilter', 'data'),
+        prevent_initial_call=True
+    )
+    def filter_by_country(click_data, filters):
+        """Toggle the clicked country in the shared project filters"""
+        if not click_data:
+            return no_update
+        return toggle_filter(filters, 'country', click_data['points'][0]['x'])
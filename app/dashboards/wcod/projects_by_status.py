@@ -2,20 +2,23 @@
 Projects by Status View
 Upstream projects grouped by status
 """
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, Input, Output, State, callback, ctx, no_update
 import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-from app import db
-from app.models import UpstreamProject
-from sqlalchemy import func
+from app.services.crossfilter import get_project_crossfilter, selection_colors, toggle_filter
 
 
 def create_layout():
     """Create the Projects by Status layout"""
     return html.Div([
         html.H3("Projects by Status", style={'marginBottom': '20px'}),
-        dcc.Graph(id='projects-status-chart')
+        html.Div([
+            html.Div([
+                dcc.Graph(id='projects-status-chart')
+            ], className='col-md-7'),
+            html.Div([
+                dcc.Graph(id='projects-type-chart')
+            ], className='col-md-5'),
+        ], className='row')
     ], className='tab-content')
 
 
@@ -23,26 +26,22 @@ def register_callbacks(dash_app, server):
     """Register all callbacks for Projects by Status"""
     
     @callback(
-        Output('projects-status-chart', 'figure'),
-        Input('current-submenu', 'data')
+        [Output('projects-status-chart', 'figure'),
+         Output('projects-type-chart', 'figure')],
+        [Input('current-submenu', 'data'),
+         Input('projects-crossfilter', 'data')]
     )
-    def update_projects_by_status(submenu):
-        """Update projects by status chart"""
+    def update_projects_by_status(submenu, filters):
+        """Update projects by status and project type charts"""
         if submenu != 'projects-status':
-            return go.Figure()
+            return go.Figure(), go.Figure()
         
         with server.app_context():
-            results = db.session.query(
-                UpstreamProject.status,
-                func.count(UpstreamProject.id).label('project_count')
-            ).group_by(UpstreamProject.status).all()
-            
-            df = pd.DataFrame([
-                {'Status': r.status, 'Projects': r.project_count}
-                for r in results
-            ])
+            crossfilter = get_project_crossfilter()
+            status_df = crossfilter.counts('status', filters)
+            type_df = crossfilter.counts('project_type', filters)
         
-        if df.empty:
+        if status_df.empty:
             fig = go.Figure()
             fig.add_annotation(
                 text="No project data available. Please seed UpstreamProject data.",
@@ -50,9 +49,47 @@ def register_callbacks(dash_app, server):
                 x=0.5, y=0.5, showarrow=False
             )
             fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
-            return fig
+            return fig, go.Figure()
         
-        fig = px.pie(df, values='Projects', names='Status', title='Projects by Status')
-        fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
-        return fig
-
+        # Selected slices are pulled out of the pie
+        status_fig = go.Figure(go.Pie(
+            labels=status_df['label'],
+            values=status_df['projects'],
+            pull=[0.08 if selected else 0 for selected in status_df['selected']],
+            sort=False,
+            hovertemplate='%{label}: %{value} projects<extra></extra>'
+        ))
+        status_fig.update_layout(title='Projects by Status (click a slice to filter)',
+                                 height=500, plot_bgcolor='white', paper_bgcolor='white')
+        
+        type_fig = go.Figure(go.Bar(
+            x=type_df['projects'],
+            y=type_df['label'],
+            orientation='h',
+            marker_color=selection_colors(type_df['selected']),
+            hovertemplate='%{y}: %{x} projects<extra></extra>'
+        ))
+        type_fig.update_layout(
+            title='Projects by Type',
+            xaxis_title='Projects',
+            yaxis=dict(autorange='reversed'),
+            height=500,
+            plot_bgcolor='white',
+            paper_bgcolor='white'
+        )
+        return status_fig, type_fig
+    
+    @callback(
+        Output('projects-crossfilter', 'data', allow_duplicate=True),
+        [Input('projects-status-chart', 'clickData'),
+         Input('projects-type-chart', 'clickData')],
+        State('projects-crossfilter', 'data'),
+        prevent_initial_call=True
+    )
+    def filter_by_status_or_type(status_click, type_click, filters):
+        """Toggle the clicked status or project type in the shared project filters"""
+        if ctx.triggered_id == 'projects-status-chart' and status_click:
+            return toggle_filter(filters, 'status', status_click['points'][0]['label'])
+        if ctx.triggered_id == 'projects-type-chart' and type_click:
+            return toggle_filter(filters, 'project_type', type_click['points'][0]['y'])
+        return no_update
@@ -6,17 +6,93 @@ from dash import dcc, html, Input, Output, callback
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from app import db
 from app.models import UpstreamProject
 from sqlalchemy import func, extract
+from app.services.downsampling import downsample_figure
+from app.services.project_timeline import NEVER_COMPLETED, get_project_timeline
+from app.services.trade_flows import period_index
 
 
+# Measure -> (chart title, axis title)
+TIME_MEASURES = {
+    'count': ('Projects Started per Year', 'Projects'),
+    'capacity': ('Cumulative Capacity by Expected Completion', 'Capacity (bbl/d)'),
+    'investment': ('Cumulative Investment by Status', 'Investment (USD)'),
+}
+
+
+def empty_figure():
+    """Placeholder shown when there are no dated projects"""
+    fig = go.Figure()
+    fig.add_annotation(
+        text="No project data available. Please seed UpstreamProject data.",
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False
+    )
+    fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
+    return fig
+
+
+def pipeline_figure(timeline, measure, start_period=None, end_period=None):
+    """Stacked cumulative curves by status; capacity also shows what is still in development"""
+    series = 'completed_capacity' if measure == 'capacity' else 'investment'
+    df = timeline.frame(series, start_period, end_period)
+    if measure == 'capacity':
+        df = df.drop(columns=[s for s in NEVER_COMPLETED if s in df.columns])
+    if df.empty:
+        return empty_figure()
+    
+    title, axis_title = TIME_MEASURES[measure]
+    fig = go.Figure()
+    for status in df.columns:
+        fig.add_trace(go.Scatter(
+            x=df.index,
+            y=df[status],
+            name=status,
+            mode='lines',
+            stackgroup='status',
+            hovertemplate=f'{status}<br>%{{x}}: %{{y:,.0f}}<extra></extra>'
+        ))
+    if measure == 'capacity':
+        pipeline = timeline.frame('pipeline_capacity', start_period, end_period).sum(axis=1)
+        fig.add_trace(go.Scatter(
+            x=pipeline.index,
+            y=pipeline.to_numpy(),
+            name='In development (all statuses)',
+            mode='lines',
+            line=dict(color='#212529', dash='dash'),
+            hovertemplate='In development<br>%{x}: %{y:,.0f}<extra></extra>'
+        ))
+    fig.update_layout(
+        title=title,
+        xaxis_title='Month',
+        yaxis_title=axis_title,
+        height=500,
+        hovermode='x unified',
+        plot_bgcolor='white',
+        paper_bgcolor='white'
+    )
+    return fig
+
 def create_layout():
     """Create the Projects by Time layout"""
     return html.Div([
         html.H3("Projects by Time", style={'marginBottom': '20px'}),
         html.Div([
+            html.Label("Measure:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+            dcc.Dropdown(
+                id='projects-time-measure',
+                options=[
+                    {'label': 'Projects Started', 'value': 'count'},
+                    {'label': 'Capacity Pipeline', 'value': 'capacity'},
+                    {'label': 'Investment Pipeline', 'value': 'investment'},
+                ],
+                value='count',
+                clearable=False,
+                style={'marginBottom': '20px', 'width': '300px'}
+            ),
             html.Label("Time Range:", style={'fontWeight': '500', 'marginBottom': '8px'}),
             dcc.Dropdown(
                 id='projects-time-range',
@@ -24,10 +100,17 @@ def create_layout():
                     {'label': 'All Time', 'value': 'all'},
                     {'label': 'Last 5 Years', 'value': '5y'},
                     {'label': 'Last 10 Years', 'value': '10y'},
+                    {'label': 'Custom Range', 'value': 'custom'},
                 ],
                 value='all',
                 clearable=False,
                 style={'marginBottom': '20px', 'width': '300px'}
+            ),
+            dcc.DatePickerRange(
+                id='projects-time-custom-range',
+                display_format='YYYY-MM-DD',
+                disabled=True,
+                style={'marginBottom': '20px'}
             )
         ]),
         html.Div([
@@ -39,28 +122,56 @@ def create_layout():
 def register_callbacks(dash_app, server):
     """Register all callbacks for Projects by Time"""
     
+    @callback(
+        Output('projects-time-custom-range', 'disabled'),
+        Input('projects-time-range', 'value')
+    )
+    def toggle_custom_range(time_range):
+        """Enable the date picker only for custom ranges"""
+        return time_range != 'custom'
+    
     @callback(
         Output('projects-time-chart', 'figure'),
         [Input('current-submenu', 'data'),
-         Input('projects-time-range', 'value')]
+         Input('projects-time-measure', 'value'),
+         Input('projects-time-range', 'value'),
+         Input('projects-time-custom-range', 'start_date'),
+         Input('projects-time-custom-range', 'end_date')]
     )
-    def update_projects_by_time(submenu, time_range):
+    def update_projects_by_time(submenu, measure, time_range, custom_start, custom_end):
         """Update projects by time chart"""
         if submenu != 'projects-time':
             return go.Figure()
         
+        start, end = None, None
+        if time_range == '5y':
+            start = datetime.now().date() - timedelta(days=365*5)
+        elif time_range == '10y':
+            start = datetime.now().date() - timedelta(days=365*10)
+        elif time_range == 'custom':
+            start = date.fromisoformat(custom_start[:10]) if custom_start else None
+            end = date.fromisoformat(custom_end[:10]) if custom_end else None
+        
+        if measure in ('capacity', 'investment'):
+            with server.app_context():
+                timeline = get_project_timeline()
+            return pipeline_figure(
+                timeline, measure,
+                period_index(start.year, start.month) if start else None,
+                period_index(end.year, end.month) if end else None
+            )
+        
         with server.app_context():
             query = db.session.query(
                 extract('year', UpstreamProject.start_date).label('year'),
                 func.count(UpstreamProject.id).label('project_count')
             ).filter(UpstreamProject.start_date.isnot(None))
             
-            if time_range == '5y':
-                cutoff_date = datetime.now().date() - timedelta(days=365*5)
-                query = query.filter(UpstreamProject.start_date >= cutoff_date)
-            elif time_range == '10y':
-                cutoff_date = datetime.now().date() - timedelta(days=365*10)
-                query = query.filter(UpstreamProject.start_date >= cutoff_date)
+            # Both bounds hit idx_project_start_date
+            if start:
+                query = query.filter(UpstreamProject.start_date >= start)
+            if end:
+                query = query.filter(UpstreamProject.start_date <= end)
             
             results = query.group_by(
                 extract('year', UpstreamProject.start_date)
@@ -72,16 +183,9 @@ def register_callbacks(dash_app, server):
             ])
         
         if df.empty:
-            fig = go.Figure()
-            fig.add_annotation(
-                text="No project data available. Please seed UpstreamProject data.",
-                xref="paper", yref="paper",
-                x=0.5, y=0.5, showarrow=False
-            )
-            fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
-            return fig
+            return empty_figure()
         
-        fig = px.line(df, x='Year', y='Projects', markers=True, title='Projects by Time')
+        fig = px.line(df, x='Year', y='Projects', markers=True, title=TIME_MEASURES['count'][0])
         fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
-        return fig
+        return downsample_figure(fig)
 
@@ -4,17 +4,27 @@ Carbon intensity metrics for upstream projects
 """
 from dash import dcc, html, Input, Output, callback
 import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
-from app import db
-from app.models import UpstreamProject, Country
-from sqlalchemy import func
+from app.services.carbon import CARBON_GROUPS, get_carbon_rollups
+
+
+# Bars shown for a rollup; companies are too many to show in full
+CARBON_CHART_LIMIT = 25
 
 
 def create_layout():
     """Create the Carbon Intensity layout"""
     return html.Div([
         html.H3("Carbon Intensity", style={'marginBottom': '20px'}),
+        html.Div([
+            html.Label("Roll up by:", style={'fontWeight': '500', 'marginRight': '10px'}),
+            dcc.RadioItems(
+                id='projects-carbon-group',
+                options=[{'label': label, 'value': group} for group, label in CARBON_GROUPS.items()],
+                value='country',
+                inline=True,
+                inputStyle={'marginRight': '5px', 'marginLeft': '15px'}
+            )
+        ], style={'marginBottom': '10px'}),
         dcc.Graph(id='projects-carbon-chart')
     ], className='tab-content')
 
@@ -24,25 +34,16 @@ def register_callbacks(dash_app, server):
     
     @callback(
         Output('projects-carbon-chart', 'figure'),
-        Input('current-submenu', 'data')
+        [Input('current-submenu', 'data'),
+         Input('projects-carbon-group', 'value')]
     )
-    def update_projects_carbon(submenu):
+    def update_projects_carbon(submenu, group):
         """Update projects carbon intensity chart"""
         if submenu != 'projects-carbon':
             return go.Figure()
         
         with server.app_context():
-            results = db.session.query(
-                Country.name,
-                func.avg(UpstreamProject.carbon_intensity).label('avg_carbon')
-            ).join(UpstreamProject).filter(
-                UpstreamProject.carbon_intensity.isnot(None)
-            ).group_by(Country.id, Country.name).all()
-            
-            df = pd.DataFrame([
-                {'Country': r.name, 'Avg Carbon Intensity': r.avg_carbon or 0}
-                for r in results
-            ])
+            df = get_carbon_rollups().projects[group or 'country']
         
         if df.empty:
             fig = go.Figure()
@@ -54,8 +55,34 @@ def register_callbacks(dash_app, server):
             fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white')
             return fig
         
-        fig = px.bar(df, x='Country', y='Avg Carbon Intensity', 
-                    title='Average Carbon Intensity by Country')
-        fig.update_layout(height=500, plot_bgcolor='white', paper_bgcolor='white', xaxis_tickangle=-45)
+        # Largest producers first
+        df = df.head(CARBON_CHART_LIMIT)
+        label = CARBON_GROUPS[group or 'country']
+        fig = go.Figure([
+            go.Bar(
+                x=df['key'],
+                y=df['carbon_intensity'],
+                name='Capacity-weighted',
+                customdata=df[['weight', 'count']].to_numpy(),
+                hovertemplate='%{x}<br>Weighted: %{y:.1f}<br>Capacity: %{customdata[0]:,.0f} bbl/d'
+                              '<br>Projects: %{customdata[1]}<extra></extra>'
+            ),
+            go.Scatter(
+                x=df['key'],
+                y=df['simple_average'],
+                mode='markers',
+                name='Unweighted average',
+                marker=dict(color='#dc3545', size=9, symbol='diamond'),
+                hovertemplate='%{x}<br>Unweighted: %{y:.1f}<extra></extra>'
+            )
+        ])
+        fig.update_layout(
+            title=f'Capacity-Weighted Carbon Intensity by {label}',
+            xaxis_title=label,
+            yaxis_title='Carbon Intensity',
+            height=500,
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            xaxis_tickangle=-45
+        )
         return fig
-
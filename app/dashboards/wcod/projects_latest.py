@@ -2,64 +2,97 @@
 Latest Updates View
 Latest upstream project updates
 """
-from dash import dcc, html, Input, Output, callback, dash_table
-import pandas as pd
-from app import db
-from app.models import UpstreamProject, Country
+from dash import dcc, html, Input, Output, State, callback, ctx, dash_table, no_update
+from app.services.change_feed import changes_since, latest_changes
+
+
+# Seconds between polls for projects updated since the table was loaded
+POLL_INTERVAL = 60
+
+LATEST_COLUMNS = [
+    {'name': 'Project', 'id': 'Project'},
+    {'name': 'Country', 'id': 'Country'},
+    {'name': 'Status', 'id': 'Status'},
+    {'name': 'Start Date', 'id': 'Start Date'},
+    {'name': 'Last Update', 'id': 'Last Update'},
+]
+
+
+def _row(record):
+    # 'id' keeps DataTable rows keyed by project so updates replace stale rows
+    return {
+        'id': record['id'],
+        'Project': record['name'],
+        'Country': record['country'] or 'N/A',
+        'Status': record['status'] or 'N/A',
+        'Start Date': record['start_date'] or 'N/A',
+        'Last Update': record['updated_at'][:19].replace('T', ' '),
+    }
 
 
 def create_layout():
     """Create the Latest Updates layout"""
     return html.Div([
         html.H3("Latest Updates", style={'marginBottom': '20px'}),
+        # Cursor after the last loaded row, and the feed head seen by the last poll
+        dcc.Store(id='projects-latest-next'),
+        dcc.Store(id='projects-latest-head'),
+        dcc.Interval(id='projects-latest-poll', interval=POLL_INTERVAL * 1000),
         dash_table.DataTable(
             id='projects-latest-table',
+            columns=LATEST_COLUMNS,
+            data=[],
             style_table={'overflowX': 'auto'},
             style_cell={'textAlign': 'left', 'padding': '10px'},
             style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}
-        )
+        ),
+        html.Div([
+            html.Button("Load more", id='projects-latest-more', n_clicks=0,
+                        className='btn btn-outline-primary')
+        ], id='projects-latest-more-container', style={'textAlign': 'center', 'marginTop': '15px'})
     ], className='tab-content')
 
 
 def register_callbacks(dash_app, server):
     """Register all callbacks for Latest Updates"""
-    
+
     @callback(
         [Output('projects-latest-table', 'data'),
-         Output('projects-latest-table', 'columns')],
-        Input('current-submenu', 'data')
+         Output('projects-latest-next', 'data'),
+         Output('projects-latest-head', 'data'),
+         Output('projects-latest-more-container', 'style')],
+        [Input('current-submenu', 'data'),
+         Input('projects-latest-more', 'n_clicks'),
+         Input('projects-latest-poll', 'n_intervals')],
+        [State('projects-latest-table', 'data'),
+         State('projects-latest-next', 'data'),
+         State('projects-latest-head', 'data')]
     )
-    def update_projects_latest(submenu):
-        """Update projects latest updates table"""
+    def update_projects_latest(submenu, n_clicks, n_intervals, rows, next_cursor, head):
+        """Load the newest updates, append older pages, and merge in new changes"""
         if submenu != 'projects-latest':
-            return [], []
-        
+            return [], None, None, no_update
+
+        rows = rows or []
+        more_style = {'textAlign': 'center', 'marginTop': '15px'}
+
         with server.app_context():
-            results = db.session.query(
-                UpstreamProject.name,
-                Country.name.label('country_name'),
-                UpstreamProject.status,
-                UpstreamProject.start_date,
-                UpstreamProject.update_date
-            ).join(Country).order_by(
-                UpstreamProject.update_date.desc()
-            ).limit(50).all()
-            
-            df = pd.DataFrame([
-                {
-                    'Project': r.name,
-                    'Country': r.country_name,
-                    'Status': r.status or 'N/A',
-                    'Start Date': r.start_date.isoformat() if r.start_date else 'N/A',
-                    'Last Update': r.update_date.isoformat() if r.update_date else 'N/A'
-                }
-                for r in results
-            ])
-        
-        if df.empty:
-            return [], []
-        
-        columns = [{'name': col, 'id': col} for col in df.columns]
-        data = df.to_dict('records')
-        return data, columns
+            if ctx.triggered_id == 'projects-latest-more' and next_cursor:
+                records, next_cursor = latest_changes(before=next_cursor)
+                rows = rows + [_row(r) for r in records]
+            elif ctx.triggered_id == 'projects-latest-poll' and head:
+                records, head, _ = changes_since(head)
+                if not records:
+                    return no_update, no_update, no_update, no_update
+                # A project updated again moves to the top; drop its older row
+                updated = [_row(r) for r in reversed(records)]
+                updated_ids = {row['id'] for row in updated}
+                rows = updated + [row for row in rows if row['id'] not in updated_ids]
+            else:
+                records, next_cursor = latest_changes()
+                _, head, _ = changes_since()
+                rows = [_row(r) for r in records]
 
+        if not next_cursor:
+            more_style = dict(more_style, display='none')
+        return rows, next_cursor, head, more_style
@@ -2,19 +2,41 @@
 Upstream Oil Projects Tracker View
 Comprehensive project tracking dashboard
 """
-from dash import dcc, html, Input, Output, callback, dash_table
+from dash import dcc, html, Input, Output, State, callback, ctx, dash_table, no_update
 import plotly.graph_objects as go
-import plotly.express as px
-import pandas as pd
 from app import db
-from app.models import UpstreamProject, Country
-from sqlalchemy import func
+from app.models import UpstreamProject, Country, Company
+from app.services.crossfilter import clean_filters, get_project_crossfilter, selection_colors, toggle_filter
+from app.services.paging import fetch_page
+from app.services.search import linked_entity
+
+
+PAGE_SIZE = 20
+
+# Table column id -> SQL expression used for server-side sorting and filtering
+TRACKER_COLUMNS = {
+    'project': UpstreamProject.name,
+    'country': Country.name,
+    'status': UpstreamProject.status,
+    'capacity': UpstreamProject.production_capacity_bbl,
+    'start_date': UpstreamProject.start_date,
+}
+
+# Cross-filter dimension -> SQL expression restricting the table to the same projects
+CROSSFILTER_COLUMNS = {
+    'country': Country.name,
+    'company': Company.name,
+    'status': UpstreamProject.status,
+    'project_type': UpstreamProject.project_type,
+}
 
 
 def create_layout():
     """Create the Projects Tracker layout"""
     return html.Div([
         html.H3("Upstream Oil Projects Tracker", style={'marginBottom': '20px'}),
+        # Keyset cursors for pages already visited with the current sort/filter
+        dcc.Store(id='projects-tracker-cursors'),
         html.Div([
             html.Div([
                 dcc.Graph(id='projects-tracker-chart')
@@ -23,10 +45,25 @@ def create_layout():
         html.Div([
             dash_table.DataTable(
                 id='projects-tracker-table',
+                columns=[
+                    {'name': 'Project', 'id': 'project'},
+                    {'name': 'Country', 'id': 'country'},
+                    {'name': 'Status', 'id': 'status'},
+                    {'name': 'Capacity (bbl/d)', 'id': 'capacity', 'type': 'numeric',
+                     'format': {'specifier': ',.0f'}},
+                    {'name': 'Start Date', 'id': 'start_date', 'type': 'datetime'},
+                ],
                 style_table={'overflowX': 'auto'},
                 style_cell={'textAlign': 'left', 'padding': '10px'},
                 style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'},
-                page_size=20
+                page_current=0,
+                page_size=PAGE_SIZE,
+                page_action='custom',
+                sort_action='custom',
+                sort_mode='multi',
+                sort_by=[],
+                filter_action='custom',
+                filter_query=''
             )
         ], style={'marginTop': '20px'})
     ], className='tab-content')
@@ -34,52 +71,21 @@ def create_layout():
 
 def register_callbacks(dash_app, server):
     """Register all callbacks for Projects Tracker"""
-    
+
     @callback(
-        [Output('projects-tracker-chart', 'figure'),
-         Output('projects-tracker-table', 'data'),
-         Output('projects-tracker-table', 'columns')],
-        Input('current-submenu', 'data')
+        Output('projects-tracker-chart', 'figure'),
+        [Input('current-submenu', 'data'),
+         Input('projects-crossfilter', 'data')]
     )
-    def update_projects_tracker(submenu):
-        """Update projects tracker chart and table"""
+    def update_projects_tracker(submenu, filters):
+        """Update projects tracker chart"""
         if submenu != 'projects-tracker':
-            return go.Figure(), [], []
-        
+            return go.Figure()
+
         with server.app_context():
             # Chart data - projects by country
-            chart_results = db.session.query(
-                Country.name,
-                func.count(UpstreamProject.id).label('project_count')
-            ).join(UpstreamProject).group_by(
-                Country.id, Country.name
-            ).order_by(func.count(UpstreamProject.id).desc()).limit(15).all()
-            
-            chart_df = pd.DataFrame([
-                {'Country': r.name, 'Projects': r.project_count}
-                for r in chart_results
-            ])
-            
-            # Table data - all projects
-            table_results = db.session.query(
-                UpstreamProject.name,
-                Country.name.label('country_name'),
-                UpstreamProject.status,
-                UpstreamProject.capacity_bbl_per_day,
-                UpstreamProject.start_date
-            ).join(Country).limit(100).all()
-            
-            table_df = pd.DataFrame([
-                {
-                    'Project': r.name,
-                    'Country': r.country_name,
-                    'Status': r.status or 'N/A',
-                    'Capacity (bbl/d)': r.capacity_bbl_per_day or 0,
-                    'Start Date': r.start_date.isoformat() if r.start_date else 'N/A'
-                }
-                for r in table_results
-            ])
-        
+            chart_df = get_project_crossfilter().counts('country', filters, limit=15)
+
         if chart_df.empty:
             fig = go.Figure()
             fig.add_annotation(
@@ -88,13 +94,106 @@ def register_callbacks(dash_app, server):
                 x=0.5, y=0.5, showarrow=False
             )
             fig.update_layout(height=400, plot_bgcolor='white', paper_bgcolor='white')
-            return fig, [], []
-        
-        fig = px.bar(chart_df, x='Country', y='Projects', title='Projects by Country')
-        fig.update_layout(height=400, plot_bgcolor='white', paper_bgcolor='white', xaxis_tickangle=-45)
-        
-        columns = [{'name': col, 'id': col} for col in table_df.columns] if not table_df.empty else []
-        data = table_df.to_dict('records') if not table_df.empty else []
-        
-        return fig, data, columns
+            return fig
+
+        fig = go.Figure(go.Bar(
+            x=chart_df['label'],
+            y=chart_df['projects'],
+            marker_color=selection_colors(chart_df['selected']),
+            hovertemplate='%{x}: %{y} projects<extra></extra>'
+        ))
+        fig.update_layout(
+            title='Projects by Country (click a bar to filter)',
+            xaxis_title='Country',
+            yaxis_title='Projects',
+            height=400,
+            plot_bgcolor='white',
+            paper_bgcolor='white',
+            xaxis_tickangle=-45
+        )
+        return fig
+
+    @callback(
+        Output('projects-crossfilter', 'data', allow_duplicate=True),
+        Input('projects-tracker-chart', 'clickData'),
+        State('projects-crossfilter', 'data'),
+        prevent_initial_call=True
+    )
+    def filter_tracker_by_country(click_data, filters):
+        """Toggle the clicked country in the shared project filters"""
+        if not click_data:
+            return no_update
+        return toggle_filter(filters, 'country', click_data['points'][0]['x'])
+
+    @callback(
+        Output('projects-tracker-table', 'filter_query'),
+        Input('url', 'search')
+    )
+    def filter_linked_project(search):
+        """Narrow the table to the project named in a search result link"""
+        project_id = linked_entity(search, 'project')
+        if project_id is None:
+            return no_update
+        with server.app_context():
+            name = db.session.query(UpstreamProject.name).filter(UpstreamProject.id == project_id).scalar()
+        if name is None:
+            return no_update
+        # Filter operands cannot escape quotes; pick one the name does not contain
+        quote = next((q for q in '"\'`' if q not in name), '"')
+        return f'{{project}} = {quote}{name}{quote}'
+
+    @callback(
+        [Output('projects-tracker-table', 'data'),
+         Output('projects-tracker-table', 'page_count'),
+         Output('projects-tracker-table', 'page_current'),
+         Output('projects-tracker-cursors', 'data')],
+        [Input('current-submenu', 'data'),
+         Input('projects-tracker-table', 'page_current'),
+         Input('projects-tracker-table', 'page_size'),
+         Input('projects-tracker-table', 'sort_by'),
+         Input('projects-tracker-table', 'filter_query'),
+         Input('projects-crossfilter', 'data')],
+        State('projects-tracker-cursors', 'data')
+    )
+    def update_projects_tracker_table(submenu, page_current, page_size, sort_by, filter_query, filters, cursors):
+        """Query only the visible page of the projects table"""
+        if submenu != 'projects-tracker':
+            return [], 1, 0, None
+        # Cursors point into the previous result set
+        if ctx.triggered_id == 'projects-crossfilter':
+            cursors = None
+        # A new filter, sort or cross-filter starts again from the first page
+        if 'projects-tracker-table.page_current' not in ctx.triggered_prop_ids:
+            page_current = 0
+
+        with server.app_context():
+            query = db.session.query(
+                UpstreamProject.name,
+                Country.name.label('country_name'),
+                UpstreamProject.status,
+                UpstreamProject.production_capacity_bbl,
+                UpstreamProject.start_date
+            ).join(Country, UpstreamProject.country_id == Country.id).outerjoin(
+                Company, UpstreamProject.company_id == Company.id
+            )
+            for dimension, values in clean_filters(filters).items():
+                query = query.filter(CROSSFILTER_COLUMNS[dimension].in_(values))
+
+            rows, page_count, cursors = fetch_page(
+                query, TRACKER_COLUMNS, UpstreamProject.id,
+                sort_by=sort_by, filter_query=filter_query,
+                page_current=page_current, page_size=page_size or PAGE_SIZE,
+                cursors=cursors
+            )
 
+        data = [
+            {
+                'project': r.name,
+                'country': r.country_name,
+                'status': r.status or 'N/A',
+                'capacity': r.production_capacity_bbl or 0,
+                'start_date': r.start_date.isoformat() if r.start_date else 'N/A'
+            }
+            for r in rows
+        ]
+        return data, page_count, page_current, cursors
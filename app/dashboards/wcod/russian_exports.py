@@ -4,10 +4,49 @@ Detailed Russian exports data
 """
 from dash import dcc, html, Input, Output, callback, dash_table
 import plotly.graph_objects as go
-import pandas as pd
-from app import db
-from app.models import Country, Exports
-from sqlalchemy import func
+from app.services.cargo_cube import (
+    CARGO_DIMENSIONS, OTHER_SERIES, cargo_breakdown, cargo_series, cube_months, terminal_company_matrix
+)
+from app.services.reference import get_reference_data
+
+
+PERIODS = {
+    '12m': 'Last 12 Months',
+    'ytd': 'Year to Date',
+    'all': 'All History',
+}
+
+# Breakdown values drawn as their own series; the rest are stacked as Other
+SERIES_LIMIT = 8
+
+MATRIX_COLUMNS = [
+    {'name': 'Terminal', 'id': 'terminal'},
+    {'name': 'Exporting Company', 'id': 'company'},
+    {'name': 'Cargoes', 'id': 'cargoes', 'type': 'numeric'},
+    {'name': 'Volume (bbl)', 'id': 'volume_bbl', 'type': 'numeric', 'format': {'specifier': ',.0f'}},
+    {'name': 'Share (%)', 'id': 'share', 'type': 'numeric', 'format': {'specifier': '.1f'}},
+]
+
+
+def _empty_figure(message):
+    fig = go.Figure()
+    fig.add_annotation(
+        text=message,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False
+    )
+    fig.update_layout(height=400, plot_bgcolor='white', paper_bgcolor='white')
+    return fig
+
+
+def _period_start(period, first, last):
+    """First month of a PERIODS key ending at ``last``"""
+    if period == 'ytd':
+        return last.replace(month=1)
+    if period == '12m':
+        months = last.year * 12 + last.month - 12
+        return max(first, last.replace(year=months // 12, month=months % 12 + 1))
+    return first
 
 
 def create_layout():
@@ -15,11 +54,38 @@ def create_layout():
     return html.Div([
         html.H3("Russian Exports by Terminal and Exporting Company", style={'marginBottom': '20px'}),
         html.Div([
-            dcc.Graph(id='russian-exports-chart')
-        ]),
+            html.Div([
+                html.Label("Period:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(
+                    id='russian-exports-period',
+                    options=[{'label': label, 'value': key} for key, label in PERIODS.items()],
+                    value='12m',
+                    clearable=False
+                )
+            ], className='col-md-3'),
+            html.Div([
+                html.Label("Break down by:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(
+                    id='russian-exports-dimension',
+                    options=[{'label': label, 'value': key} for key, label in CARGO_DIMENSIONS.items()],
+                    value='terminal_id',
+                    clearable=False
+                )
+            ], className='col-md-3'),
+        ], className='row', style={'marginBottom': '15px'}),
+        html.Div([
+            html.Div([dcc.Graph(id='russian-exports-chart')], className='col-md-8'),
+            html.Div([dcc.Graph(id='russian-exports-ranking')], className='col-md-4'),
+        ], className='row'),
+        html.H4("Terminal and Exporting Company", style={'marginTop': '30px', 'marginBottom': '15px'}),
         html.Div([
             dash_table.DataTable(
                 id='russian-exports-table',
+                columns=MATRIX_COLUMNS,
+                data=[],
+                page_size=20,
+                sort_action='native',
+                filter_action='native',
                 style_table={'overflowX': 'auto'},
                 style_cell={'textAlign': 'left', 'padding': '10px'},
                 style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}
@@ -30,60 +96,78 @@ def create_layout():
 
 def register_callbacks(dash_app, server):
     """Register all callbacks for Russian Exports"""
-    
+
     @callback(
         [Output('russian-exports-chart', 'figure'),
-         Output('russian-exports-table', 'data'),
-         Output('russian-exports-table', 'columns')],
-        Input('current-submenu', 'data')
+         Output('russian-exports-ranking', 'figure'),
+         Output('russian-exports-table', 'data')],
+        [Input('current-submenu', 'data'),
+         Input('russian-exports-period', 'value'),
+         Input('russian-exports-dimension', 'value')]
     )
-    def update_russian_exports(submenu):
-        """Update Russian exports chart and table"""
+    def update_russian_exports(submenu, period, dimension):
+        """Update Russian export series, ranking and terminal/company table from the monthly cube"""
         if submenu != 'russian-exports':
-            return go.Figure(), [], []
-        
+            return go.Figure(), go.Figure(), []
+
+        dimension = dimension or 'terminal_id'
         with server.app_context():
-            russia = Country.query.filter_by(code='RUS').first()
+            russia = get_reference_data().country_by_code('RUS')
             if not russia:
-                fig = go.Figure()
-                fig.add_annotation(
-                    text="Russia not found in database. Please seed country data.",
-                    xref="paper", yref="paper",
-                    x=0.5, y=0.5, showarrow=False
-                )
-                fig.update_layout(height=400, plot_bgcolor='white', paper_bgcolor='white')
-                return fig, [], []
-            
-            latest_date = db.session.query(func.max(Exports.date)).scalar()
-            if not latest_date:
-                return go.Figure(), [], []
-            
-            results = db.session.query(
-                func.sum(Exports.exports_bbl).label('total_exports')
-            ).filter(
-                Exports.country_id == russia.id,
-                Exports.date == latest_date
-            ).scalar() or 0
-        
+                fig = _empty_figure("Russia not found in database. Please seed country data.")
+                return fig, go.Figure(), []
+
+            first, last = cube_months(russia.id)
+            if not last:
+                fig = _empty_figure("No cargo data available. Please seed Terminal and ExportCargo data.")
+                return fig, go.Figure(), []
+
+            start = _period_start(period or '12m', first, last)
+            ranking = cargo_breakdown(russia.id, dimension, start, last)
+            series = cargo_series(russia.id, dimension, list(ranking['key'][:SERIES_LIMIT]), start, last)
+            matrix = terminal_company_matrix(russia.id, start, last)
+
+        label = CARGO_DIMENSIONS[dimension]
+        # Series are keyed by id; labels are only used to name the traces
+        names = dict(zip(ranking['key'], ranking['label']))
         fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=['Russia'],
-            y=[results],
-            name='Total Exports',
-            marker_color='#e74c3c'
-        ))
+        for position, key in enumerate(series.columns):
+            name = 'Other' if key == OTHER_SERIES else names[key]
+            fig.add_trace(go.Bar(
+                x=series.index,
+                y=series.iloc[:, position],
+                name=name,
+                hovertemplate=f'{name}<br>%{{x|%b %Y}}: %{{y:,.0f}} bbl<extra></extra>'
+            ))
         fig.update_layout(
-            title='Russian Exports (Latest Period)',
-            height=400,
+            title=f'Monthly Russian Exports by {label}',
+            barmode='stack',
+            xaxis_title='Loading Month',
+            yaxis_title='Exports (bbl)',
+            height=450,
+            plot_bgcolor='white',
+            paper_bgcolor='white'
+        )
+
+        top = ranking.head(20).iloc[::-1]
+        ranking_fig = go.Figure(go.Bar(
+            x=top['volume_bbl'],
+            y=top['label'],
+            orientation='h',
+            customdata=top['cargoes'],
+            marker_color='#e74c3c',
+            hovertemplate='%{y}<br>%{x:,.0f} bbl in %{customdata} cargoes<extra></extra>'
+        ))
+        ranking_fig.update_layout(
+            title=f'{label} Ranking',
+            xaxis_title='Exports (bbl)',
+            height=450,
             plot_bgcolor='white',
             paper_bgcolor='white',
-            yaxis_title='Exports (bbl)'
+            margin={'l': 150}
         )
-        
-        table_data = [{'Country': 'Russia', 'Exports (bbl)': results, 'Date': latest_date.isoformat() if latest_date else 'N/A'}]
-        columns = [{'name': 'Country', 'id': 'Country'}, 
-                  {'name': 'Exports (bbl)', 'id': 'Exports (bbl)'},
-                  {'name': 'Date', 'id': 'Date'}]
-        
-        return fig, table_data, columns
 
+        total = matrix['volume_bbl'].sum()
+        matrix['share'] = matrix['volume_bbl'] / total * 100 if total else 0
+        table_data = matrix[['terminal', 'company', 'cargoes', 'volume_bbl', 'share']].to_dict('records')
+        return fig, ranking_fig, table_data
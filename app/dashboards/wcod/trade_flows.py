@@ -0,0 +1,172 @@
+"""
+Trade Flows View
+Origin-destination crude flows between countries or regions
+"""
+from dash import dcc, html, dash_table, Input, Output, callback
+import plotly.graph_objects as go
+import pandas as pd
+from app.services.datastore import get_store
+from app.services.trade_flows import get_flow_matrix, period_label
+
+
+def create_layout():
+    """Create the Trade Flows layout"""
+    return html.Div([
+        html.H3("Trade Flows", style={'marginBottom': '20px'}),
+        html.Div([
+            html.Div([
+                html.Label("Reported By:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.RadioItems(
+                    id='trade-flows-basis',
+                    options=[
+                        {'label': ' Exporter', 'value': 'exports'},
+                        {'label': ' Importer', 'value': 'imports'},
+                    ],
+                    value='exports',
+                    inline=True,
+                    inputStyle={'marginRight': '4px', 'marginLeft': '12px'}
+                )
+            ], className='col-md-3'),
+            html.Div([
+                html.Label("Period:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(
+                    id='trade-flows-period',
+                    options=[
+                        {'label': 'Latest Month', 'value': 'latest'},
+                        {'label': 'Last 12 Months', 'value': '12m'},
+                        {'label': 'All Time', 'value': 'all'},
+                    ],
+                    value='12m',
+                    clearable=False
+                )
+            ], className='col-md-3'),
+            html.Div([
+                html.Label("Group By:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(
+                    id='trade-flows-grouping',
+                    options=[
+                        {'label': 'Country', 'value': 'country'},
+                        {'label': 'Region', 'value': 'region'},
+                    ],
+                    value='country',
+                    clearable=False
+                )
+            ], className='col-md-3'),
+            html.Div([
+                html.Label("Top Flows:", style={'fontWeight': '500', 'marginBottom': '8px'}),
+                dcc.Dropdown(
+                    id='trade-flows-top',
+                    options=[{'label': str(n), 'value': n} for n in (10, 25, 50, 100)],
+                    value=25,
+                    clearable=False
+                )
+            ], className='col-md-3'),
+        ], className='row', style={'marginBottom': '20px'}),
+        dcc.Graph(id='trade-flows-sankey'),
+        dash_table.DataTable(
+            id='trade-flows-table',
+            columns=[
+                {'name': 'Origin', 'id': 'Origin'},
+                {'name': 'Destination', 'id': 'Destination'},
+                {'name': 'Volume (bbl)', 'id': 'Volume', 'type': 'numeric', 'format': {'specifier': ',.0f'}},
+                {'name': 'Share (%)', 'id': 'Share', 'type': 'numeric', 'format': {'specifier': '.1f'}},
+            ],
+            page_size=15,
+            sort_action='native',
+            style_cell={'textAlign': 'left', 'padding': '8px'},
+            style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}
+        )
+    ], className='tab-content')
+
+
+def _empty_figure(message):
+    fig = go.Figure()
+    fig.add_annotation(
+        text=message,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False,
+        font=dict(size=16, color="#7f8c8d")
+    )
+    fig.update_layout(height=600, plot_bgcolor='white', paper_bgcolor='white')
+    return fig
+
+
+def register_callbacks(dash_app, server):
+    """Register all callbacks for Trade Flows"""
+
+    @callback(
+        [Output('trade-flows-sankey', 'figure'),
+         Output('trade-flows-table', 'data')],
+        [Input('current-submenu', 'data'),
+         Input('trade-flows-basis', 'value'),
+         Input('trade-flows-period', 'value'),
+         Input('trade-flows-grouping', 'value'),
+         Input('trade-flows-top', 'value')]
+    )
+    def update_trade_flows(submenu, basis, period, grouping, top_n):
+        """Update trade flow Sankey and top-flows table"""
+        if submenu != 'trade-flows':
+            return go.Figure(), []
+
+        with server.app_context():
+            matrix = get_flow_matrix(basis)
+            countries = get_store().countries
+
+        if not len(matrix):
+            return _empty_figure("No origin-destination data available"), []
+
+        last_period = int(matrix.period[-1])
+        start_period = {'latest': last_period, '12m': last_period - 11}.get(period)
+
+        if grouping == 'region':
+            groups = countries['region'].fillna('Unknown').to_dict()
+            flows = matrix.flows(start_period, last_period, groups=groups)
+        else:
+            flows = matrix.flows(start_period, last_period)
+            names = countries['name']
+            flows['origin'] = flows['origin'].map(names).fillna('Unknown')
+            flows['destination'] = flows['destination'].map(names).fillna('Unknown')
+
+        if flows.empty:
+            return _empty_figure("No origin-destination data available"), []
+
+        total = flows['volume'].sum()
+        flows = flows.head(top_n)
+
+        # Origins and destinations are separate nodes so intra-block flows don't loop
+        origins = pd.Index(flows['origin'].unique())
+        destinations = pd.Index(flows['destination'].unique())
+        fig = go.Figure(go.Sankey(
+            arrangement='snap',
+            node=dict(
+                label=list(origins) + list(destinations),
+                color=['#3498db'] * len(origins) + ['#27ae60'] * len(destinations),
+                pad=12,
+                thickness=16
+            ),
+            link=dict(
+                source=origins.get_indexer(flows['origin']),
+                target=destinations.get_indexer(flows['destination']) + len(origins),
+                value=flows['volume'],
+                color='rgba(52, 152, 219, 0.3)',
+                hovertemplate='%{source.label} → %{target.label}<br>%{value:,.0f} bbl<extra></extra>'
+            )
+        ))
+
+        first_period = int(matrix.period[0]) if start_period is None else start_period
+        window = period_label(last_period) if first_period == last_period \
+            else f"{period_label(first_period)} to {period_label(last_period)}"
+        fig.update_layout(
+            title=f"Top {len(flows)} Crude Flows ({window})",
+            height=600,
+            plot_bgcolor='white',
+            paper_bgcolor='white'
+        )
+
+        table = pd.DataFrame({
+            'Origin': flows['origin'],
+            'Destination': flows['destination'],
+            'Volume': flows['volume'],
+            'Share': flows['volume'] / total * 100 if total else 0.0
+        })
+        return fig, table.to_dict('records')
@@ -17,6 +17,8 @@ from app.models import (
 from app import db
 from sqlalchemy import func, extract, and_, or_
 from datetime import datetime, timedelta
+from app.services.crossfilter import CROSSFILTER_DIMENSIONS, clean_filters
+from app.services.search import ENTITY_URLS, linked_entity
 
 # Import individual submenu modules
 from app.dashboards.wcod import (
@@ -30,6 +32,7 @@ from app.dashboards.wcod import (
     imports_detail,
     imports_comparison,
     global_exports,
+    trade_flows,
     russian_exports,
     global_prices,
     price_scorecard,
@@ -43,6 +46,9 @@ from app.dashboards.wcod import (
     projects_carbon
 )
 
+# Views whose charts read and write the shared project filters
+CROSSFILTERED_SUBMENUS = ('projects-country', 'projects-company', 'projects-status', 'projects-tracker')
+
 
 def create_wcod_dashboard(server, url_base_pathname):
     """Create comprehensive WCoD dashboard with tab navigation"""
@@ -273,6 +279,12 @@ def create_wcod_dashboard(server, url_base_pathname):
         # Main Content Area
         html.Div([
             html.Div([
+                # Active project cross-filters, shown on the views they apply to
+                html.Div([
+                    html.Span(id='projects-crossfilter-summary', style={'marginRight': '15px'}),
+                    html.Button("Clear filters", id='projects-crossfilter-clear', n_clicks=0,
+                                className='btn btn-sm btn-outline-secondary')
+                ], id='projects-crossfilter-bar', style={'display': 'none'}),
                 html.Div(id='tab-content', style={'background': 'white', 'minHeight': '600px'})
             ], className='col-md-12', style={'padding': '24px', 'background': '#f8f9fa'})
         ], className='row', style={'margin': '0', 'background': 'white'}),
@@ -280,6 +292,9 @@ def create_wcod_dashboard(server, url_base_pathname):
         # Store for current sub-menu selection
         dcc.Store(id='current-submenu', data='country-overview'),
         
+        # Project filters shared by the cross-filtered project views
+        dcc.Store(id='projects-crossfilter', data={}),
+        
         # Footer
         html.Footer([
             html.Div([
@@ -312,10 +327,11 @@ def create_wcod_dashboard(server, url_base_pathname):
     @callback(
         [Output('main-tabs', 'value'),
          Output('current-submenu', 'data', allow_duplicate=True)],
-        Input('url', 'pathname'),
+        [Input('url', 'pathname'),
+         Input('url', 'search')],
         prevent_initial_call='initial_duplicate'
     )
-    def update_from_url(pathname):
+    def update_from_url(pathname, search):
         """Update tabs and submenu based on URL"""
         # Normalize pathname
         if not pathname:
@@ -339,6 +355,7 @@ def create_wcod_dashboard(server, url_base_pathname):
             '/wcod/trade/imports-country-detail': ('trade-tab', 'imports-detail'),
             '/wcod/trade/imports-country-comparison': ('trade-tab', 'imports-comparison'),
             '/wcod/trade/global-exports': ('trade-tab', 'global-exports'),
+            '/wcod/trade/trade-flows': ('trade-tab', 'trade-flows'),
             '/wcod/trade/russian-exports-by-terminal-and-exporting-company': ('trade-tab', 'russian-exports'),
             # Prices tab
             '/wcod/prices/global-crude-prices': ('prices-tab', 'global-prices'),
@@ -355,6 +372,11 @@ def create_wcod_dashboard(server, url_base_pathname):
             '/wcod-carbon-intensity-methodology': ('methodology-tab', 'projects-carbon'),
         }
         
+        # Search result links open the view of the entity they name
+        for entity_type, url in ENTITY_URLS.items():
+            if linked_entity(search, entity_type) is not None:
+                return url_mapping[url.split('?')[0]]
+
         tab, submenu = url_mapping.get(pathname, ('country-tab', 'country-overview'))
         return tab, submenu
     
@@ -427,6 +449,7 @@ def create_wcod_dashboard(server, url_base_pathname):
                 {'label': 'Imports - Country Detail', 'value': 'imports-detail'},
                 {'label': 'Imports - Country Comparison', 'value': 'imports-comparison'},
                 {'label': 'Global Exports', 'value': 'global-exports'},
+                {'label': 'Trade Flows', 'value': 'trade-flows'},
                 {'label': 'Russian Exports by Terminal and Exporting Company', 'value': 'russian-exports'},
             ],
             'prices-tab': [
@@ -467,6 +490,7 @@ def create_wcod_dashboard(server, url_base_pathname):
                 '/wcod/trade/imports-country-detail': 'imports-detail',
                 '/wcod/trade/imports-country-comparison': 'imports-comparison',
                 '/wcod/trade/global-exports': 'global-exports',
+                '/wcod/trade/trade-flows': 'trade-flows',
                 '/wcod/trade/russian-exports-by-terminal-and-exporting-company': 'russian-exports',
                 '/wcod/prices/global-crude-prices': 'global-prices',
                 '/wcod/prices/price-scorecard-for-key-world-oil-grades': 'price-scorecard',
@@ -506,6 +530,7 @@ def create_wcod_dashboard(server, url_base_pathname):
             'imports-detail': '/wcod/trade/imports-country-detail',
             'imports-comparison': '/wcod/trade/imports-country-comparison',
             'global-exports': '/wcod/trade/global-exports',
+            'trade-flows': '/wcod/trade/trade-flows',
             'russian-exports': '/wcod/trade/russian-exports-by-terminal-and-exporting-company',
             'global-prices': '/wcod/prices/global-crude-prices',
             'price-scorecard': '/wcod/prices/price-scorecard-for-key-world-oil-grades',
@@ -531,6 +556,7 @@ def create_wcod_dashboard(server, url_base_pathname):
             'imports-detail': '📥',
             'imports-comparison': '📊',
             'global-exports': '🌍',
+            'trade-flows': '🔀',
             'russian-exports': '🇷🇺',
             'global-prices': '💰',
             'price-scorecard': '📈',
@@ -605,6 +631,8 @@ def create_wcod_dashboard(server, url_base_pathname):
                 return render_imports_comparison()
             elif submenu == 'global-exports':
                 return render_global_exports()
+            elif submenu == 'trade-flows':
+                return render_trade_flows()
             elif submenu == 'russian-exports':
                 return render_russian_exports()
         elif main_tab == 'prices-tab':
@@ -666,6 +694,7 @@ def create_wcod_dashboard(server, url_base_pathname):
                     {'label': 'Imports - Country Detail', 'value': 'imports-detail'},
                     {'label': 'Imports - Country Comparison', 'value': 'imports-comparison'},
                     {'label': 'Global Exports', 'value': 'global-exports'},
+                    {'label': 'Trade Flows', 'value': 'trade-flows'},
                     {'label': 'Russian Exports by Terminal and Exporting Company', 'value': 'russian-exports'},
                 ],
                 'prices-tab': [
@@ -698,6 +727,7 @@ def create_wcod_dashboard(server, url_base_pathname):
                 'imports-detail': '/wcod/trade/imports-country-detail',
                 'imports-comparison': '/wcod/trade/imports-country-comparison',
                 'global-exports': '/wcod/trade/global-exports',
+                'trade-flows': '/wcod/trade/trade-flows',
                 'russian-exports': '/wcod/trade/russian-exports-by-terminal-and-exporting-company',
                 'global-prices': '/wcod/prices/global-crude-prices',
                 'price-scorecard': '/wcod/prices/price-scorecard-for-key-world-oil-grades',
@@ -723,6 +753,7 @@ def create_wcod_dashboard(server, url_base_pathname):
                 'imports-detail': '📥',
                 'imports-comparison': '📊',
                 'global-exports': '🌍',
+                'trade-flows': '🔀',
                 'russian-exports': '🇷🇺',
                 'global-prices': '💰',
                 'price-scorecard': '📈',
@@ -763,6 +794,40 @@ def create_wcod_dashboard(server, url_base_pathname):
             return selected_value, submenu_html
         return dash.no_update, dash.no_update
     
+    @callback(
+        [Output('projects-crossfilter-bar', 'style'),
+         Output('projects-crossfilter-summary', 'children')],
+        [Input('projects-crossfilter', 'data'),
+         Input('current-submenu', 'data')]
+    )
+    def update_projects_crossfilter_bar(filters, submenu):
+        """Show the active project filters above the views they apply to"""
+        filters = clean_filters(filters)
+        if not filters or submenu not in CROSSFILTERED_SUBMENUS:
+            return {'display': 'none'}, ''
+        summary = '; '.join(
+            f"{CROSSFILTER_DIMENSIONS[dimension]}: {', '.join(values)}"
+            for dimension, values in filters.items()
+        )
+        return {
+            'display': 'flex',
+            'alignItems': 'center',
+            'padding': '10px 15px',
+            'marginBottom': '15px',
+            'background': '#e7f1ff',
+            'border': '1px solid #b8d4f5',
+            'borderRadius': '8px'
+        }, f"Filtered by {summary}"
+    
+    @callback(
+        Output('projects-crossfilter', 'data', allow_duplicate=True),
+        Input('projects-crossfilter-clear', 'n_clicks'),
+        prevent_initial_call=True
+    )
+    def clear_projects_crossfilter(n_clicks):
+        """Remove every project filter"""
+        return {}
+    
     # Render functions for each view - now using individual modules
     def render_country_overview():
         """Country Overview view - matching Energy Intelligence design"""
@@ -804,6 +869,10 @@ def create_wcod_dashboard(server, url_base_pathname):
         """Global Exports view"""
         return global_exports.create_layout()
     
+    def render_trade_flows():
+        """Trade Flows view"""
+        return trade_flows.create_layout()
+    
     def render_russian_exports():
         """Russian Exports by Terminal view"""
         return russian_exports.create_layout()
@@ -826,7 +895,7 @@ def create_wcod_dashboard(server, url_base_pathname):
     
     def render_projects_by_company():
         """Projects by Company view"""
-        return projects_by_company.create_layout()
+        return projects_by_company.create_layout(server)
     
     def render_projects_by_time():
         """Projects by Time view"""
@@ -885,6 +954,7 @@ def create_wcod_dashboard(server, url_base_pathname):
     imports_detail.register_callbacks(dash_app, server)
     imports_comparison.register_callbacks(dash_app, server)
     global_exports.register_callbacks(dash_app, server)
+    trade_flows.register_callbacks(dash_app, server)
     russian_exports.register_callbacks(dash_app, server)
     global_prices.register_callbacks(dash_app, server)
     price_scorecard.register_callbacks(dash_app, server)
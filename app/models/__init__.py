@@ -10,9 +10,13 @@ from app.models.crude import Crude
 from app.models.crude_price import CrudePrice
 from app.models.upstream_project import UpstreamProject
 from app.models.company import Company
+from app.models.company_portfolio import CompanyPortfolio
+from app.models.terminal import Terminal
+from app.models.export_cargo import ExportCargo, ExportCargoMonthly
 
 __all__ = [
     'Country', 'Production', 'Exports', 'Reserves', 'Imports',
-    'Crude', 'CrudePrice', 'UpstreamProject', 'Company'
+    'Crude', 'CrudePrice', 'UpstreamProject', 'Company', 'CompanyPortfolio',
+    'Terminal', 'ExportCargo', 'ExportCargoMonthly'
 ]
 
@@ -0,0 +1,46 @@
+"""
+Company Portfolio model for precomputed per-company project rollups
+"""
+from app import db
+from sqlalchemy import Column, Integer, ForeignKey, String, Float, DateTime, Index
+from datetime import datetime
+
+
+class CompanyPortfolio(db.Model):
+    """Upstream project totals per company and status, rebuilt from upstream_projects"""
+    __tablename__ = 'company_portfolios'
+    
+    id = Column(Integer, primary_key=True)
+    company_id = Column(Integer, ForeignKey('companies.id'), nullable=False)
+    status = Column(String(50), nullable=False)  # Project status, or 'All' for the company total
+    project_count = Column(Integer, nullable=False, default=0)
+    capacity_bbl = Column(Float, nullable=False, default=0)  # Production capacity in bbl/day
+    investment_usd = Column(Float, nullable=False, default=0)
+    carbon_intensity = Column(Float, nullable=True)  # Capacity-weighted carbon intensity
+    country_count = Column(Integer, nullable=False, default=0)
+    source_version = Column(String(255), nullable=False)  # Project/company data version the row was built from
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    company = db.relationship('Company', backref=db.backref('portfolios', lazy='dynamic'))
+    
+    # Composite indexes for rankings within a status and per-company lookups
+    __table_args__ = (
+        Index('idx_portfolio_company_status', 'company_id', 'status', unique=True),
+        Index('idx_portfolio_status_capacity', 'status', 'capacity_bbl'),
+    )
+    
+    def __repr__(self):
+        return f'<CompanyPortfolio {self.company_id} {self.status}: {self.capacity_bbl} bbl/d>'
+    
+    def to_dict(self):
+        return {
+            'company_id': self.company_id,
+            'status': self.status,
+            'project_count': self.project_count,
+            'capacity_bbl': self.capacity_bbl,
+            'investment_usd': self.investment_usd,
+            'carbon_intensity': self.carbon_intensity,
+            'country_count': self.country_count
+        }
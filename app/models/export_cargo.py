@@ -0,0 +1,76 @@
+"""
+Export Cargo models for cargo-level crude exports and their monthly cube
+"""
+from app import db
+from sqlalchemy import Column, Integer, ForeignKey, Float, Date, DateTime, Index
+from datetime import datetime
+
+
+class ExportCargo(db.Model):
+    """Individual crude export cargoes by terminal, exporting company and destination"""
+    __tablename__ = 'export_cargoes'
+    
+    id = Column(Integer, primary_key=True)
+    terminal_id = Column(Integer, ForeignKey('terminals.id'), nullable=False)
+    company_id = Column(Integer, ForeignKey('companies.id'), nullable=True)  # Exporting company
+    destination_country_id = Column(Integer, ForeignKey('countries.id'), nullable=True)
+    crude_id = Column(Integer, ForeignKey('crudes.id'), nullable=True)
+    loading_date = Column(Date, nullable=False)
+    volume_bbl = Column(Float, nullable=False)  # Cargo size in barrels
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    terminal = db.relationship('Terminal', backref=db.backref('cargoes', lazy='dynamic'))
+    company = db.relationship('Company', backref=db.backref('export_cargoes', lazy='dynamic'))
+    destination_country = db.relationship('Country', backref=db.backref('cargoes_received', lazy='dynamic'))
+    
+    # Composite indexes for efficient queries
+    __table_args__ = (
+        Index('idx_cargo_loading_date', 'loading_date'),
+        Index('idx_cargo_terminal_date', 'terminal_id', 'loading_date'),
+        Index('idx_cargo_company_date', 'company_id', 'loading_date'),
+        Index('idx_cargo_destination_date', 'destination_country_id', 'loading_date'),
+        Index('idx_cargo_updated_at', 'updated_at'),
+    )
+    
+    def __repr__(self):
+        return f'<ExportCargo {self.terminal_id} {self.loading_date}: {self.volume_bbl} bbl>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'terminal_id': self.terminal_id,
+            'company_id': self.company_id,
+            'destination_country_id': self.destination_country_id,
+            'crude_id': self.crude_id,
+            'loading_date': self.loading_date.isoformat() if self.loading_date else None,
+            'volume_bbl': self.volume_bbl
+        }
+
+
+class ExportCargoMonthly(db.Model):
+    """Cargo volumes pre-aggregated by month, origin country, terminal, company and destination"""
+    __tablename__ = 'export_cargo_monthly'
+    
+    id = Column(Integer, primary_key=True)
+    month = Column(Date, nullable=False)  # First day of the loading month
+    country_id = Column(Integer, ForeignKey('countries.id'), nullable=False)  # Terminal country
+    terminal_id = Column(Integer, ForeignKey('terminals.id'), nullable=False)
+    company_id = Column(Integer, ForeignKey('companies.id'), nullable=True)
+    destination_country_id = Column(Integer, ForeignKey('countries.id'), nullable=True)
+    cargo_count = Column(Integer, nullable=False)
+    volume_bbl = Column(Float, nullable=False)
+    source_updated_at = Column(DateTime, nullable=True)  # Latest cargo update included when the month was built
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Composite indexes for per-country breakdowns and time series
+    __table_args__ = (
+        Index('idx_cargo_monthly_country_month', 'country_id', 'month'),
+        Index('idx_cargo_monthly_terminal_month', 'terminal_id', 'month'),
+        Index('idx_cargo_monthly_company_month', 'company_id', 'month'),
+    )
+    
+    def __repr__(self):
+        return f'<ExportCargoMonthly {self.month} {self.terminal_id}: {self.volume_bbl} bbl>'
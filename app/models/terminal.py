@@ -0,0 +1,32 @@
+"""
+Terminal model for crude oil export terminals
+"""
+from app import db
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from datetime import datetime
+
+
+class Terminal(db.Model):
+    """Crude oil loading terminals"""
+    __tablename__ = 'terminals'
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False, index=True)
+    country_id = Column(Integer, ForeignKey('countries.id'), nullable=False, index=True)
+    basin = Column(String(50), nullable=True)  # e.g., Baltic, Black Sea, Pacific, Arctic
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    country = db.relationship('Country', backref=db.backref('terminals', lazy='dynamic'))
+    
+    def __repr__(self):
+        return f'<Terminal {self.name}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'country_id': self.country_id,
+            'basin': self.basin
+        }
@@ -44,6 +44,9 @@ class UpstreamProject(db.Model):
     __table_args__ = (
         Index('idx_project_country_status', 'country_id', 'status'),
         Index('idx_project_company', 'company_id'),
+        Index('idx_project_start_date', 'start_date'),
+        Index('idx_project_capacity', 'production_capacity_bbl'),
+        Index('idx_project_updated_at', 'updated_at', 'id'),
     )
     
     def __repr__(self):
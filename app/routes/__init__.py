@@ -5,5 +5,5 @@ from flask import Blueprint
 
 main_bp = Blueprint('main', __name__)
 
-from app.routes import views
+from app.routes import views, downloads
 
@@ -0,0 +1,105 @@
+"""
+Bulk CSV download routes
+Streams fact tables through server-side cursors so large extracts run in constant memory
+"""
+import csv
+import io
+from datetime import date
+from flask import Response, jsonify, request, stream_with_context
+from app.routes import main_bp
+from app import db
+from app.models import Country, Production, Exports, Imports, Reserves, Crude, CrudePrice
+
+
+# Rows fetched per server-side cursor round-trip
+EXPORT_BATCH_SIZE = 5000
+
+# Dataset name -> (model, entity carrying country_id, metric columns)
+EXPORT_DATASETS = {
+    'production': (Production, Production, ['production_bbl', 'production_mt']),
+    'exports': (Exports, Exports, ['exports_bbl', 'exports_mt', 'destination_country_id']),
+    'imports': (Imports, Imports, ['imports_bbl', 'imports_mt', 'source_country_id']),
+    'reserves': (Reserves, Reserves, ['reserves_bbl', 'reserves_mt', 'proven_reserves_bbl']),
+    'crude-prices': (CrudePrice, Crude, ['price_usd_bbl', 'price_type', 'benchmark', 'gross_product_worth', 'margin']),
+}
+
+
+def _parse_date(value, name):
+    """Parse an ISO date query parameter"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name} '{value}', expected YYYY-MM-DD")
+
+
+def _csv_rows(query, header):
+    """Yield CSV text one batch at a time from a streaming query"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    for index, row in enumerate(query, start=1):
+        writer.writerow(row)
+        if index % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    yield buffer.getvalue()
+
+
+@main_bp.route('/api/download/<dataset>.csv')
+def download_dataset(dataset):
+    """Stream a fact table as CSV
+
+    Query parameters:
+        countries: comma-separated ISO3 codes
+        start, end: inclusive date bounds (YYYY-MM-DD)
+        metric: comma-separated subset of the dataset's metric columns
+    """
+    if dataset not in EXPORT_DATASETS:
+        return jsonify({'error': f"Unknown dataset '{dataset}'", 'datasets': list(EXPORT_DATASETS)}), 404
+
+    model, country_entity, metrics = EXPORT_DATASETS[dataset]
+
+    try:
+        start_date = _parse_date(request.args.get('start'), 'start')
+        end_date = _parse_date(request.args.get('end'), 'end')
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    requested_metrics = [m for m in request.args.get('metric', '').split(',') if m]
+    unknown = [m for m in requested_metrics if m not in metrics]
+    if unknown:
+        return jsonify({'error': f"Unknown metric(s): {', '.join(unknown)}", 'metrics': metrics}), 400
+    selected_metrics = requested_metrics or metrics
+
+    columns = [model.date, Country.code.label('country_code'), Country.name.label('country')]
+    if model is CrudePrice:
+        columns.append(Crude.name.label('crude'))
+    columns += [getattr(model, m) for m in selected_metrics]
+
+    query = db.session.query(*columns)
+    if model is CrudePrice:
+        query = query.join(Crude, CrudePrice.crude_id == Crude.id)
+    query = query.join(Country, country_entity.country_id == Country.id)
+
+    country_codes = [c.strip().upper() for c in request.args.get('countries', '').split(',') if c.strip()]
+    if country_codes:
+        query = query.filter(Country.code.in_(country_codes))
+    if start_date:
+        query = query.filter(model.date >= start_date)
+    if end_date:
+        query = query.filter(model.date <= end_date)
+
+    # yield_per streams rows through a server-side cursor instead of buffering the result
+    query = query.order_by(model.date, model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    header = [c.key for c in columns]
+
+    return Response(
+        stream_with_context(_csv_rows(query, header)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={dataset}.csv'}
+    )
@@ -0,0 +1,71 @@
+"""
+Response format negotiation for the data API
+JSON by default, Arrow IPC streams and Parquet for bulk consumers
+"""
+import io
+from flask import request, jsonify, Response
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_MIMETYPE = 'application/vnd.apache.parquet'
+
+# Order matters: JSON stays the default for browsers sending */*
+FORMAT_MIMETYPES = {
+    'json': 'application/json',
+    'arrow': ARROW_STREAM_MIMETYPE,
+    'parquet': PARQUET_MIMETYPE,
+}
+
+
+def negotiated_format():
+    """Pick the response format from ?format= or the Accept header"""
+    requested = request.args.get('format', '').lower()
+    if requested in FORMAT_MIMETYPES:
+        return requested
+
+    mimetype = request.accept_mimetypes.best_match(
+        list(FORMAT_MIMETYPES.values()),
+        default=FORMAT_MIMETYPES['json']
+    )
+    for name, candidate in FORMAT_MIMETYPES.items():
+        if candidate == mimetype:
+            return name
+    return 'json'
+
+
+def negotiated_cache_key():
+    """Cache key that keeps each response format apart"""
+    return f"view/{request.path}?format={negotiated_format()}"
+
+
+def columnar_response(columns, name='data'):
+    """Serialize an ordered mapping of column name -> values in the negotiated format"""
+    fmt = negotiated_format()
+
+    if fmt == 'json':
+        names = list(columns.keys())
+        response = jsonify([dict(zip(names, row)) for row in zip(*columns.values())])
+        # Every negotiated response varies by Accept, or caches could mix formats
+        response.vary.add('Accept')
+        return response
+
+    table = pa.Table.from_pydict(columns)
+    sink = io.BytesIO()
+    if fmt == 'arrow':
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        extension = 'arrows'
+    else:
+        pq.write_table(table, sink, compression='zstd')
+        extension = 'parquet'
+
+    return Response(
+        sink.getvalue(),
+        mimetype=FORMAT_MIMETYPES[fmt],
+        headers={
+            'Content-Disposition': f'attachment; filename={name}.{extension}',
+            'Vary': 'Accept'
+        }
+    )
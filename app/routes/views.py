@@ -3,8 +3,12 @@ Main Flask routes for Energy Intelligence website
 """
 from flask import render_template, jsonify, request
 from app.routes import main_bp
+from app.routes.formats import columnar_response, negotiated_cache_key
 from app import db, cache
 from app.models import Country, Production, Exports, Reserves, Imports
+from app.services.change_feed import MAX_CHANGES, InvalidCursor, changes_since
+from app.services.reference import get_reference_data
+from app.services.search import ENTITY_TYPES, search
 from sqlalchemy import func, extract
 from datetime import datetime, timedelta
 
@@ -63,11 +67,16 @@ def contact():
 
 # API endpoints for dashboard data
 @main_bp.route('/api/countries')
-@cache.cached(timeout=3600)
+@cache.cached(timeout=3600, key_prefix=negotiated_cache_key)
 def get_countries():
     """Get list of all countries"""
-    countries = Country.query.order_by(Country.name).all()
-    return jsonify([c.to_dict() for c in countries])
+    # Records are already in name order
+    countries = list(get_reference_data().countries.values())
+    
+    return columnar_response({
+        field: [getattr(c, field) for c in countries]
+        for field in ('id', 'code', 'name', 'region', 'subregion', 'continent')
+    }, name='countries')
 
 
 @main_bp.route('/api/production/summary')
@@ -128,12 +137,12 @@ def get_exports_summary():
 
 
 @main_bp.route('/api/production/by-country')
-@cache.cached(timeout=300)
+@cache.cached(timeout=300, key_prefix=negotiated_cache_key)
 def get_production_by_country():
     """Get production data grouped by country"""
     latest_date = db.session.query(func.max(Production.date)).scalar()
     if not latest_date:
-        return jsonify([])
+        return columnar_response({'country': [], 'code': [], 'production_bbl': []}, name='production_by_country')
     
     results = db.session.query(
         Country.name,
@@ -145,18 +154,15 @@ def get_production_by_country():
         func.sum(Production.production_bbl).desc()
     ).limit(20).all()
     
-    return jsonify([
-        {
-            'country': r.name,
-            'code': r.code,
-            'production_bbl': r.total_production
-        }
-        for r in results
-    ])
+    return columnar_response({
+        'country': [r.name for r in results],
+        'code': [r.code for r in results],
+        'production_bbl': [r.total_production for r in results]
+    }, name='production_by_country')
 
 
 @main_bp.route('/api/production/trend')
-@cache.cached(timeout=300)
+@cache.cached(timeout=300, key_prefix=negotiated_cache_key)
 def get_production_trend():
     """Get production trend over time"""
     start_date = datetime.now().date() - timedelta(days=365*5)  # 5 years
@@ -175,13 +181,41 @@ def get_production_trend():
         extract('month', Production.date)
     ).all()
     
-    return jsonify([
-        {
-            'date': f"{int(r.year)}-{int(r.month):02d}",
-            'production_bbl': r.total_production
-        }
-        for r in results
-    ])
+    return columnar_response({
+        'date': [f"{int(r.year)}-{int(r.month):02d}" for r in results],
+        'production_bbl': [r.total_production for r in results]
+    }, name='production_trend')
+
+
+@main_bp.route('/api/search')
+def search_entities():
+    """Typeahead search over countries, crudes, companies and projects"""
+    query = request.args.get('q', '').strip()
+    types = [t for t in request.args.get('types', '').split(',') if t]
+    unknown = [t for t in types if t not in ENTITY_TYPES]
+    if unknown:
+        return jsonify({'error': f"Unknown type(s): {', '.join(unknown)}", 'types': list(ENTITY_TYPES)}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    return jsonify({'query': query, 'results': search(query, limit=limit, types=types) if query else []})
+
+
+@main_bp.route('/api/projects/changes')
+def get_project_changes():
+    """Upstream projects updated since a cursor, oldest first, for polling clients"""
+    try:
+        limit = min(max(int(request.args.get('limit', MAX_CHANGES)), 1), MAX_CHANGES)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    try:
+        changes, cursor, has_more = changes_since(request.args.get('since'), limit=limit)
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    return jsonify({'changes': changes, 'cursor': cursor, 'has_more': has_more})
 
 
 def register_wcod_routes(app):
@@ -226,6 +260,10 @@ def register_wcod_routes(app):
     def wcod_global_exports():
         return render_template('wcod/global_exports.html')
     
+    @app.route('/wcod/trade/trade-flows')
+    def wcod_trade_flows():
+        return render_template('wcod/trade_flows.html')
+    
     @app.route('/wcod/trade/russian-exports-by-terminal-and-exporting-company')
     def wcod_russian_exports():
         return render_template('wcod/russian_exports.html')
@@ -0,0 +1,4 @@
+"""
+Data services
+Query engines, caches and background jobs shared by routes and dashboards
+"""
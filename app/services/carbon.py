@@ -0,0 +1,151 @@
+"""
+Weighted Carbon Intensity
+Capacity- and export-weighted carbon intensity rolled up by country, region and company
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, extract
+from app import db
+from app.models import Company, Country, Crude, Exports, UpstreamProject
+from app.services.reference import refreshed_reference_data
+from app.services.trade_flows import period_index, period_label
+from app.services.versioning import VersionedResource
+
+
+# Rollup dimension -> column label
+CARBON_GROUPS = {
+    'country': 'Country',
+    'region': 'Region',
+    'company': 'Company',
+}
+
+# Label of the all-regions total in export-weighted series
+WORLD = 'World'
+
+
+def weighted_average(keys, values, weights):
+    """Sum(weight * value) / sum(weight) per key
+
+    Rows with a missing key, value or weight, or a non-positive weight, are
+    ignored. Returns a DataFrame with key, carbon_intensity (weighted),
+    simple_average, weight and count, sorted by weight.
+    """
+    keys = pd.Series(keys)
+    values = np.asarray(values, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    valid = keys.notna().to_numpy() & np.isfinite(values) & np.isfinite(weights) & (weights > 0)
+
+    codes, uniques = pd.factorize(keys[valid])
+    values, weights = values[valid], weights[valid]
+    count = np.bincount(codes, minlength=len(uniques))
+    total_weight = np.bincount(codes, weights=weights, minlength=len(uniques))
+    weighted = np.bincount(codes, weights=weights * values, minlength=len(uniques))
+    total_value = np.bincount(codes, weights=values, minlength=len(uniques))
+
+    df = pd.DataFrame({
+        'key': uniques,
+        'carbon_intensity': weighted / total_weight,
+        'simple_average': total_value / count,
+        'weight': total_weight,
+        'count': count,
+    })
+    return df.sort_values('weight', ascending=False, ignore_index=True)
+
+
+class CarbonRollups:
+    """Precomputed weighted carbon intensity tables
+
+    ``projects`` maps each CARBON_GROUPS dimension to capacity-weighted project
+    intensity. ``exports`` holds export-weighted crude intensity per month and
+    region (plus WORLD), with columns period, region, carbon_intensity, volume.
+    """
+
+    __slots__ = ('projects', 'exports')
+
+    def __init__(self, projects, exports):
+        self.projects = projects
+        self.exports = exports
+
+
+def _project_rollups(reference):
+    """Capacity-weighted project intensity for every rollup dimension"""
+    results = db.session.query(
+        UpstreamProject.country_id,
+        UpstreamProject.company_id,
+        UpstreamProject.production_capacity_bbl,
+        UpstreamProject.carbon_intensity
+    ).filter(
+        UpstreamProject.carbon_intensity.isnot(None),
+        UpstreamProject.production_capacity_bbl > 0
+    ).all()
+    df = pd.DataFrame(results, columns=['country_id', 'company_id', 'capacity', 'carbon_intensity'])
+
+    keys = {
+        'country': df['country_id'].map(lambda i: reference.country_name(i, None)),
+        'region': df['country_id'].map(lambda i: reference.country(i).region if reference.country(i) else None),
+        'company': df['company_id'].map(lambda i: reference.company(i).name if reference.company(i) else None),
+    }
+    return {
+        group: weighted_average(keys[group], df['carbon_intensity'], df['capacity'])
+        for group in CARBON_GROUPS
+    }
+
+
+def _export_rollups(reference):
+    """Monthly export volumes weighted by each exporter's average crude intensity
+
+    Exports are reported per country rather than per grade, so a country's
+    exports carry the mean intensity of the crudes it produces.
+    """
+    crude_intensity = pd.DataFrame(
+        [(c.country_id, c.carbon_intensity) for c in reference.crudes.values() if c.carbon_intensity is not None],
+        columns=['country_id', 'carbon_intensity']
+    ).groupby('country_id')['carbon_intensity'].mean()
+
+    year = extract('year', Exports.date)
+    month = extract('month', Exports.date)
+    results = db.session.query(
+        year.label('year'),
+        month.label('month'),
+        Exports.country_id,
+        func.sum(Exports.exports_bbl).label('volume')
+    ).group_by(year, month, Exports.country_id).all()
+
+    df = pd.DataFrame([
+        (period_index(int(r.year), int(r.month)), r.country_id, r.volume or 0)
+        for r in results
+    ], columns=['period', 'country_id', 'volume'])
+    df['carbon_intensity'] = df['country_id'].map(crude_intensity)
+    df['region'] = df['country_id'].map(
+        lambda i: reference.country(i).region if reference.country(i) else None
+    )
+    df = df.dropna(subset=['carbon_intensity', 'region'])
+    df = df[df['volume'] > 0]
+
+    def by_period(regions):
+        keys = pd.Series(list(zip(df['period'], regions)), dtype=object)
+        rolled = weighted_average(keys, df['carbon_intensity'], df['volume'])
+        return pd.DataFrame({
+            'period': [key[0] for key in rolled['key']],
+            'region': [key[1] for key in rolled['key']],
+            'carbon_intensity': rolled['carbon_intensity'].to_numpy(),
+            'volume': rolled['weight'].to_numpy(),
+        })
+
+    exports = pd.concat([by_period(df['region']), by_period([WORLD] * len(df))], ignore_index=True)
+    exports = exports.sort_values(['period', 'region'], ignore_index=True)
+    exports['label'] = exports['period'].map(period_label)
+    return exports
+
+
+def _load_rollups():
+    reference = refreshed_reference_data()
+    return CarbonRollups(_project_rollups(reference), _export_rollups(reference))
+
+
+_rollups = VersionedResource(lambda previous: _load_rollups(), [Country, Crude, Company, UpstreamProject, Exports])
+
+
+def get_carbon_rollups():
+    """Weighted carbon intensity tables, recomputed when any source table changes"""
+    return _rollups.get()
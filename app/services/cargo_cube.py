@@ -0,0 +1,225 @@
+"""
+Export Cargo Cube
+Monthly terminal x company x destination rollups of cargo-level exports
+"""
+from datetime import date
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, extract
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import ExportCargo, ExportCargoMonthly, Terminal
+from app.services.reference import get_reference_data
+from app.services.versioning import throttled_version
+
+
+# Cube column -> label of the breakdown dimension
+CARGO_DIMENSIONS = {
+    'terminal_id': 'Terminal',
+    'company_id': 'Exporting Company',
+    'destination_country_id': 'Destination',
+}
+
+# Column of cargo_series() holding everything outside the listed keys
+OTHER_SERIES = 'other'
+
+_checked_version = {}
+
+
+def _month_start(year, month):
+    return date(int(year), int(month), 1)
+
+
+def _rebuild_months(since, watermark):
+    """Replace cube rows from ``since`` (a month start, or None for all) with one grouped query"""
+    year = extract('year', ExportCargo.loading_date)
+    month = extract('month', ExportCargo.loading_date)
+    query = db.session.query(
+        year.label('year'),
+        month.label('month'),
+        Terminal.country_id,
+        ExportCargo.terminal_id,
+        ExportCargo.company_id,
+        ExportCargo.destination_country_id,
+        func.count(ExportCargo.id).label('cargo_count'),
+        func.sum(ExportCargo.volume_bbl).label('volume_bbl')
+    ).join(Terminal, ExportCargo.terminal_id == Terminal.id)
+    if since is not None:
+        query = query.filter(ExportCargo.loading_date >= since)
+    results = query.group_by(
+        year, month, Terminal.country_id, ExportCargo.terminal_id,
+        ExportCargo.company_id, ExportCargo.destination_country_id
+    ).all()
+
+    stale = ExportCargoMonthly.query
+    if since is not None:
+        stale = stale.filter(ExportCargoMonthly.month >= since)
+    stale.delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(ExportCargoMonthly, [
+        {
+            'month': _month_start(r.year, r.month),
+            'country_id': r.country_id,
+            'terminal_id': r.terminal_id,
+            'company_id': r.company_id,
+            'destination_country_id': r.destination_country_id,
+            'cargo_count': r.cargo_count,
+            'volume_bbl': r.volume_bbl or 0,
+            'source_updated_at': watermark,
+        }
+        for r in results
+    ])
+    return len(results)
+
+
+def refresh_cargo_cube(full=False):
+    """Bring the monthly cube up to date; returns the number of cube rows rewritten
+
+    Only months from the earliest loading date among cargoes changed since the
+    last build are rebuilt. If earlier months no longer reconcile with the
+    cargo table (e.g. cargoes were deleted), the whole cube is rebuilt.
+    """
+    watermark = db.session.query(func.max(ExportCargo.updated_at)).scalar()
+    built_through = db.session.query(func.max(ExportCargoMonthly.source_updated_at)).scalar()
+
+    since = None
+    if not full and built_through is not None:
+        changed_from = db.session.query(func.min(ExportCargo.loading_date)).filter(
+            ExportCargo.updated_at > built_through
+        ).scalar()
+        since = _month_start(changed_from.year, changed_from.month) if changed_from else None
+
+        # Untouched months must still hold exactly the cargoes the cube counted
+        cargo_count = db.session.query(func.count(ExportCargo.id))
+        cube_count = db.session.query(func.coalesce(func.sum(ExportCargoMonthly.cargo_count), 0))
+        if since is not None:
+            cargo_count = cargo_count.filter(ExportCargo.loading_date < since)
+            cube_count = cube_count.filter(ExportCargoMonthly.month < since)
+        if cargo_count.scalar() != cube_count.scalar():
+            since = None
+        elif changed_from is None:
+            return 0
+
+    try:
+        rows = _rebuild_months(since, watermark)
+        db.session.commit()
+    except IntegrityError:
+        # Another worker rebuilt the same months concurrently
+        db.session.rollback()
+        return 0
+    return rows
+
+
+def ensure_cargo_cube_current():
+    """Refresh the cube when the cargo table has changed since the last check"""
+    version = throttled_version(ExportCargo)
+    if _checked_version.get('cargoes') != version:
+        refresh_cargo_cube()
+        _checked_version['cargoes'] = version
+
+
+def _in_range(query, start=None, end=None):
+    """Restrict a cube query to months from ``start`` through ``end``"""
+    if start is not None:
+        query = query.filter(ExportCargoMonthly.month >= start)
+    if end is not None:
+        query = query.filter(ExportCargoMonthly.month <= end)
+    return query
+
+
+def cube_months(country_id):
+    """(first, last) month with cargo data for a country, or (None, None)"""
+    ensure_cargo_cube_current()
+    return db.session.query(
+        func.min(ExportCargoMonthly.month),
+        func.max(ExportCargoMonthly.month)
+    ).filter(ExportCargoMonthly.country_id == country_id).one()
+
+
+def _labels(dimension, ids):
+    """Display names for a dimension's ids; None is 'Unknown', ids missing from the lookup get a placeholder"""
+    reference = get_reference_data()
+    if dimension == 'terminal_id':
+        names = dict(db.session.query(Terminal.id, Terminal.name).filter(Terminal.id.in_(
+            [i for i in ids if i is not None]
+        )).all())
+    elif dimension == 'company_id':
+        names = {i: reference.company(i).name for i in ids if reference.company(i)}
+    else:
+        names = {i: reference.country_name(i) for i in ids if reference.country(i)}
+    placeholder = CARGO_DIMENSIONS[dimension]
+    return ['Unknown' if i is None else names.get(i, f'{placeholder} {i}') for i in ids]
+
+
+def _unique(labels):
+    """Suffix repeated labels with a counter so each id keeps a distinct name"""
+    seen = {}
+    unique = []
+    for label in labels:
+        seen[label] = seen.get(label, 0) + 1
+        unique.append(label if seen[label] == 1 else f'{label} ({seen[label]})')
+    return unique
+
+
+def cargo_breakdown(country_id, dimension, start=None, end=None):
+    """Volume and cargo count per value of a CARGO_DIMENSIONS key, largest first"""
+    column = getattr(ExportCargoMonthly, dimension)
+    volume = func.sum(ExportCargoMonthly.volume_bbl)
+    query = db.session.query(
+        column,
+        func.sum(ExportCargoMonthly.cargo_count),
+        volume
+    ).filter(ExportCargoMonthly.country_id == country_id)
+    results = _in_range(query, start, end).group_by(column).order_by(volume.desc()).all()
+
+    df = pd.DataFrame(results, columns=['key', 'cargoes', 'volume_bbl'])
+    # Keep ids as ints and missing companies/destinations as None
+    df['key'] = pd.Series([r[0] for r in results], dtype=object)
+    # One row per id, so names shared by several terminals or companies are told apart
+    df['label'] = _unique(_labels(dimension, list(df['key'])))
+    return df
+
+
+def cargo_series(country_id, dimension, keys, start=None, end=None):
+    """Monthly volume with one column per listed id (None included), the remainder in OTHER_SERIES"""
+    column = getattr(ExportCargoMonthly, dimension)
+    query = db.session.query(
+        ExportCargoMonthly.month,
+        column,
+        func.sum(ExportCargoMonthly.volume_bbl)
+    ).filter(ExportCargoMonthly.country_id == country_id)
+    results = _in_range(query, start, end).group_by(ExportCargoMonthly.month, column).all()
+    if not results:
+        return pd.DataFrame()
+
+    # Pivot on positions rather than ids so a None id stays its own column
+    positions = {key: position for position, key in enumerate(keys)}
+    months = sorted({r[0] for r in results})
+    rows = {month: row for row, month in enumerate(months)}
+    volumes = np.zeros((len(months), len(keys) + 1))
+    np.add.at(
+        volumes,
+        ([rows[r[0]] for r in results], [positions.get(r[1], len(keys)) for r in results]),
+        [r[2] or 0 for r in results]
+    )
+    series = pd.DataFrame(volumes, index=months, columns=pd.Index(list(keys) + [OTHER_SERIES], dtype=object))
+    return series if volumes[:, -1].any() else series.iloc[:, :-1]
+
+
+def terminal_company_matrix(country_id, start=None, end=None):
+    """Volume and cargo count by terminal and exporting company, largest first"""
+    volume = func.sum(ExportCargoMonthly.volume_bbl)
+    query = db.session.query(
+        ExportCargoMonthly.terminal_id,
+        ExportCargoMonthly.company_id,
+        func.sum(ExportCargoMonthly.cargo_count),
+        volume
+    ).filter(ExportCargoMonthly.country_id == country_id)
+    results = _in_range(query, start, end).group_by(
+        ExportCargoMonthly.terminal_id, ExportCargoMonthly.company_id
+    ).order_by(volume.desc()).all()
+
+    df = pd.DataFrame(results, columns=['terminal_id', 'company_id', 'cargoes', 'volume_bbl'])
+    # Label from the raw row values; pandas would turn a missing company into NaN
+    df['terminal'] = _labels('terminal_id', [r[0] for r in results])
+    df['company'] = _labels('company_id', [r[1] for r in results])
+    return df
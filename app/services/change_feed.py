@@ -0,0 +1,114 @@
+"""
+Project Change Feed
+Keyset-paginated feed of upstream project updates ordered by (updated_at, id)
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from app import db
+from app.models import Country, UpstreamProject
+
+
+FEED_PAGE_SIZE = 25
+
+# Most changes returned by one delta request; clients poll again while has_more is set
+MAX_CHANGES = 500
+
+# Delta polls leave out rows stamped this recently. updated_at is set by the
+# application before commit, so a fresher row may still be in an open
+# transaction. Reporting it later keeps the cursor from passing rows that
+# commit after the poll.
+SETTLE_SECONDS = 10
+
+
+class InvalidCursor(ValueError):
+    """A cursor string that was not produced by this feed"""
+
+
+def encode_cursor(updated_at, project_id):
+    """Opaque cursor for a feed position"""
+    raw = json.dumps([updated_at.isoformat(), project_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(updated_at, id) for a cursor from encode_cursor()"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        updated_at, project_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), int(project_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+def _feed_query():
+    return db.session.query(
+        UpstreamProject.id,
+        UpstreamProject.name,
+        Country.name.label('country_name'),
+        UpstreamProject.status,
+        UpstreamProject.start_date,
+        UpstreamProject.updated_at
+    ).outerjoin(Country, UpstreamProject.country_id == Country.id).filter(
+        UpstreamProject.updated_at.isnot(None)
+    )
+
+
+def _record(r):
+    return {
+        'id': r.id,
+        'name': r.name,
+        'country': r.country_name,
+        'status': r.status,
+        'start_date': r.start_date.isoformat() if r.start_date else None,
+        'updated_at': r.updated_at.isoformat(),
+    }
+
+
+def latest_changes(before=None, limit=FEED_PAGE_SIZE):
+    """Most recently updated projects, newest first, continuing after ``before``
+
+    Returns (records, next_cursor); next_cursor is None on the last page.
+    Reads limit + 1 rows along idx_project_updated_at to detect a next page.
+    """
+    query = _feed_query()
+    if before:
+        updated_at, project_id = decode_cursor(before)
+        query = query.filter(or_(
+            UpstreamProject.updated_at < updated_at,
+            and_(UpstreamProject.updated_at == updated_at, UpstreamProject.id < project_id)
+        ))
+    rows = query.order_by(UpstreamProject.updated_at.desc(), UpstreamProject.id.desc()).limit(limit + 1).all()
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1].updated_at, page[-1].id) if len(rows) > limit else None
+    return [_record(r) for r in page], next_cursor
+
+
+def changes_since(since=None, limit=MAX_CHANGES):
+    """Projects updated after ``since``, oldest first
+
+    Returns (records, cursor, has_more). Pass the returned cursor as ``since``
+    on the next poll. Without ``since`` no records are returned and the cursor
+    marks the current head of the feed.
+
+    Only rows stamped at least SETTLE_SECONDS ago are read. Each change is then
+    reported exactly once, provided writes commit within that window.
+    """
+    settled = _feed_query().filter(
+        UpstreamProject.updated_at <= datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS)
+    )
+    if not since:
+        head = settled.order_by(UpstreamProject.updated_at.desc(), UpstreamProject.id.desc()).first()
+        return [], encode_cursor(head.updated_at, head.id) if head else None, False
+
+    updated_at, project_id = decode_cursor(since)
+    rows = settled.filter(or_(
+        UpstreamProject.updated_at > updated_at,
+        and_(UpstreamProject.updated_at == updated_at, UpstreamProject.id > project_id)
+    )).order_by(UpstreamProject.updated_at.asc(), UpstreamProject.id.asc()).limit(limit + 1).all()
+
+    changes = rows[:limit]
+    cursor = encode_cursor(changes[-1].updated_at, changes[-1].id) if changes else since
+    return [_record(r) for r in changes], cursor, len(rows) > limit
@@ -0,0 +1,146 @@
+"""
+Project Cross-Filter
+Bitmap indexes over upstream projects so filter combinations are answered in memory
+"""
+import numpy as np
+import pandas as pd
+from app import db
+from app.models import Company, Country, UpstreamProject
+from app.services.reference import refreshed_reference_data
+from app.services.versioning import VersionedResource
+
+
+# Filterable dimension -> label
+CROSSFILTER_DIMENSIONS = {
+    'country': 'Country',
+    'company': 'Company',
+    'status': 'Status',
+    'project_type': 'Project Type',
+}
+
+# Bar colours for selected values, and for the rest while a selection is active
+SELECTED_COLOR = '#007bff'
+UNSELECTED_COLOR = '#b8d4f5'
+
+
+def selection_colors(selected):
+    """Marker colours highlighting the selected values of a counts frame"""
+    selected = np.asarray(selected, dtype=bool)
+    if not selected.any():
+        return [SELECTED_COLOR] * len(selected)
+    return np.where(selected, SELECTED_COLOR, UNSELECTED_COLOR).tolist()
+
+
+def clean_filters(filters):
+    """Known dimensions with at least one selected value, as {dimension: [values]}"""
+    return {
+        dimension: list(values)
+        for dimension, values in (filters or {}).items()
+        if dimension in CROSSFILTER_DIMENSIONS and values
+    }
+
+
+def toggle_filter(filters, dimension, value):
+    """Add ``value`` to a dimension's selection, or remove it if already selected"""
+    filters = clean_filters(filters)
+    selected = filters.get(dimension, [])
+    selected = [v for v in selected if v != value] if value in selected else selected + [value]
+    filters[dimension] = selected
+    return clean_filters(filters)
+
+
+class ProjectCrossfilter:
+    """One packed bitmap per dimension value over all projects
+
+    Values within a dimension are OR-ed, dimensions are AND-ed. A view grouping
+    by a dimension ignores that dimension's own selection, so its other values
+    stay visible and clickable.
+    """
+
+    def __init__(self, ids, columns):
+        # columns: dimension -> sequence of labels (None when unknown), aligned with ids
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.size = len(self.ids)
+        self.codes = {}
+        self.labels = {}
+        self.bitmaps = {}
+        for dimension in CROSSFILTER_DIMENSIONS:
+            codes, labels = pd.factorize(pd.Series(columns[dimension], dtype=object))
+            self.codes[dimension] = codes.astype(np.int32)
+            self.labels[dimension] = labels
+            # Group row positions by code once instead of one scan per value
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+            bitmaps = {}
+            for code, label in enumerate(labels):
+                bits = np.zeros(self.size, dtype=bool)
+                bits[order[bounds[code]:bounds[code + 1]]] = True
+                bitmaps[label] = np.packbits(bits)
+            self.bitmaps[dimension] = bitmaps
+
+    def __len__(self):
+        return self.size
+
+    def mask(self, filters, exclude=None):
+        """Boolean row mask for a filter set, optionally ignoring one dimension"""
+        result = None
+        for dimension, values in clean_filters(filters).items():
+            if dimension == exclude:
+                continue
+            union = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+            for value in values:
+                bitmap = self.bitmaps[dimension].get(value)
+                if bitmap is not None:
+                    np.bitwise_or(union, bitmap, out=union)
+            result = union if result is None else np.bitwise_and(result, union, out=result)
+        if result is None:
+            return np.ones(self.size, dtype=bool)
+        return np.unpackbits(result, count=self.size).astype(bool)
+
+    def counts(self, dimension, filters=None, limit=None):
+        """Projects per value of a dimension under the other dimensions' filters
+
+        Returns a DataFrame with label, projects and selected, largest first.
+        """
+        codes = self.codes[dimension][self.mask(filters, exclude=dimension)]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.labels[dimension]))
+        selected = set(clean_filters(filters).get(dimension, []))
+        df = pd.DataFrame({'label': self.labels[dimension], 'projects': counts})
+        df = df[df['projects'] > 0].sort_values(['projects', 'label'], ascending=[False, True], ignore_index=True)
+        if limit is not None:
+            df = df.head(limit)
+        df['selected'] = df['label'].isin(selected)
+        return df
+
+    def project_ids(self, filters):
+        """Ids of the projects matching every filter"""
+        return self.ids[self.mask(filters)]
+
+
+def _load_crossfilter():
+    reference = refreshed_reference_data()
+    results = db.session.query(
+        UpstreamProject.id,
+        UpstreamProject.country_id,
+        UpstreamProject.company_id,
+        UpstreamProject.status,
+        UpstreamProject.project_type
+    ).order_by(UpstreamProject.id).all()
+    return ProjectCrossfilter(
+        [r.id for r in results],
+        {
+            'country': [reference.country_name(r.country_id, None) for r in results],
+            'company': [reference.company(r.company_id).name if reference.company(r.company_id) else None
+                        for r in results],
+            'status': [r.status for r in results],
+            'project_type': [r.project_type for r in results],
+        }
+    )
+
+
+_crossfilter = VersionedResource(lambda previous: _load_crossfilter(), [UpstreamProject, Country, Company])
+
+
+def get_project_crossfilter():
+    """Cross-filter index for the current process, rebuilt when projects change"""
+    return _crossfilter.get()
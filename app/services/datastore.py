@@ -0,0 +1,175 @@
+"""
+Columnar Data Store
+In-process NumPy copy of the country fact tables for fast dashboard aggregates
+"""
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models import Country, Production, Exports, Imports, Reserves
+from app.services.versioning import VersionedResource
+
+
+# Table name -> (model, value column aggregated by the dashboards)
+FACT_TABLES = {
+    'production': (Production, 'production_bbl'),
+    'exports': (Exports, 'exports_bbl'),
+    'imports': (Imports, 'imports_bbl'),
+    'reserves': (Reserves, 'reserves_bbl'),
+}
+
+
+class FactColumns:
+    """Column arrays for one fact table, sorted by date"""
+
+    __slots__ = ('id', 'country_id', 'date', 'value', 'watermark')
+
+    def __init__(self, id, country_id, date, value, watermark=None):
+        order = np.argsort(date, kind='stable')
+        self.id = id[order]
+        self.country_id = country_id[order]
+        self.date = date[order]
+        self.value = value[order]
+        self.watermark = watermark
+
+    @classmethod
+    def from_sorted(cls, id, country_id, date, value, watermark=None):
+        """Wrap arrays already sorted by date without copying them"""
+        columns = cls.__new__(cls)
+        columns.id = id
+        columns.country_id = country_id
+        columns.date = date
+        columns.value = value
+        columns.watermark = watermark
+        return columns
+
+    def __len__(self):
+        return len(self.id)
+
+    def date_slice(self, start=None, end=None):
+        """Index range of rows with start <= date <= end"""
+        lo = np.searchsorted(self.date, np.datetime64(start, 'D'), 'left') if start else 0
+        hi = np.searchsorted(self.date, np.datetime64(end, 'D'), 'right') if end else len(self.date)
+        return slice(lo, hi)
+
+
+def _read_fact_rows(model, value_column, since=None):
+    """Fetch fact rows as column arrays, optionally only those updated since a watermark"""
+    statement = select(
+        model.id, model.country_id, model.date,
+        getattr(model, value_column).label('value'), model.updated_at
+    )
+    if since is not None:
+        statement = statement.where(model.updated_at >= since)
+    df = pd.read_sql(statement, db.session.connection())
+    return (
+        df['id'].to_numpy(dtype=np.int64),
+        df['country_id'].to_numpy(dtype=np.int32),
+        pd.to_datetime(df['date']).to_numpy().astype('datetime64[D]'),
+        df['value'].to_numpy(dtype=np.float64),
+        df['updated_at'].max() if len(df) else since
+    )
+
+
+class ColumnarStore:
+    """Fact tables held as NumPy arrays with vectorized group-by helpers"""
+
+    def __init__(self):
+        self.tables = {}
+        self.countries = pd.DataFrame(columns=['name', 'code', 'region', 'continent'])
+
+    def refresh(self):
+        """Load tables on first use, then merge only rows updated since the last load"""
+        self.countries = pd.read_sql(
+            select(Country.id, Country.name, Country.code, Country.region, Country.continent),
+            db.session.connection()
+        ).set_index('id')
+
+        for name, (model, value_column) in FACT_TABLES.items():
+            current = self.tables.get(name)
+            if current is None or current.watermark is None:
+                ids, country_ids, dates, values, watermark = _read_fact_rows(model, value_column)
+                self.tables[name] = FactColumns(ids, country_ids, dates, values, watermark)
+                continue
+
+            ids, country_ids, dates, values, watermark = _read_fact_rows(model, value_column, current.watermark)
+            keep = ~np.isin(current.id, ids)
+            merged = FactColumns(
+                np.concatenate([current.id[keep], ids]),
+                np.concatenate([current.country_id[keep], country_ids]),
+                np.concatenate([current.date[keep], dates]),
+                np.concatenate([current.value[keep], values]),
+                watermark
+            )
+            # Deleted rows leave no updated_at trace; fall back to a full reload
+            if len(merged) != db.session.query(model.id).count():
+                merged = FactColumns(*_read_fact_rows(model, value_column))
+            self.tables[name] = merged
+
+    def latest_date(self, table):
+        """Most recent date in a table, or None"""
+        columns = self.tables[table]
+        return columns.date[-1].astype(object) if len(columns) else None
+
+    def totals_by_country(self, table, on_date):
+        """Sum of values per country on a date, as a Series indexed by country id"""
+        columns = self.tables[table]
+        if on_date is None:
+            return pd.Series(dtype=np.float64)
+        rows = columns.date_slice(on_date, on_date)
+        country_ids = columns.country_id[rows]
+        totals = np.bincount(country_ids, weights=columns.value[rows])
+        present = np.bincount(country_ids, minlength=len(totals)) > 0
+        index = np.flatnonzero(present)
+        return pd.Series(totals[index], index=index, dtype=np.float64)
+
+    def country_value(self, table, country_id, on_date):
+        """Summed value for one country on a date"""
+        columns = self.tables[table]
+        if on_date is None:
+            return 0.0
+        rows = columns.date_slice(on_date, on_date)
+        return float(columns.value[rows][columns.country_id[rows] == country_id].sum())
+
+    def trend(self, table, start=None, end=None, country_id=None):
+        """Values summed per date within a window, optionally for one country"""
+        columns = self.tables[table]
+        rows = columns.date_slice(start, end)
+        dates = columns.date[rows]
+        values = columns.value[rows]
+        if country_id is not None:
+            mask = columns.country_id[rows] == country_id
+            dates, values = dates[mask], values[mask]
+        unique_dates, inverse = np.unique(dates, return_inverse=True)
+        totals = np.bincount(inverse, weights=values, minlength=len(unique_dates))
+        return pd.Series(totals, index=pd.DatetimeIndex(unique_dates, name='date'))
+
+    def with_countries(self, values, value_name):
+        """Join a country-indexed Series onto country names, codes and regions"""
+        df = self.countries.join(values.rename(value_name), how='inner')
+        return df.reset_index()
+
+
+def _build_store(previous):
+    store = previous or ColumnarStore()
+    store.refresh()
+    return store
+
+
+_store = VersionedResource(_build_store, [Country, Production, Exports, Imports, Reserves])
+
+
+def get_store():
+    """Columnar store for the current process
+
+    Uses the memory-mapped snapshot shared by all workers when COLUMNAR_SNAPSHOT_DIR
+    is configured, otherwise a private copy refreshed when the fact tables change.
+    """
+    root = current_app.config.get('COLUMNAR_SNAPSHOT_DIR')
+    if root:
+        from app.services.shared_store import get_shared_store
+        store = get_shared_store(root)
+        if store is not None:
+            return store
+    return _store.get()
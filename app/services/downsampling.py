@@ -0,0 +1,96 @@
+"""
+Time-Series Downsampling
+Largest-Triangle-Three-Buckets (LTTB) reduction of line traces to the chart's pixel width
+"""
+import numpy as np
+import pandas as pd
+
+
+# Fallback when the client has not reported its viewport width
+DEFAULT_CHART_WIDTH = 1200
+
+# Points kept per horizontal pixel; more than one gives no visible benefit
+POINTS_PER_PIXEL = 1
+
+# Per-point trace attributes that must be thinned together with x/y
+POINT_ATTRIBUTES = ('text', 'hovertext', 'customdata')
+
+
+def point_budget(width_px=None, fraction=1.0):
+    """Maximum points for a chart occupying ``fraction`` of a viewport ``width_px`` wide"""
+    width = (width_px or DEFAULT_CHART_WIDTH) * fraction
+    return max(int(width * POINTS_PER_PIXEL), 3)
+
+
+def _as_numeric(x):
+    """X values as floats; dates become nanosecond timestamps"""
+    try:
+        return np.asarray(x, dtype=np.float64)
+    except (TypeError, ValueError):
+        return pd.to_datetime(pd.Series(x)).to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+
+
+def lttb_indices(x, y, threshold):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets
+
+    The first and last points are always kept. Each interior bucket keeps the
+    point forming the largest triangle with the previously kept point and the
+    mean of the next bucket, which preserves peaks, troughs and overall shape.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = _as_numeric(x)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    edges = (np.floor(np.arange(threshold - 1) * every) + 1).astype(np.int64)
+    edges[-1] = n - 1
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.nanargmax(areas)) if np.isfinite(areas).any() else start
+        indices[i + 1] = a
+    return indices
+
+
+def downsample_series(x, y, threshold):
+    """Downsampled (x, y) arrays"""
+    indices = lttb_indices(x, y, threshold)
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+
+def downsample_figure(fig, width_px=None, fraction=1.0):
+    """Apply LTTB in place to every line trace longer than the chart's point budget"""
+    threshold = point_budget(width_px, fraction)
+    for trace in fig.data:
+        if trace.type not in ('scatter', 'scattergl') or trace.x is None or trace.y is None:
+            continue
+        if trace.mode is not None and 'lines' not in trace.mode:
+            continue
+        if len(trace.x) <= threshold:
+            continue
+
+        indices = lttb_indices(trace.x, trace.y, threshold)
+        updates = {
+            'x': np.asarray(trace.x)[indices],
+            'y': np.asarray(trace.y)[indices],
+        }
+        for attribute in POINT_ATTRIBUTES:
+            values = getattr(trace, attribute)
+            if values is not None and not isinstance(values, str) and len(values) == len(trace.x):
+                updates[attribute] = np.asarray(values)[indices]
+        trace.update(updates)
+    return fig
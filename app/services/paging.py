@@ -0,0 +1,211 @@
+"""
+Server-Side Table Paging
+Filter, sort and paginate queries and cached frames for DataTables in custom paging mode
+"""
+import json
+import math
+import re
+from datetime import date, datetime
+from operator import eq, ge, gt, le, lt, ne
+import numpy as np
+from sqlalchemy import String, and_, cast, false, or_
+
+
+_FILTER_PART = re.compile(r'^\{(?P<column>[^}]+)\}\s+(?P<operator>\S+)\s+(?P<value>.+)$')
+
+# DataTable operator spellings -> canonical operator
+_OPERATOR_ALIASES = {
+    '=': 'eq', 'eq': 'eq',
+    '!=': 'ne', 'ne': 'ne',
+    '<': 'lt', 'lt': 'lt',
+    '<=': 'le', 'le': 'le',
+    '>': 'gt', 'gt': 'gt',
+    '>=': 'ge', 'ge': 'ge',
+    'contains': 'contains',
+    'datestartswith': 'datestartswith',
+}
+
+# Canonical operator -> comparison; works on SQL columns and pandas Series alike
+_COMPARATORS = {'eq': eq, 'ne': ne, 'lt': lt, 'le': le, 'gt': gt, 'ge': ge}
+
+
+def _parse_value(value):
+    """Unquote a filter operand, converting unquoted numbers"""
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'`':
+        return value[1:-1]
+    try:
+        return float(value) if '.' in value or 'e' in value.lower() else int(value)
+    except ValueError:
+        return value
+
+
+def parse_filter_query(filter_query):
+    """Split a DataTable filter_query into (column_id, operator, value) triples
+
+    Understands the expressions the native filter row produces, e.g.
+    ``{name} icontains "basin" && {capacity} >= 5000``. Parts using operators
+    that cannot be translated to SQL are skipped.
+    """
+    filters = []
+    for part in (filter_query or '').split(' && '):
+        match = _FILTER_PART.match(part.strip())
+        if not match:
+            continue
+        operator = match.group('operator').lower()
+        # Case-sensitivity prefixes (scontains, i=, ...) are not meaningful here
+        if operator not in _OPERATOR_ALIASES and operator[:1] in ('s', 'i'):
+            operator = operator[1:]
+        if operator not in _OPERATOR_ALIASES:
+            continue
+        filters.append((match.group('column'), _OPERATOR_ALIASES[operator], _parse_value(match.group('value'))))
+    return filters
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _decode(column, value):
+    """Convert a JSON/filter value back to the column's Python type"""
+    if value is None:
+        return None
+    python_type = _python_type(column)
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(str(value))
+        if python_type is date:
+            return date.fromisoformat(str(value)[:10])
+        if python_type in (int, float):
+            return python_type(value)
+    except ValueError:
+        return value
+    return value
+
+
+def _encode(value):
+    """JSON-safe cursor value"""
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def apply_filters(query, columns, filters):
+    """Apply parsed filters to a query; ``columns`` maps column ids to SQL expressions"""
+    for column_id, operator, value in filters:
+        column = columns.get(column_id)
+        if column is None:
+            continue
+        if operator == 'contains':
+            escaped = str(value).replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = query.filter(cast(column, String).ilike(f'%{escaped}%', escape='\\'))
+        elif operator == 'datestartswith':
+            query = query.filter(cast(column, String).like(f'{value}%'))
+        else:
+            query = query.filter(_COMPARATORS[operator](column, _decode(column, value)))
+    return query
+
+
+def _keyset_condition(keys, cursor):
+    """Rows strictly after ``cursor`` in the (column, descending) order of ``keys``
+
+    Matches the NULLS LAST ordering used by fetch_page: a NULL sorts after every
+    value in both directions.
+    """
+    conditions = []
+    equal_so_far = []
+    for (column, descending), value in zip(keys, cursor):
+        if value is None:
+            after = false()
+            equal = column.is_(None)
+        else:
+            after = or_(column < value if descending else column > value, column.is_(None))
+            equal = column == value
+        conditions.append(and_(*equal_so_far, after))
+        equal_so_far.append(equal)
+    return or_(*conditions)
+
+
+def page_signature(sort_by, filter_query, page_size):
+    """Identifies a result ordering; cursors are only valid for the same signature"""
+    return json.dumps([sort_by or [], filter_query or '', page_size], sort_keys=True)
+
+
+def fetch_page(query, columns, tie_breaker, sort_by=None, filter_query=None,
+               page_current=0, page_size=20, cursors=None):
+    """One page of a filtered, sorted query
+
+    ``cursors`` is the state previously returned for this table. When the row
+    before the requested page is known (the user stepped forward or back one
+    page), the page is read with a keyset predicate on the sort columns and
+    ``tie_breaker``; arbitrary jumps fall back to OFFSET once and record the
+    keys they land on. Returns (rows, page_count, cursors).
+    """
+    page_current = page_current or 0
+    signature = page_signature(sort_by, filter_query, page_size)
+    if not cursors or cursors.get('signature') != signature:
+        cursors = {'signature': signature, 'pages': {}}
+
+    query = apply_filters(query, columns, parse_filter_query(filter_query))
+    total = query.order_by(None).count()
+
+    keys = [
+        (columns[sort['column_id']], sort['direction'] == 'desc')
+        for sort in (sort_by or []) if sort['column_id'] in columns
+    ]
+    keys.append((tie_breaker, False))
+    query = query.add_columns(*[column.label(f'_key{i}') for i, (column, _) in enumerate(keys)])
+    query = query.order_by(*[
+        (column.desc() if descending else column.asc()).nulls_last() for column, descending in keys
+    ])
+
+    cursor = cursors['pages'].get(str(page_current))
+    if page_current == 0:
+        rows = query.limit(page_size).all()
+    elif cursor is not None:
+        decoded = [_decode(column, value) for (column, _), value in zip(keys, cursor)]
+        rows = query.filter(_keyset_condition(keys, decoded)).limit(page_size).all()
+    else:
+        rows = query.offset(page_current * page_size).limit(page_size).all()
+
+    if rows:
+        last = rows[-1]
+        cursors['pages'][str(page_current + 1)] = [_encode(getattr(last, f'_key{i}')) for i in range(len(keys))]
+
+    return rows, max(math.ceil(total / page_size), 1), cursors
+
+
+def filter_frame(df, filters):
+    """Rows of a DataFrame matching parsed filters"""
+    mask = np.ones(len(df), dtype=bool)
+    for column_id, operator, value in filters:
+        if column_id not in df.columns:
+            continue
+        series = df[column_id]
+        if operator == 'contains':
+            mask &= series.astype(str).str.contains(str(value), case=False, regex=False).to_numpy()
+        elif operator == 'datestartswith':
+            mask &= series.astype(str).str.startswith(str(value)).to_numpy()
+        else:
+            try:
+                mask &= _COMPARATORS[operator](series, value).to_numpy()
+            except TypeError:
+                # e.g. a text operand against a numeric column matches nothing
+                mask[:] = False
+    return df[mask]
+
+
+def page_frame(df, sort_by=None, filter_query=None, page_current=0, page_size=20):
+    """One page of a filtered, sorted in-memory frame; returns (page, page_count)"""
+    df = filter_frame(df, parse_filter_query(filter_query))
+    sorts = [sort for sort in (sort_by or []) if sort['column_id'] in df.columns]
+    if sorts:
+        df = df.sort_values(
+            [sort['column_id'] for sort in sorts],
+            ascending=[sort['direction'] == 'asc' for sort in sorts],
+            na_position='last',
+            kind='stable'
+        )
+    start = (page_current or 0) * page_size
+    return df.iloc[start:start + page_size], max(math.ceil(len(df) / page_size), 1)
@@ -0,0 +1,154 @@
+"""
+Company Portfolios
+Per-company capacity, investment and carbon rollups kept in the company_portfolios summary table
+"""
+import json
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Company, CompanyPortfolio, Country, UpstreamProject
+from app.services.reference import get_reference_data
+from app.services.versioning import throttled_version
+
+
+# Status value of the all-statuses row for each company
+PORTFOLIO_TOTAL = 'All'
+
+# Ranking metric -> (column, label)
+PORTFOLIO_METRICS = {
+    'capacity': ('capacity_bbl', 'Capacity (bbl/d)'),
+    'investment': ('investment_usd', 'Investment (USD)'),
+    'projects': ('project_count', 'Projects'),
+    'carbon': ('carbon_intensity', 'Weighted Carbon Intensity'),
+    'countries': ('country_count', 'Countries'),
+}
+
+_checked_version = {}
+
+
+def _source_version():
+    return json.dumps(throttled_version(UpstreamProject, Company))
+
+
+def _rollup(df):
+    """Portfolio columns for a frame grouped by company (and status)"""
+    return pd.DataFrame({
+        'project_count': df['id'].count(),
+        'capacity_bbl': df['capacity'].sum(),
+        'investment_usd': df['investment'].sum(),
+        'carbon_weighted': df['carbon_weighted'].sum(),
+        'carbon_capacity': df['carbon_capacity'].sum(),
+        'country_count': df['country_id'].nunique(),
+    })
+
+
+def compute_portfolios():
+    """Summary rows for every company with projects, from one project query"""
+    results = db.session.query(
+        UpstreamProject.id,
+        UpstreamProject.company_id,
+        UpstreamProject.country_id,
+        UpstreamProject.status,
+        UpstreamProject.production_capacity_bbl,
+        UpstreamProject.investment_usd,
+        UpstreamProject.carbon_intensity
+    ).filter(UpstreamProject.company_id.isnot(None)).all()
+    df = pd.DataFrame(results, columns=[
+        'id', 'company_id', 'country_id', 'status', 'capacity', 'investment', 'carbon_intensity'
+    ])
+    df['capacity'] = df['capacity'].fillna(0)
+    df['investment'] = df['investment'].fillna(0)
+    # Only projects with both a capacity and an intensity carry carbon weight
+    df['carbon_capacity'] = df['capacity'].where(df['carbon_intensity'].notna() & (df['capacity'] > 0), 0)
+    df['carbon_weighted'] = df['carbon_capacity'] * df['carbon_intensity'].fillna(0)
+
+    by_status = _rollup(df.groupby(['company_id', 'status'])).reset_index()
+    totals = _rollup(df.groupby('company_id')).reset_index().assign(status=PORTFOLIO_TOTAL)
+    rows = pd.concat([totals, by_status], ignore_index=True)
+    rows['carbon_intensity'] = (rows['carbon_weighted'] / rows['carbon_capacity']).where(rows['carbon_capacity'] > 0)
+    return rows.drop(columns=['carbon_weighted', 'carbon_capacity'])
+
+
+def refresh_company_portfolios():
+    """Rebuild the summary table in one transaction; returns the number of rows written"""
+    version = _source_version()
+    rows = compute_portfolios()
+    rows['source_version'] = version
+    records = rows.astype(object).where(rows.notna(), None).to_dict('records')
+
+    try:
+        CompanyPortfolio.query.delete()
+        db.session.bulk_insert_mappings(CompanyPortfolio, records)
+        db.session.commit()
+    except IntegrityError:
+        # Another worker refreshed concurrently; its rows are just as current
+        db.session.rollback()
+    # An empty table carries no source_version, so remember the build here too
+    _checked_version['portfolios'] = version
+    return len(records)
+
+
+def ensure_portfolios_current():
+    """Refresh the summary table when projects or companies changed since it was built"""
+    version = _source_version()
+    if _checked_version.get('portfolios') == version:
+        return
+    built_from = db.session.query(CompanyPortfolio.source_version).limit(1).scalar()
+    if built_from != version:
+        refresh_company_portfolios()
+    else:
+        _checked_version['portfolios'] = version
+
+
+def company_rankings(status=PORTFOLIO_TOTAL, metric='capacity', limit=None):
+    """Portfolio rows for one status, best first by a PORTFOLIO_METRICS key, as a DataFrame"""
+    ensure_portfolios_current()
+    column = getattr(CompanyPortfolio, PORTFOLIO_METRICS[metric][0])
+    query = db.session.query(
+        CompanyPortfolio.company_id,
+        CompanyPortfolio.project_count,
+        CompanyPortfolio.capacity_bbl,
+        CompanyPortfolio.investment_usd,
+        CompanyPortfolio.carbon_intensity,
+        CompanyPortfolio.country_count
+    ).filter(CompanyPortfolio.status == status).order_by(column.desc().nulls_last(), CompanyPortfolio.company_id)
+    if limit:
+        query = query.limit(limit)
+
+    df = pd.DataFrame(query.all(), columns=[
+        'company_id', 'project_count', 'capacity_bbl', 'investment_usd', 'carbon_intensity', 'country_count'
+    ])
+    reference = get_reference_data()
+    df.insert(1, 'company', [
+        reference.company(i).name if reference.company(i) else f'Company {i}' for i in df['company_id']
+    ])
+    return df
+
+
+def company_portfolio(company_id):
+    """Drill-down for one company: (status rows, country footprint) as DataFrames"""
+    ensure_portfolios_current()
+    statuses = pd.DataFrame(db.session.query(
+        CompanyPortfolio.status,
+        CompanyPortfolio.project_count,
+        CompanyPortfolio.capacity_bbl,
+        CompanyPortfolio.investment_usd,
+        CompanyPortfolio.carbon_intensity,
+        CompanyPortfolio.country_count
+    ).filter(CompanyPortfolio.company_id == company_id).all(), columns=[
+        'status', 'project_count', 'capacity_bbl', 'investment_usd', 'carbon_intensity', 'country_count'
+    ])
+
+    # Served by idx_project_company
+    countries = pd.DataFrame(db.session.query(
+        Country.name,
+        func.count(UpstreamProject.id),
+        func.coalesce(func.sum(UpstreamProject.production_capacity_bbl), 0),
+        func.coalesce(func.sum(UpstreamProject.investment_usd), 0)
+    ).join(Country, UpstreamProject.country_id == Country.id).filter(
+        UpstreamProject.company_id == company_id
+    ).group_by(Country.id, Country.name).order_by(
+        func.sum(UpstreamProject.production_capacity_bbl).desc()
+    ).all(), columns=['country', 'project_count', 'capacity_bbl', 'investment_usd'])
+    return statuses, countries
@@ -0,0 +1,226 @@
+"""
+Crude Price Series
+Multi-grade price history fetched in one query, resampled and aligned on a common calendar
+"""
+import pandas as pd
+from sqlalchemy import func, select
+from app import db, cache
+from app.models import Country, Crude, CrudePrice
+from app.services.versioning import throttled_version
+
+
+# Field name -> CrudePrice column
+PRICE_FIELDS = {
+    'price': CrudePrice.price_usd_bbl,
+    'gpw': CrudePrice.gross_product_worth,
+    'margin': CrudePrice.margin,
+}
+
+# Frequency -> pandas period alias; daily series are returned as stored
+FREQUENCIES = {
+    'daily': None,
+    'weekly': 'W-FRI',
+    'monthly': 'M',
+}
+
+# Scorecard change horizons, in the order reported
+SCORECARD_HORIZONS = ('1D', '1W', '1M', 'YTD', '1Y')
+
+# Rolling window lengths offered for GPW and margin analytics, in price observations
+ROLLING_WINDOWS = (20, 60, 120)
+
+# History shown by the rolling analytics, excluding the window warm-up
+ROLLING_LOOKBACK_YEARS = 3
+
+
+@cache.memoize(timeout=3600)
+def _daily_matrix(crude_ids, field, start, end, version):
+    """Daily values as a date x crude_id frame
+
+    ``version`` only keys the cache so matrices are recomputed after data changes.
+    """
+    value = PRICE_FIELDS[field]
+    statement = select(
+        CrudePrice.crude_id,
+        CrudePrice.date,
+        func.avg(value).label('value')
+    ).where(
+        CrudePrice.crude_id.in_(crude_ids),
+        value.isnot(None)
+    ).group_by(CrudePrice.crude_id, CrudePrice.date)
+    if start:
+        statement = statement.where(CrudePrice.date >= start)
+    if end:
+        statement = statement.where(CrudePrice.date <= end)
+
+    df = pd.read_sql(statement, db.session.connection())
+    if df.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name='date'), columns=list(crude_ids), dtype='float64')
+
+    df['date'] = pd.to_datetime(df['date'])
+    matrix = df.pivot(index='date', columns='crude_id', values='value').sort_index()
+    # Grades without rows in the window still get a (empty) column
+    return matrix.reindex(columns=list(crude_ids))
+
+
+def resample_prices(matrix, frequency):
+    """Average a daily matrix into weekly or monthly periods, labelled by period end"""
+    rule = FREQUENCIES[frequency]
+    if rule is None or matrix.empty:
+        return matrix
+    periods = matrix.index.to_period(rule)
+    resampled = matrix.groupby(periods).mean()
+    resampled.index = resampled.index.to_timestamp(how='end').normalize().rename('date')
+    return resampled
+
+
+def price_matrix(crude_ids, start=None, end=None, frequency='daily', field='price'):
+    """Price history for several grades aligned on one calendar
+
+    Returns a frame indexed by date with one column per crude id; grades that did
+    not trade on a date hold NaN there. Results are cached per grade set and range.
+    """
+    crude_ids = tuple(sorted({int(crude_id) for crude_id in crude_ids}))
+    if not crude_ids:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name='date'), dtype='float64')
+    matrix = _daily_matrix(crude_ids, field, start, end, throttled_version(CrudePrice))
+    return resample_prices(matrix, frequency)
+
+
+@cache.memoize(timeout=3600)
+def _priced_crudes(version):
+    results = db.session.query(
+        Crude.id,
+        Crude.name,
+        func.count(CrudePrice.id).label('observations'),
+        func.max(CrudePrice.date).label('last_date')
+    ).join(CrudePrice).group_by(Crude.id, Crude.name).order_by(Crude.name).all()
+    return [(r.id, r.name, r.observations, r.last_date) for r in results]
+
+
+def priced_crudes():
+    """Crudes that have price rows, as (id, name, observations, last_date) tuples"""
+    return _priced_crudes(throttled_version(Crude, CrudePrice))
+
+
+def period_changes(matrix, as_of=None):
+    """Latest value and percentage change over each scorecard horizon, per column
+
+    Gaps are forward-filled so every horizon compares against the last value on
+    or before its target date. All horizons are looked up in one vectorized pass.
+    """
+    filled = matrix.sort_index().ffill()
+    position = filled.index.searchsorted(pd.Timestamp(as_of), 'right') - 1 if as_of else len(filled) - 1
+    if position < 0:
+        return pd.DataFrame(columns=['Price', *SCORECARD_HORIZONS])
+
+    latest = filled.index[position]
+    targets = [
+        filled.index[position - 1] if position > 0 else latest - pd.Timedelta(days=1),
+        latest - pd.Timedelta(days=7),
+        latest - pd.DateOffset(months=1),
+        pd.Timestamp(latest.year - 1, 12, 31),
+        latest - pd.DateOffset(years=1),
+    ]
+    positions = filled.index.searchsorted(pd.DatetimeIndex(targets), 'right') - 1
+
+    values = filled.to_numpy()
+    current = values[position]
+    base = values[positions.clip(min=0)]
+    base[positions < 0] = float('nan')
+    changes = (current - base) / base * 100
+
+    result = pd.DataFrame(changes.T, index=matrix.columns, columns=list(SCORECARD_HORIZONS))
+    result.insert(0, 'Price', current)
+    return result
+
+
+@cache.memoize(timeout=86400)
+def _scorecard(price_date, version):
+    """Scorecard rows for one price date
+
+    ``version`` only keys the cache so corrected history is picked up.
+    """
+    crude_ids = [crude_id for crude_id, _, _, _ in priced_crudes()]
+    # One year back, or to the last close of the previous year for YTD, plus slack for holidays
+    as_of = pd.Timestamp(price_date)
+    start = min(as_of - pd.DateOffset(years=1), pd.Timestamp(as_of.year - 1, 12, 31)) - pd.Timedelta(days=14)
+    changes = period_changes(price_matrix(crude_ids, start.date(), price_date), price_date)
+
+    crudes = pd.read_sql(
+        select(Crude.id, Crude.name, Country.name.label('country'))
+        .join(Country, Crude.country_id == Country.id)
+        .where(Crude.id.in_(crude_ids)),
+        db.session.connection()
+    ).set_index('id')
+    benchmarks = pd.read_sql(
+        select(CrudePrice.crude_id, func.max(CrudePrice.benchmark).label('benchmark'))
+        .where(CrudePrice.date == price_date)
+        .group_by(CrudePrice.crude_id),
+        db.session.connection()
+    ).set_index('crude_id')['benchmark']
+
+    scorecard = crudes.join(changes, how='inner').join(benchmarks)
+    scorecard = scorecard.dropna(subset=['Price']).sort_values('name')
+    return scorecard.reset_index().to_dict('records')
+
+
+def latest_price_date():
+    """Most recent price date across all grades, or None"""
+    crudes = priced_crudes()
+    return max(last_date for _, _, _, last_date in crudes) if crudes else None
+
+
+def price_scorecard():
+    """Latest price and 1D/1W/1M/YTD/1Y changes for every priced grade, cached per price date"""
+    price_date = latest_price_date()
+    if price_date is None:
+        return []
+    return _scorecard(price_date, throttled_version(CrudePrice))
+
+
+def rolling_statistics(matrix, window):
+    """Rolling mean, volatility, 10th/90th percentile band and percentile rank per column
+
+    ``window`` counts price observations. Volatility is the rolling standard
+    deviation of day-on-day changes. Every statistic is computed for all grades
+    at once on the aligned matrix.
+    """
+    min_periods = max(window // 2, 2)
+    rolling = matrix.rolling(window, min_periods=min_periods)
+    return {
+        'mean': rolling.mean(),
+        'volatility': matrix.diff().rolling(window, min_periods=min_periods).std(),
+        'p10': rolling.quantile(0.1),
+        'p90': rolling.quantile(0.9),
+        'percentile': rolling.rank(pct=True) * 100,
+    }
+
+
+@cache.memoize(timeout=86400)
+def _rolling_analytics(field, window, price_date, version):
+    """Rolling statistics for every priced grade up to one price date
+
+    ``version`` only keys the cache so corrected history is picked up.
+    """
+    crude_ids = [crude_id for crude_id, _, _, _ in priced_crudes()]
+    display_start = pd.Timestamp(price_date) - pd.DateOffset(years=ROLLING_LOOKBACK_YEARS)
+    # Enough calendar days before the display window to warm up the rolling window
+    warmup_start = display_start - pd.Timedelta(days=window * 7 // 5 + 14)
+
+    matrix = price_matrix(crude_ids, warmup_start.date(), price_date, field=field)
+    statistics = rolling_statistics(matrix, window)
+    statistics['value'] = matrix
+    return {name: frame.loc[display_start:] for name, frame in statistics.items()}
+
+
+def rolling_analytics(field='margin', window=60):
+    """Rolling statistics of a price field for all grades, cached per latest price date
+
+    Returns a dict of date x crude_id frames: value, mean, volatility, p10, p90
+    and percentile. Empty dict when there are no prices.
+    """
+    price_date = latest_price_date()
+    if price_date is None:
+        return {}
+    return _rolling_analytics(field, window, price_date, throttled_version(CrudePrice))
@@ -0,0 +1,114 @@
+"""
+Project Pipeline Timeline
+Monthly capacity and investment curves by project status, built with interval sweeps
+"""
+import numpy as np
+import pandas as pd
+from app import db
+from app.models import UpstreamProject
+from app.models.upstream_project import ProjectStatus
+from app.services.trade_flows import period_label
+from app.services.versioning import VersionedResource
+
+
+# Statuses whose projects never reach completion; left out of the capacity curves
+NEVER_COMPLETED = (ProjectStatus.CANCELLED.value,)
+
+
+def _periods(dates):
+    """Monthly period numbers (see trade_flows.period_index) for a date column"""
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce')
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy(dtype=np.float64)
+
+
+def _sweep(rows, columns, values, shape):
+    """Sum ``values`` into a (rows x columns) grid in one bincount"""
+    flat = np.bincount(rows * shape[1] + columns, weights=values, minlength=shape[0] * shape[1])
+    return flat.reshape(shape)
+
+
+class ProjectTimeline:
+    """Per-status monthly series over every dated project
+
+    Each project spans its start month to its expected completion month (its
+    start month when no completion date is known). All series are arrays of
+    shape (statuses, periods):
+
+    - ``completed_capacity``: cumulative capacity of projects whose expected
+      completion falls on or before the month
+    - ``pipeline_capacity``: capacity of projects between start and expected completion
+    - ``investment``: cumulative investment, spread evenly over each project's months
+
+    Projects with a NEVER_COMPLETED status add no capacity to either capacity series.
+    """
+
+    __slots__ = ('statuses', 'periods', 'completed_capacity', 'pipeline_capacity', 'investment')
+
+    def __init__(self, status, start, end, capacity, investment):
+        known = ~np.isnan(start)
+        status, start, end = status[known], start[known].astype(np.int64), end[known]
+        end = np.where(np.isnan(end), start, np.maximum(end, start)).astype(np.int64)
+        capacity = np.where(np.isin(status, NEVER_COMPLETED), 0.0, np.nan_to_num(capacity[known]))
+        investment = np.nan_to_num(investment[known])
+
+        order = [s.value for s in ProjectStatus]
+        self.statuses = sorted(set(status), key=lambda s: (order.index(s) if s in order else len(order), s))
+        codes = pd.Index(self.statuses).get_indexer(status)
+
+        first = int(start.min()) if len(start) else 0
+        last = int(end.max()) if len(end) else -1
+        self.periods = np.arange(first, last + 1)
+        # A spare column absorbs events falling after the last month
+        size = len(self.periods)
+        shape = (len(self.statuses), size + 1)
+        start, end = start - first, end - first
+
+        # Events: +capacity at start, -capacity at completion; the running sum is the pipeline
+        pipeline = _sweep(codes, start, capacity, shape) - _sweep(codes, end, capacity, shape)
+        self.pipeline_capacity = np.cumsum(pipeline, axis=1)[:, :size]
+        self.completed_capacity = np.cumsum(_sweep(codes, end, capacity, shape), axis=1)[:, :size]
+
+        # Monthly spend is a step function; a second running sum makes it cumulative
+        rate = investment / (end - start + 1)
+        spend = np.cumsum(_sweep(codes, start, rate, shape) - _sweep(codes, end + 1, rate, shape), axis=1)
+        self.investment = np.cumsum(spend, axis=1)[:, :size]
+
+    def __len__(self):
+        return len(self.periods)
+
+    def frame(self, series, start_period=None, end_period=None):
+        """One series as a DataFrame with a column per status, indexed by month label"""
+        values = getattr(self, series)
+        lo = np.searchsorted(self.periods, start_period) if start_period is not None else 0
+        hi = np.searchsorted(self.periods, end_period, 'right') if end_period is not None else len(self.periods)
+        return pd.DataFrame(
+            values[:, lo:hi].T,
+            index=[period_label(p) for p in self.periods[lo:hi]],
+            columns=self.statuses
+        )
+
+
+def _load_timeline():
+    results = db.session.query(
+        UpstreamProject.status,
+        UpstreamProject.start_date,
+        UpstreamProject.expected_completion_date,
+        UpstreamProject.production_capacity_bbl,
+        UpstreamProject.investment_usd
+    ).all()
+    df = pd.DataFrame(results, columns=['status', 'start_date', 'completion_date', 'capacity', 'investment'])
+    return ProjectTimeline(
+        df['status'].fillna('Unknown').to_numpy(dtype=object),
+        _periods(df['start_date']),
+        _periods(df['completion_date']),
+        df['capacity'].to_numpy(dtype=np.float64),
+        df['investment'].to_numpy(dtype=np.float64)
+    )
+
+
+_timeline = VersionedResource(lambda previous: _load_timeline(), [UpstreamProject])
+
+
+def get_project_timeline():
+    """Project timeline for the current process, rebuilt when projects change"""
+    return _timeline.get()
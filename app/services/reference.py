@@ -0,0 +1,106 @@
+"""
+Reference Data Cache
+Countries, crudes and companies held in memory as compact records with lookup indexes
+"""
+from typing import NamedTuple, Optional
+from app import db
+from app.models import Company, Country, Crude
+from app.services.versioning import VersionedResource
+
+
+class CountryRecord(NamedTuple):
+    id: int
+    code: str
+    name: str
+    region: Optional[str]
+    subregion: Optional[str]
+    continent: Optional[str]
+
+
+class CrudeRecord(NamedTuple):
+    id: int
+    name: str
+    country_id: int
+    grade: Optional[str]
+    api_gravity: Optional[float]
+    sulfur_content: Optional[float]
+    carbon_intensity: Optional[float]
+
+
+class CompanyRecord(NamedTuple):
+    id: int
+    name: str
+    company_type: Optional[str]
+    country_id: Optional[int]
+    headquarters: Optional[str]
+
+
+def _load(model, record):
+    columns = [getattr(model, field) for field in record._fields]
+    return [record(*row) for row in db.session.query(*columns).order_by(model.name)]
+
+
+class ReferenceData:
+    """Reference tables keyed by id, with name (and country code) indexes
+
+    Record lists are in name order. Name lookups are case-insensitive.
+    """
+
+    __slots__ = ('countries', 'crudes', 'companies', '_country_ids', '_country_codes', '_crude_ids', '_company_ids')
+
+    def __init__(self, countries, crudes, companies):
+        self.countries = {c.id: c for c in countries}
+        self.crudes = {c.id: c for c in crudes}
+        self.companies = {c.id: c for c in companies}
+        self._country_ids = {c.name.lower(): c.id for c in countries}
+        self._country_codes = {c.code.upper(): c.id for c in countries}
+        self._crude_ids = {c.name.lower(): c.id for c in crudes}
+        self._company_ids = {c.name.lower(): c.id for c in companies}
+
+    @classmethod
+    def load(cls):
+        """Read all three tables with one column query each"""
+        return cls(_load(Country, CountryRecord), _load(Crude, CrudeRecord), _load(Company, CompanyRecord))
+
+    def country(self, country_id):
+        return self.countries.get(country_id)
+
+    def country_by_name(self, name):
+        return self.countries.get(self._country_ids.get((name or '').strip().lower()))
+
+    def country_by_code(self, code):
+        return self.countries.get(self._country_codes.get((code or '').strip().upper()))
+
+    def country_name(self, country_id, default='N/A'):
+        country = self.countries.get(country_id)
+        return country.name if country else default
+
+    def crude(self, crude_id):
+        return self.crudes.get(crude_id)
+
+    def crude_by_name(self, name):
+        return self.crudes.get(self._crude_ids.get((name or '').strip().lower()))
+
+    def company(self, company_id):
+        return self.companies.get(company_id)
+
+    def company_by_name(self, name):
+        return self.companies.get(self._company_ids.get((name or '').strip().lower()))
+
+
+_reference = VersionedResource(lambda previous: ReferenceData.load(), [Country, Crude, Company])
+
+
+def get_reference_data():
+    """Reference data for the current process, reloaded when any of its tables change"""
+    return _reference.get()
+
+
+def refreshed_reference_data():
+    """Reference data re-checked against the database now, bypassing the version throttle
+
+    Builders of other versioned caches call this instead of get_reference_data()
+    so a rebuild never reads reference rows older than its own version check.
+    """
+    _reference.invalidate()
+    return _reference.get()
@@ -0,0 +1,236 @@
+"""
+Search Index
+In-memory trigram index over countries, crudes, companies and projects for typeahead search
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from urllib.parse import parse_qs
+import numpy as np
+from app import db
+from app.models import Company, Country, Crude, UpstreamProject
+from app.services.reference import refreshed_reference_data
+from app.services.versioning import VersionedResource
+
+
+# Entity type -> URL of the page that shows it
+ENTITY_URLS = {
+    'country': '/wcod-country-overview?country={id}',
+    'crude': '/wcod-crude-profile?crude={id}',
+    'company': '/wcod/upstream-projects/projects-by-company?company={id}',
+    'project': '/wcod-upstream-oil-projects-tracker-methodology?project={id}',
+}
+ENTITY_TYPES = tuple(ENTITY_URLS)
+
+# Share of query trigrams a name must contain to be a candidate
+MIN_COVERAGE = 0.5
+
+# Score added when the name starts with the query, and per matched description word
+PREFIX_BOOST = 0.5
+DESCRIPTION_WEIGHT = 0.3
+
+# Options sent to a typeahead dropdown per keystroke
+OPTION_LIMIT = 20
+
+_NON_ALPHANUMERIC = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text):
+    """Lowercase ASCII words separated by single spaces"""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return _NON_ALPHANUMERIC.sub(' ', text.lower()).strip()
+
+
+def trigrams(text):
+    """Set of word trigrams, padded like pg_trgm so short prefixes still match"""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _postings(index):
+    return {key: np.asarray(values, dtype=np.int32) for key, values in index.items()}
+
+
+class SearchIndex:
+    """Trigram postings over entity names plus a word index over descriptions"""
+
+    def __init__(self, entities):
+        # entities: iterable of (type, id, name, detail, description)
+        entities = list(entities)
+        self.types = np.array([e[0] for e in entities], dtype=object)
+        self.ids = np.array([e[1] for e in entities], dtype=np.int64)
+        self.names = [e[2] for e in entities]
+        self.details = [e[3] for e in entities]
+        normalized_names = [normalize(e[2]) for e in entities]
+        # Names in sorted order for prefix range lookups
+        self.name_order = np.argsort(np.array(normalized_names, dtype=object), kind='stable').astype(np.int32)
+        self.sorted_names = [normalized_names[i] for i in self.name_order]
+
+        name_index = defaultdict(list)
+        description_index = defaultdict(list)
+        self.name_sizes = np.zeros(len(entities), dtype=np.float64)
+        for position, (_, _, name, _, description) in enumerate(entities):
+            grams = trigrams(name)
+            self.name_sizes[position] = len(grams)
+            for gram in grams:
+                name_index[gram].append(position)
+            for word in set(normalize(description).split()):
+                description_index[word].append(position)
+        self.name_postings = _postings(name_index)
+        self.description_postings = _postings(description_index)
+        self.positions = {(entity_type, int(entity_id)): position
+                          for position, (entity_type, entity_id) in enumerate(zip(self.types, self.ids))}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _hit_counts(self, postings, keys):
+        hits = [postings[key] for key in keys if key in postings]
+        if not hits:
+            return np.zeros(len(self), dtype=np.float64)
+        return np.bincount(np.concatenate(hits), minlength=len(self)).astype(np.float64)
+
+    def prefix_matches(self, prefix):
+        """Positions of entities whose normalized name starts with ``prefix``"""
+        lo = bisect_left(self.sorted_names, prefix)
+        hi = bisect_left(self.sorted_names, prefix + '\x7f', lo)
+        return self.name_order[lo:hi]
+
+    def search(self, query, limit=10, types=None):
+        """Best matches for a query as dicts with type, id, name, detail and url
+
+        Names are scored by the share of query trigrams they contain, with a
+        boost for prefix matches and for query words found in the description.
+        """
+        normalized = normalize(query)
+        query_grams = trigrams(normalized)
+        if not query_grams or not len(self):
+            return []
+
+        shared = self._hit_counts(self.name_postings, query_grams)
+        coverage = shared / len(query_grams)
+        jaccard = shared / (len(query_grams) + self.name_sizes - shared)
+
+        query_words = set(normalized.split())
+        described = self._hit_counts(self.description_postings, query_words) / len(query_words)
+
+        prefixed = np.zeros(len(self), dtype=bool)
+        prefixed[self.prefix_matches(normalized)] = True
+
+        candidates = np.flatnonzero((coverage >= MIN_COVERAGE) | (described == 1) | prefixed)
+        if types:
+            candidates = candidates[np.isin(self.types[candidates], list(types))]
+        if not len(candidates):
+            return []
+
+        scores = (
+            coverage[candidates]
+            + 0.1 * jaccard[candidates]
+            + DESCRIPTION_WEIGHT * described[candidates]
+            + PREFIX_BOOST * prefixed[candidates]
+        )
+
+        if len(candidates) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        return [self._result(position) for position in candidates[top]]
+
+    def first(self, entity_type, limit=10):
+        """Entities of one type in name order, for dropdowns before anything is typed"""
+        order = self.name_order[self.types[self.name_order] == entity_type][:limit]
+        return [self._result(position) for position in order]
+
+    def get(self, entity_type, entity_id):
+        """Result dict for one entity, or None if it is not indexed"""
+        position = self.positions.get((entity_type, int(entity_id)))
+        return self._result(position) if position is not None else None
+
+    def _result(self, position):
+        entity_type = self.types[position]
+        entity_id = int(self.ids[position])
+        return {
+            'type': entity_type,
+            'id': entity_id,
+            'name': self.names[position],
+            'detail': self.details[position],
+            'url': ENTITY_URLS[entity_type].format(id=entity_id),
+        }
+
+
+def _load_entities():
+    """(type, id, name, detail, description) for every searchable row"""
+    reference = refreshed_reference_data()
+    for c in reference.countries.values():
+        yield 'country', c.id, c.name, c.region or '', ''
+
+    # Descriptions are not part of the reference records
+    descriptions = dict(db.session.query(Crude.id, Crude.description).filter(Crude.description.isnot(None)))
+    for c in reference.crudes.values():
+        yield 'crude', c.id, c.name, reference.country_name(c.country_id, ''), descriptions.get(c.id, '')
+
+    for c in reference.companies.values():
+        yield 'company', c.id, c.name, c.company_type or '', ''
+
+    for r in db.session.query(
+        UpstreamProject.id, UpstreamProject.name, UpstreamProject.description,
+        UpstreamProject.status, Country.name.label('country_name')
+    ).outerjoin(Country, UpstreamProject.country_id == Country.id).yield_per(5000):
+        detail = ' · '.join(part for part in (r.country_name, r.status) if part)
+        yield 'project', r.id, r.name, detail, r.description or ''
+
+
+_index = VersionedResource(lambda previous: SearchIndex(_load_entities()), [Country, Crude, Company, UpstreamProject])
+
+
+def get_search_index():
+    """Search index for the current process, rebuilt when any indexed table changes"""
+    return _index.get()
+
+
+def search(query, limit=10, types=None):
+    """Typeahead matches across all entity types"""
+    return get_search_index().search(query, limit=limit, types=types)
+
+
+def _option(result):
+    label = f"{result['name']} ({result['detail'] or 'Unknown'})" if result['type'] == 'crude' else result['name']
+    return {'label': label, 'value': result['id']}
+
+
+def search_options(entity_type, search_value=None, selected=None, limit=OPTION_LIMIT):
+    """Dropdown options for one entity type matching what the user has typed
+
+    Only the top ``limit`` matches are returned; currently selected values are
+    always kept so the dropdown can still display their labels.
+    """
+    index = get_search_index()
+    if search_value and normalize(search_value):
+        results = index.search(search_value, limit=limit, types=[entity_type])
+    else:
+        results = index.first(entity_type, limit)
+
+    options = [_option(result) for result in results]
+    shown = {option['value'] for option in options}
+    selected = selected if isinstance(selected, list) else [selected]
+    for value in selected:
+        if value is not None and value not in shown:
+            result = index.get(entity_type, value)
+            if result is not None:
+                options.append(_option(result))
+    return options
+
+
+def linked_entity(search, entity_type):
+    """Id of the ``entity_type`` named in an ENTITY_URLS query string (e.g. '?crude=12'), or None"""
+    values = parse_qs((search or '').lstrip('?')).get(entity_type)
+    try:
+        return int(values[0]) if values else None
+    except ValueError:
+        return None
@@ -0,0 +1,172 @@
+"""
+Shared Columnar Snapshot
+Memory-mapped NumPy snapshot of the fact tables, shared read-only by all workers
+"""
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from flask import current_app
+from app.models import Country, Production, Exports, Imports, Reserves
+from app.services.datastore import ColumnarStore, FactColumns
+from app.services.versioning import data_version
+
+
+SNAPSHOT_MODELS = [Country, Production, Exports, Imports, Reserves]
+FACT_COLUMNS = ('id', 'country_id', 'date', 'value')
+
+POINTER_NAME = 'CURRENT'
+SCHEMA_NAME = 'schema.json'
+LOCK_NAME = '.build.lock'
+
+# Snapshots kept on disk, including the current one
+KEEP_SNAPSHOTS = 2
+
+
+def _version_key(version):
+    """Directory name for a data version"""
+    return hashlib.sha1(json.dumps(version).encode()).hexdigest()[:16]
+
+
+def current_snapshot_name(root):
+    """Name of the published snapshot, or None"""
+    try:
+        with open(os.path.join(root, POINTER_NAME)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _prune_snapshots(root, current):
+    """Remove old snapshot directories; workers still mapping them keep their pages"""
+    names = [
+        name for name in os.listdir(root)
+        if name != current and not name.startswith('.') and os.path.isdir(os.path.join(root, name))
+    ]
+    names.sort(key=lambda name: os.path.getmtime(os.path.join(root, name)), reverse=True)
+    for name in names[KEEP_SNAPSHOTS - 1:]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def build_columnar_snapshot(root, force=False):
+    """Write a snapshot for the current data version and atomically publish it
+
+    Returns the snapshot name. Must run inside an application context.
+    """
+    version = data_version(*SNAPSHOT_MODELS)
+    name = _version_key(version)
+    if not force and current_snapshot_name(root) == name:
+        return name
+
+    store = ColumnarStore()
+    store.refresh()
+
+    os.makedirs(root, exist_ok=True)
+    tmp_dir = os.path.join(root, f'.{name}.{os.getpid()}.tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    schema = {
+        'version': version,
+        'created_at': datetime.utcnow().isoformat(),
+        'tables': {},
+        'countries': store.countries.reset_index().to_dict('records')
+    }
+    for table, columns in store.tables.items():
+        for column in FACT_COLUMNS:
+            np.save(os.path.join(tmp_dir, f'{table}.{column}.npy'), np.ascontiguousarray(getattr(columns, column)))
+        schema['tables'][table] = {
+            'rows': len(columns),
+            'columns': {column: str(getattr(columns, column).dtype) for column in FACT_COLUMNS}
+        }
+    with open(os.path.join(tmp_dir, SCHEMA_NAME), 'w') as f:
+        json.dump(schema, f, default=str)
+
+    final_dir = os.path.join(root, name)
+    if os.path.exists(final_dir):
+        # Same version already built by another process
+        shutil.rmtree(tmp_dir)
+    else:
+        os.rename(tmp_dir, final_dir)
+
+    pointer_tmp = os.path.join(root, f'.{POINTER_NAME}.{os.getpid()}')
+    with open(pointer_tmp, 'w') as f:
+        f.write(name)
+    os.replace(pointer_tmp, os.path.join(root, POINTER_NAME))
+
+    _prune_snapshots(root, name)
+    return name
+
+
+def load_columnar_snapshot(root, name):
+    """Open a published snapshot with every column memory-mapped read-only"""
+    path = os.path.join(root, name)
+    with open(os.path.join(path, SCHEMA_NAME)) as f:
+        schema = json.load(f)
+
+    store = ColumnarStore()
+    if schema['countries']:
+        store.countries = pd.DataFrame(schema['countries']).set_index('id')
+    for table in schema['tables']:
+        arrays = [np.load(os.path.join(path, f'{table}.{column}.npy'), mmap_mode='r') for column in FACT_COLUMNS]
+        store.tables[table] = FactColumns.from_sorted(*arrays)
+    return store
+
+
+class SharedStore:
+    """Follows the CURRENT pointer and swaps to new snapshots as they are published"""
+
+    def __init__(self):
+        self._store = None
+        self._name = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _rebuild_if_stale(self, root):
+        """Publish a new snapshot when the database moved on; one builder at a time"""
+        if _version_key(data_version(*SNAPSHOT_MODELS)) == self._name:
+            return
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, LOCK_NAME), 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another worker is already building; keep serving the current snapshot
+                return
+            try:
+                build_columnar_snapshot(root)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get(self, root):
+        interval = current_app.config.get('DATA_VERSION_CHECK_INTERVAL', 60)
+        if self._store is not None and time.monotonic() - self._checked_at < interval:
+            return self._store
+
+        with self._lock:
+            if self._store is not None and time.monotonic() - self._checked_at < interval:
+                return self._store
+            # A fresh worker maps the published snapshot straight away and checks staleness later
+            if self._store is not None or current_snapshot_name(root) is None:
+                self._rebuild_if_stale(root)
+            name = current_snapshot_name(root)
+            if name is None:
+                return None
+            if name != self._name:
+                self._store = load_columnar_snapshot(root, name)
+                self._name = name
+            self._checked_at = time.monotonic()
+        return self._store
+
+
+_shared = SharedStore()
+
+
+def get_shared_store(root):
+    """Memory-mapped store for this worker, or None if no snapshot is published"""
+    return _shared.get(root)
@@ -0,0 +1,71 @@
+"""
+Crude Similarity Index
+Nearest-neighbour lookup of crudes by standardized quality attributes
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+from app.models import Crude
+from app.services.reference import get_reference_data, refreshed_reference_data
+from app.services.versioning import VersionedResource
+
+
+# Quality attributes compared, each scaled to unit standard deviation
+SIMILARITY_FEATURES = ('api_gravity', 'sulfur_content', 'carbon_intensity')
+
+SIMILAR_CRUDES_LIMIT = 5
+
+
+class CrudeSimilarityIndex:
+    """KD-tree over z-scored quality attributes of every fully assayed crude
+
+    Crudes missing any attribute are left out of the index.
+    """
+
+    def __init__(self, crudes):
+        crudes = [c for c in crudes if all(getattr(c, f) is not None for f in SIMILARITY_FEATURES)]
+        self.crude_ids = np.array([c.id for c in crudes], dtype=np.int64)
+        self.positions = {c.id: position for position, c in enumerate(crudes)}
+
+        features = np.array([[getattr(c, f) for f in SIMILARITY_FEATURES] for c in crudes],
+                            dtype=np.float64).reshape(-1, len(SIMILARITY_FEATURES))
+        self.mean = features.mean(axis=0) if len(features) else np.zeros(len(SIMILARITY_FEATURES))
+        scale = features.std(axis=0) if len(features) else np.ones(len(SIMILARITY_FEATURES))
+        # A constant attribute carries no information; avoid dividing by zero
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.points = (features - self.mean) / self.scale
+        self.tree = cKDTree(self.points) if len(crudes) else None
+
+    def __len__(self):
+        return len(self.crude_ids)
+
+    def neighbours(self, crude_id, k=SIMILAR_CRUDES_LIMIT):
+        """(crude_id, distance) pairs for the ``k`` closest other crudes, nearest first"""
+        position = self.positions.get(crude_id)
+        if position is None or len(self) < 2:
+            return []
+        # The crude itself is its own nearest point; ask for one extra
+        count = min(k + 1, len(self))
+        distances, positions = self.tree.query(self.points[position], k=count)
+        return [
+            (int(self.crude_ids[p]), float(d))
+            for d, p in zip(np.atleast_1d(distances), np.atleast_1d(positions))
+            if p != position
+        ][:k]
+
+
+_index = VersionedResource(lambda previous: CrudeSimilarityIndex(refreshed_reference_data().crudes.values()), [Crude])
+
+
+def get_similarity_index():
+    """Similarity index for the current process, rebuilt when crude data changes"""
+    return _index.get()
+
+
+def similar_crudes(crude_id, k=SIMILAR_CRUDES_LIMIT):
+    """The ``k`` crudes closest in quality to ``crude_id`` as (CrudeRecord, distance) pairs"""
+    reference = get_reference_data()
+    return [
+        (reference.crude(neighbour_id), distance)
+        for neighbour_id, distance in get_similarity_index().neighbours(crude_id, k)
+        if reference.crude(neighbour_id) is not None
+    ]
@@ -0,0 +1,149 @@
+"""
+Warehouse Parquet Snapshots
+Writes fact tables to year/month partitioned Parquet files for offline analytics
+"""
+import json
+import os
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import func, extract, select
+from app import db
+from app.models import Production, Exports, Imports, Reserves, CrudePrice, UpstreamProject
+
+
+# Table name -> (model, column used for year/month partitioning)
+SNAPSHOT_TABLES = {
+    'production': (Production, Production.date),
+    'exports': (Exports, Exports.date),
+    'imports': (Imports, Imports.date),
+    'reserves': (Reserves, Reserves.date),
+    'crude_prices': (CrudePrice, CrudePrice.date),
+    'upstream_projects': (UpstreamProject, UpstreamProject.created_at),
+}
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def _partition_key(year, month):
+    """Hive-style partition directory for a year/month"""
+    if year is None:
+        return 'year=unknown'
+    return f'year={year}/month={month:02d}'
+
+
+def _partition_fingerprints(model, partition_column):
+    """Row count, id checksum and last update for every year/month partition"""
+    year = extract('year', partition_column)
+    month = extract('month', partition_column)
+
+    results = db.session.query(
+        year.label('year'),
+        month.label('month'),
+        func.count(model.id).label('row_count'),
+        func.sum(model.id).label('id_sum'),
+        func.max(model.updated_at).label('last_updated')
+    ).group_by(year, month).all()
+
+    fingerprints = {}
+    for r in results:
+        y = int(r.year) if r.year is not None else None
+        m = int(r.month) if r.month is not None else None
+        fingerprints[_partition_key(y, m)] = {
+            'year': y,
+            'month': m,
+            'rows': r.row_count,
+            'id_sum': int(r.id_sum or 0),
+            'last_updated': r.last_updated.isoformat() if r.last_updated else None
+        }
+    return fingerprints
+
+
+def _write_partition(model, partition_column, year, month, path):
+    """Write one partition to Parquet, replacing any previous file atomically"""
+    statement = select(model.__table__)
+    if year is None:
+        statement = statement.where(partition_column.is_(None))
+    else:
+        statement = statement.where(
+            extract('year', partition_column) == year,
+            extract('month', partition_column) == month
+        )
+    df = pd.read_sql(statement.order_by(model.id), db.session.connection())
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    df.to_parquet(tmp_path, engine='pyarrow', compression='zstd', index=False)
+    os.replace(tmp_path, path)
+    return len(df)
+
+
+def load_manifest(output_dir):
+    """Load the published manifest, or an empty one"""
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(manifest_path):
+        return {'tables': {}}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def snapshot_warehouse(output_dir, tables=None):
+    """Refresh the Parquet snapshot, rewriting only partitions whose data changed
+
+    Returns the published manifest. Must run inside an application context.
+    """
+    previous = load_manifest(output_dir)
+    manifest = {'generated_at': datetime.utcnow().isoformat(), 'tables': {}}
+    stats = {'written': 0, 'unchanged': 0, 'removed': 0}
+
+    for table_name in tables or SNAPSHOT_TABLES:
+        model, partition_column = SNAPSHOT_TABLES[table_name]
+        old_partitions = previous.get('tables', {}).get(table_name, {}).get('partitions', {})
+        partitions = {}
+
+        for key, fingerprint in _partition_fingerprints(model, partition_column).items():
+            rel_path = os.path.join(table_name, key, 'part.parquet')
+            entry = {**fingerprint, 'path': rel_path}
+            old = old_partitions.get(key)
+            unchanged = (
+                old is not None
+                and all(old.get(field) == fingerprint[field] for field in ('rows', 'id_sum', 'last_updated'))
+                and os.path.exists(os.path.join(output_dir, rel_path))
+            )
+            if unchanged:
+                entry['written_at'] = old.get('written_at')
+                stats['unchanged'] += 1
+            else:
+                _write_partition(
+                    model, partition_column, fingerprint['year'], fingerprint['month'],
+                    os.path.join(output_dir, rel_path)
+                )
+                entry['written_at'] = manifest['generated_at']
+                stats['written'] += 1
+            partitions[key] = entry
+
+        # Partitions that no longer hold any rows
+        for key, old in old_partitions.items():
+            if key not in partitions:
+                stale_path = os.path.join(output_dir, old['path'])
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+                stats['removed'] += 1
+
+        manifest['tables'][table_name] = {
+            'columns': [c.name for c in model.__table__.columns],
+            'partition_column': partition_column.key,
+            'rows': sum(p['rows'] for p in partitions.values()),
+            'partitions': partitions
+        }
+
+    # Tables not refreshed in this run keep their previous manifest entry
+    for table_name, entry in previous.get('tables', {}).items():
+        manifest['tables'].setdefault(table_name, entry)
+
+    manifest['stats'] = stats
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(f'{manifest_path}.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f'{manifest_path}.tmp', manifest_path)
+    return manifest
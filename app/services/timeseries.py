@@ -0,0 +1,74 @@
+"""
+Time-Series Range Queries
+Date-windowed series fetched in cached calendar-year chunks
+"""
+from datetime import date, timedelta
+import pandas as pd
+from sqlalchemy import func
+from app import db, cache
+from app.models import Production, Exports, Imports
+from app.services.versioning import throttled_version
+
+
+# Series name -> (model, value column)
+SERIES_TABLES = {
+    'production': (Production, Production.production_bbl),
+    'exports': (Exports, Exports.exports_bbl),
+    'imports': (Imports, Imports.imports_bbl),
+}
+
+
+@cache.memoize(timeout=3600)
+def _series_year(table, country_id, year, version):
+    """Per-date totals for one country and calendar year
+
+    ``version`` only keys the cache so chunks are recomputed after data changes.
+    """
+    model, value = SERIES_TABLES[table]
+    results = db.session.query(
+        model.date,
+        func.sum(value).label('total')
+    ).filter(
+        model.country_id == country_id,
+        model.date >= date(year, 1, 1),
+        model.date < date(year + 1, 1, 1)
+    ).group_by(model.date).order_by(model.date).all()
+    return [(r.date, r.total) for r in results]
+
+
+def country_series(table, country_id, start, end):
+    """Per-date totals for a country within [start, end]
+
+    The window is served from year-aligned chunks, so overlapping or shifted
+    ranges reuse cached chunks and only query the years they add.
+    """
+    model, _ = SERIES_TABLES[table]
+    version = throttled_version(model)
+    rows = []
+    for year in range(start.year, end.year + 1):
+        rows.extend(r for r in _series_year(table, country_id, year, version) if start <= r[0] <= end)
+    return pd.Series(
+        [r[1] for r in rows],
+        index=pd.DatetimeIndex([r[0] for r in rows], name='date'),
+        dtype='float64'
+    )
+
+
+def _parse_date(value):
+    return pd.Timestamp(value).date() if value else None
+
+
+def resolve_window(start_date, end_date, relayout_data=None, default_days=365*5):
+    """Date window for a trend chart
+
+    Uses the date-range picker values, narrowed to the visible x-axis range when
+    the user zoomed the chart. Returns (start, end, zoomed).
+    """
+    end = _parse_date(end_date) or date.today()
+    start = _parse_date(start_date) or end - timedelta(days=default_days)
+
+    if relayout_data and 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        zoom_start = _parse_date(relayout_data['xaxis.range[0]'])
+        zoom_end = _parse_date(relayout_data['xaxis.range[1]'])
+        return zoom_start, zoom_end, True
+    return start, end, False
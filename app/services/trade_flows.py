@@ -0,0 +1,130 @@
+"""
+Trade-Flow Matrix Engine
+Sparse origin x destination volumes per month, built from one aggregated query
+"""
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, extract
+from app import db
+from app.models import Exports, Imports
+from app.services.versioning import VersionedResource
+
+
+# Basis -> (model, origin column, destination column, volume column)
+# Exports are reported by the origin country, imports by the destination country
+FLOW_BASES = {
+    'exports': (Exports, Exports.country_id, Exports.destination_country_id, Exports.exports_bbl),
+    'imports': (Imports, Imports.source_country_id, Imports.country_id, Imports.imports_bbl),
+}
+
+
+def period_index(year, month):
+    """Monthly period number used as the matrix time axis"""
+    return year * 12 + month - 1
+
+
+def period_label(period):
+    """YYYY-MM label for a period number"""
+    return f"{period // 12}-{period % 12 + 1:02d}"
+
+
+class FlowMatrix:
+    """Sparse (period, origin, destination) -> volume triples sorted by period"""
+
+    __slots__ = ('period', 'origin', 'destination', 'volume')
+
+    def __init__(self, period, origin, destination, volume):
+        order = np.argsort(period, kind='stable')
+        self.period = period[order]
+        self.origin = origin[order]
+        self.destination = destination[order]
+        self.volume = volume[order]
+
+    def __len__(self):
+        return len(self.volume)
+
+    @property
+    def periods(self):
+        """Distinct periods with data"""
+        return np.unique(self.period)
+
+    def _rows(self, start_period=None, end_period=None):
+        lo = np.searchsorted(self.period, start_period, 'left') if start_period is not None else 0
+        hi = np.searchsorted(self.period, end_period, 'right') if end_period is not None else len(self.period)
+        return slice(lo, hi)
+
+    def flows(self, start_period=None, end_period=None, groups=None):
+        """Volumes summed over a period range, one row per origin/destination pair
+
+        ``groups`` optionally maps country id -> block label (e.g. region) to roll
+        the matrix up into regional blocks. Returns a DataFrame sorted by volume.
+        """
+        rows = self._rows(start_period, end_period)
+        origin = self.origin[rows]
+        destination = self.destination[rows]
+        volume = self.volume[rows]
+
+        if groups is not None:
+            labels = pd.Index(sorted(set(groups.values())))
+            size = max(max(groups, default=0), origin.max(initial=0), destination.max(initial=0)) + 1
+            lookup = np.full(size, -1, dtype=np.int64)
+            lookup[list(groups.keys())] = labels.get_indexer(list(groups.values()))
+            origin, destination = lookup[origin], lookup[destination]
+            known = (origin >= 0) & (destination >= 0)
+            origin, destination, volume = origin[known], destination[known], volume[known]
+
+        width = int(max(origin.max(initial=0), destination.max(initial=0))) + 1
+        keys, inverse = np.unique(origin.astype(np.int64) * width + destination, return_inverse=True)
+        totals = np.bincount(inverse, weights=volume, minlength=len(keys))
+
+        df = pd.DataFrame({'origin': keys // width, 'destination': keys % width, 'volume': totals})
+        if groups is not None:
+            df['origin'] = labels[df['origin'].to_numpy()]
+            df['destination'] = labels[df['destination'].to_numpy()]
+        return df.sort_values('volume', ascending=False, ignore_index=True)
+
+    def top_partners(self, country_id, direction='destination', n=10, start_period=None, end_period=None):
+        """Largest partners of a country, as a Series of volume indexed by partner id"""
+        rows = self._rows(start_period, end_period)
+        own, partner = (self.origin, self.destination) if direction == 'destination' else (self.destination, self.origin)
+        mask = own[rows] == country_id
+        partners = partner[rows][mask]
+        totals = np.bincount(partners, weights=self.volume[rows][mask])
+        index = np.flatnonzero(totals)
+        return pd.Series(totals[index], index=index).nlargest(n)
+
+
+def _load_flow_matrix(basis):
+    """Aggregate a flow basis to (month, origin, destination) in a single query"""
+    model, origin, destination, volume = FLOW_BASES[basis]
+    year = extract('year', model.date)
+    month = extract('month', model.date)
+
+    results = db.session.query(
+        year.label('year'),
+        month.label('month'),
+        origin.label('origin'),
+        destination.label('destination'),
+        func.sum(volume).label('volume')
+    ).filter(
+        origin.isnot(None),
+        destination.isnot(None)
+    ).group_by(year, month, origin, destination).all()
+
+    return FlowMatrix(
+        np.fromiter((period_index(int(r.year), int(r.month)) for r in results), dtype=np.int32, count=len(results)),
+        np.fromiter((r.origin for r in results), dtype=np.int32, count=len(results)),
+        np.fromiter((r.destination for r in results), dtype=np.int32, count=len(results)),
+        np.fromiter((r.volume or 0 for r in results), dtype=np.float64, count=len(results))
+    )
+
+
+_matrices = {
+    basis: VersionedResource(lambda previous, basis=basis: _load_flow_matrix(basis), [model])
+    for basis, (model, *_) in FLOW_BASES.items()
+}
+
+
+def get_flow_matrix(basis='exports'):
+    """Cached flow matrix for a basis, rebuilt when its source table changes"""
+    return _matrices[basis].get()
@@ -0,0 +1,82 @@
+"""
+Data Versioning
+Cheap change detection for caches built from database tables
+"""
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func
+from app import db
+
+
+def table_version(model):
+    """Row count and last update timestamp of a table"""
+    row_count, last_updated = db.session.query(
+        func.count(model.id),
+        func.max(model.updated_at)
+    ).one()
+    return row_count, last_updated.isoformat() if last_updated else None
+
+
+def data_version(*models):
+    """Combined version of several tables; changes on any insert, update or delete"""
+    return tuple(table_version(model) for model in models)
+
+
+_throttled_versions = {}
+
+
+def throttled_version(*models):
+    """data_version() re-queried at most once per DATA_VERSION_CHECK_INTERVAL
+
+    Suitable as a cache-key component: cached results are keyed by the version
+    they were computed from, so stale entries are simply never read again.
+    """
+    key = tuple(model.__tablename__ for model in models)
+    interval = current_app.config.get('DATA_VERSION_CHECK_INTERVAL', 60)
+    checked_at, version = _throttled_versions.get(key, (0.0, None))
+    if version is None or time.monotonic() - checked_at >= interval:
+        version = data_version(*models)
+        _throttled_versions[key] = (time.monotonic(), version)
+    return version
+
+
+class VersionedResource:
+    """Lazily built value that is rebuilt when its source tables change
+
+    The version query runs at most once per DATA_VERSION_CHECK_INTERVAL seconds,
+    so readers normally get the cached value without touching the database.
+    ``builder`` receives the previous value (or None) to allow incremental refreshes.
+    """
+
+    def __init__(self, builder, models):
+        self.builder = builder
+        self.models = models
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self._version
+
+    def get(self):
+        """Return the current value, rebuilding it if the data version changed"""
+        interval = current_app.config.get('DATA_VERSION_CHECK_INTERVAL', 60)
+        if self._value is not None and time.monotonic() - self._checked_at < interval:
+            return self._value
+
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._checked_at < interval:
+                return self._value
+            version = data_version(*self.models)
+            if self._value is None or version != self._version:
+                self._value = self.builder(self._value)
+                self._version = version
+            self._checked_at = time.monotonic()
+        return self._value
+
+    def invalidate(self):
+        """Force a version check on the next read"""
+        self._checked_at = 0.0
@@ -21,6 +21,15 @@ class Config:
     CACHE_TYPE = 'simple'
     CACHE_DEFAULT_TIMEOUT = 300
     
+    # Seconds between data-version checks for in-process caches
+    DATA_VERSION_CHECK_INTERVAL = int(os.environ.get('DATA_VERSION_CHECK_INTERVAL', 60))
+    
+    # Parquet warehouse snapshots for offline analytics
+    SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR') or str(basedir / 'snapshots')
+    
+    # Memory-mapped columnar snapshot shared by workers (disabled when unset)
+    COLUMNAR_SNAPSHOT_DIR = os.environ.get('COLUMNAR_SNAPSHOT_DIR')
+    
     # Dash configuration
     DASH_ROUTES_PATHNAME_PREFIX = '/dash/'
     
@@ -41,6 +50,7 @@ class ProductionConfig(Config):
     DEBUG = False
     CACHE_TYPE = 'redis'
     CACHE_REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    COLUMNAR_SNAPSHOT_DIR = os.environ.get('COLUMNAR_SNAPSHOT_DIR') or str(basedir / 'columnar')
 
 
 config = {
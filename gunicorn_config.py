@@ -36,3 +36,15 @@ tmp_upload_dir = None
 # keyfile = None
 # certfile = None
 
+
+# Server hooks
+def on_starting(server):
+    """Publish the shared columnar snapshot before workers fork so they start warm"""
+    from app import create_app
+    from app.services.shared_store import build_columnar_snapshot
+    
+    app = create_app(os.environ.get('FLASK_ENV', 'default'))
+    root = app.config.get('COLUMNAR_SNAPSHOT_DIR')
+    if root:
+        with app.app_context():
+            build_columnar_snapshot(root)
@@ -2,6 +2,7 @@
 Database initialization script
 Creates tables and seeds sample data
 """
+import os
 from app import create_app, db
 from app.models import Country, Production, Exports, Reserves, Imports
 from datetime import date, timedelta
@@ -198,7 +199,7 @@ def seed_reserves_data():
 
 def init_database():
     """Initialize database with tables and sample data"""
-    app = create_app()
+    app = create_app(os.environ.get('FLASK_ENV', 'default'))
     
     with app.app_context():
         # Create all tables
@@ -213,6 +214,12 @@ def init_database():
         seed_exports_data()
         seed_reserves_data()
         
+        # Publish the shared columnar snapshot for the freshly ingested data
+        if app.config.get('COLUMNAR_SNAPSHOT_DIR'):
+            from app.services.shared_store import build_columnar_snapshot
+            build_columnar_snapshot(app.config['COLUMNAR_SNAPSHOT_DIR'])
+            print("✓ Columnar snapshot published")
+        
         print("\n✓ Database initialization complete!")
 
 
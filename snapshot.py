@@ -0,0 +1,31 @@
+"""
+Warehouse snapshot job
+Refreshes the partitioned Parquet snapshot and the shared columnar snapshot;
+schedule periodically (e.g. cron) or run after each ingest
+"""
+import os
+import sys
+from app import create_app
+from app.services.snapshots import snapshot_warehouse
+from app.services.shared_store import build_columnar_snapshot
+
+
+def run_snapshot(output_dir=None):
+    """Write changed partitions and publish the manifest"""
+    app = create_app(os.environ.get('FLASK_ENV', 'default'))
+    
+    with app.app_context():
+        output_dir = output_dir or app.config['SNAPSHOT_DIR']
+        print(f"Snapshotting warehouse to {output_dir}...")
+        manifest = snapshot_warehouse(output_dir)
+        stats = manifest['stats']
+        print(f"✓ {stats['written']} partitions written, "
+              f"{stats['unchanged']} unchanged, {stats['removed']} removed")
+        
+        if app.config.get('COLUMNAR_SNAPSHOT_DIR'):
+            name = build_columnar_snapshot(app.config['COLUMNAR_SNAPSHOT_DIR'])
+            print(f"✓ Columnar snapshot {name} published")
+
+
+if __name__ == '__main__':
+    run_snapshot(sys.argv[1] if len(sys.argv) > 1 else None)